@@ -0,0 +1,98 @@
+"""
+Content-addressed cache for expensive generated assets (DALL-E image,
+lip-sync video).
+
+Entries live in .cache/assets/<key><ext>, where key is a SHA-256 over the
+inputs that determine the output (input file bytes, model version, params).
+Hits refresh the entry's mtime; after each insert the least recently used
+entries are evicted until the cache fits in ASSET_CACHE_MAX_BYTES.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+import file_lock
+
+CACHE_DIR = ".cache/assets"
+ASSET_CACHE_MAX_BYTES = int(os.getenv("ASSET_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))  # 2 GiB
+
+_lock = threading.Lock()
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_key(kind, **inputs):
+    """Key over a JSON-serializable description of the inputs (hash files with file_sha256 first)."""
+    payload = json.dumps({"kind": kind, **inputs}, sort_keys=True)
+    return f"{kind}_" + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def _entry_path(key, ext):
+    return os.path.join(CACHE_DIR, key + ext)
+
+
+def fetch(key, ext, dest_path):
+    """Copy a cached entry to dest_path. Returns True on a hit."""
+    path = _entry_path(key, ext)
+    with _lock:
+        if not os.path.exists(path):
+            return False
+        os.utime(path)  # Mark as recently used
+    os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+    try:
+        shutil.copyfile(path, dest_path)
+    except FileNotFoundError:
+        return False  # Evicted by another job in the meantime
+    return True
+
+
+def store(key, ext, src_path):
+    """Add src_path to the cache under key, then evict down to the size budget."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _entry_path(key, ext)
+    tmp_path = file_lock.unique_tmp_path(path)
+    shutil.copyfile(src_path, tmp_path)
+    os.replace(tmp_path, path)
+    evict()
+    return path
+
+
+def evict(max_bytes=None):
+    """Remove least recently used entries until the cache fits. Returns bytes reclaimed."""
+    max_bytes = ASSET_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    with _lock:
+        if not os.path.isdir(CACHE_DIR):
+            return 0
+        entries = []
+        for name in os.listdir(CACHE_DIR):
+            if name.endswith(".tmp"):
+                continue
+            path = os.path.join(CACHE_DIR, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue  # Another job evicted it
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        reclaimed = 0
+        for _mtime, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Another job evicted it first; it no longer counts either way
+            total -= size
+            reclaimed += size
+        if reclaimed:
+            print(f"  [Asset cache] Evicted {reclaimed / 1024 ** 2:.1f} MB (now {total / 1024 ** 2:.1f} MB)")
+        return reclaimed
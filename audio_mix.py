@@ -0,0 +1,95 @@
+"""
+Pre-mixed audio bed.
+
+Renders everything a video hears into one loudness-normalized AAC file with
+ffmpeg before Remotion runs, so the composition plays a single <Audio>
+instead of decoding and mixing several tracks per frame:
+- voice clips are placed at their start offsets and summed;
+- optional BGM is looped to length, lowered by BGM_GAIN_DB and ducked
+  further under the voice with a sidechain compressor;
+- the mix is normalized to AUDIO_MIX_LUFS integrated loudness (EBU R128).
+"""
+import os
+import shutil
+import subprocess
+
+SAMPLE_RATE = 48000
+AUDIO_MIX_LUFS = float(os.getenv("AUDIO_MIX_LUFS", "-14"))   # YouTube's playback target
+TRUE_PEAK_DB = -1.5
+BGM_GAIN_DB = float(os.getenv("BGM_GAIN_DB", "-10"))          # BGM level before ducking
+DUCK_THRESHOLD = 0.03   # voice level (linear) where ducking starts
+DUCK_RATIO = 8
+DUCK_ATTACK_MS = 20
+DUCK_RELEASE_MS = 400
+
+
+def ffmpeg_available():
+    return shutil.which("ffmpeg") is not None
+
+
+def build_filtergraph(voice_offsets, has_bgm, total_sec):
+    """
+    Inputs are the voice clips in order, then the (looped) BGM if has_bgm.
+    Returns (filtergraph, output label).
+    """
+    fmt = f"aresample={SAMPLE_RATE},aformat=sample_fmts=fltp:channel_layouts=stereo"
+    parts = []
+    labels = []
+    for k, offset in enumerate(voice_offsets):
+        delay_ms = int(round(offset * 1000))
+        parts.append(f"[{k}:a]{fmt},adelay={delay_ms}:all=1[v{k}]")
+        labels.append(f"[v{k}]")
+
+    voice = "".join(labels)
+    voice += f"amix=inputs={len(labels)}:duration=longest:normalize=0," if len(labels) > 1 else "anull,"
+    voice += f"apad=whole_dur={total_sec:.3f},atrim=duration={total_sec:.3f}"
+    loudnorm = f"loudnorm=I={AUDIO_MIX_LUFS}:TP={TRUE_PEAK_DB}:LRA=11"
+
+    if not has_bgm:
+        parts.append(f"{voice},{loudnorm}[out]")
+        return ";".join(parts), "out"
+
+    bgm = len(voice_offsets)
+    parts.append(f"{voice},asplit=2[voice][key]")
+    parts.append(f"[{bgm}:a]{fmt},atrim=duration={total_sec:.3f},volume={BGM_GAIN_DB}dB[bgm]")
+    parts.append(f"[bgm][key]sidechaincompress=threshold={DUCK_THRESHOLD}:ratio={DUCK_RATIO}:"
+                 f"attack={DUCK_ATTACK_MS}:release={DUCK_RELEASE_MS}[ducked]")
+    parts.append(f"[voice][ducked]amix=inputs=2:duration=first:normalize=0,{loudnorm}[out]")
+    return ";".join(parts), "out"
+
+
+def build_audio_mix(voices, out_path, total_sec, bgm_path=None):
+    """
+    voices: [(audio_path, start_sec), ...]. Writes a total_sec long .m4a to
+    out_path and returns it. Raises subprocess.CalledProcessError on failure.
+    """
+    if not voices:
+        raise ValueError("No voice tracks")
+    inputs = []
+    for path, _start in voices:
+        inputs += ["-i", path]
+    if bgm_path:
+        inputs += ["-stream_loop", "-1", "-i", bgm_path]
+
+    filtergraph, last = build_filtergraph([start for _path, start in voices], bool(bgm_path), total_sec)
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    tmp_path = out_path + ".tmp.m4a"
+    cmd = [
+        "ffmpeg", "-nostdin", "-v", "error", "-y",
+        *inputs,
+        "-filter_complex", filtergraph,
+        "-map", f"[{last}]",
+        "-t", f"{total_sec:.3f}",
+        "-ar", str(SAMPLE_RATE),
+        "-c:a", "aac", "-b:a", "192k",
+        "-movflags", "+faststart",
+        tmp_path,
+    ]
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+    except subprocess.CalledProcessError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, out_path)
+    return out_path
@@ -1,15 +1,18 @@
 import os
 import shutil
 import subprocess
-import re
 import sys
 import random
+import shlex
+
+import audio_mix
+import media_probe
+import render_shards
+from workspace import Workspace
 
 # --- Configuration (Japanese Localized) ---
 BASE_INPUT_DIR = "素材"       # Inputs
 BGM_POOL_DIR = "素材/BGM集"   # BGM Pool
-ASSETS_DIR = "public/assets"
-ROOT_TSX = "src/Root.tsx"
 OUTPUT_DIR = "完成品"         # Outputs
 
 # Map input filenames (Japanese) to project asset names
@@ -34,9 +37,9 @@ def run_command(cmd, shell=True):
         print(e.stderr)
         sys.exit(1)
 
-def setup_bgm(src_dir):
+def setup_bgm(src_dir, ws):
     """Handle BGM selection: Specific override OR Random from pool."""
-    dst = os.path.join(ASSETS_DIR, "current_bgm.mp3")
+    dst = ws.asset("current_bgm.mp3")
     
     # 1. Check for specific override in the project folder (Japanese or English)
     specific_bgm_jp = os.path.join(src_dir, "BGM.mp3")
@@ -63,8 +66,8 @@ def setup_bgm(src_dir):
     
     print("  [BGM] BGMが見つかりませんでした (無音になります)")
 
-def setup_files(project_name):
-    """Copy files from inputs/project_name/ to public/assets/."""
+def setup_files(project_name, ws):
+    """Copy files from inputs/project_name/ into the job workspace."""
     # Determine source directory
     if project_name:
         src_dir = os.path.join(BASE_INPUT_DIR, project_name)
@@ -85,7 +88,7 @@ def setup_files(project_name):
     # Standard files
     for input_name, asset_name in FILE_MAPPING.items():
         src = os.path.join(src_dir, input_name)
-        dst = os.path.join(ASSETS_DIR, asset_name)
+        dst = ws.asset(asset_name)
         
         # Try Japanese name first
         if os.path.exists(src):
@@ -106,45 +109,34 @@ def setup_files(project_name):
                  print(f"  [!!] {input_name} が見つかりません！")
 
     # BGM Logic
-    setup_bgm(src_dir)
+    setup_bgm(src_dir, ws)
 
 def get_audio_duration(file_path):
-    """Get duration in seconds using ffprobe."""
+    """Get duration in seconds (shared cached probe)."""
     if not os.path.exists(file_path):
         return None
-    cmd = f"ffprobe -v error -show_entries format=duration -of default=noprint_wrappers=1:nokey=1 {file_path}"
+    return media_probe.duration(file_path)
+
+def duration_frames(duration_sec):
+    """Video length: the voice plus one second."""
+    return int(duration_sec * 30) + 30
+
+def premix_audio(ws, voice_path, duration_sec):
+    """Voice + ducked, loudness-normalized BGM as one file; None if it can't be built."""
+    if not duration_sec or not audio_mix.ffmpeg_available():
+        return None
+    bgm_path = ws.asset("current_bgm.mp3")
+    total_sec = duration_frames(duration_sec) / 30
     try:
-        duration_str = run_command(cmd)
-        return float(duration_str)
-    except:
+        mix_path = audio_mix.build_audio_mix(
+            [(voice_path, 0.0)], ws.asset("prototype_mix.m4a"), total_sec,
+            bgm_path=bgm_path if os.path.exists(bgm_path) else None)
+        print(f"  [Audio] ミックス済み音声: {mix_path}")
+        return mix_path
+    except subprocess.CalledProcessError as e:
+        print(f"  [Audio] Pre-mix failed: {e.stderr.decode(errors='ignore')[:200]}")
         return None
 
-def update_duration_in_root(duration_sec):
-    """Update durationInFrames in Root.tsx based on audio duration."""
-    fps = 30
-    total_frames = int(duration_sec * fps) + 30 
-    print(f"音声の長さ: {duration_sec:.2f}秒 -> {total_frames}フレーム に設定")
-    
-    with open(ROOT_TSX, "r") as f:
-        content = f.read()
-    
-    lines = content.splitlines()
-    new_lines = []
-    in_prototype = False
-    
-    for line in lines:
-        if 'id="Prototype"' in line:
-            in_prototype = True
-        
-        if in_prototype and "durationInFrames={" in line:
-            line = re.sub(r"durationInFrames=\{\d+\}", f"durationInFrames={{{total_frames}}}", line)
-            in_prototype = False 
-            
-        new_lines.append(line)
-        
-    with open(ROOT_TSX, "w") as f:
-        f.write("\n".join(new_lines))
-
 def main():
     print("=== 全自動動画生成ロボ ===")
     
@@ -156,27 +148,45 @@ def main():
     else:
         print("対象: '素材'フォルダ直下")
 
+    # Each run gets its own asset dir, so several productions can run at once
+    ws = Workspace.create()
+    print(f"ジョブ: {ws.job_id} ({ws.root})")
+
     # 1. Setup Files
-    setup_files(project_name)
+    setup_files(project_name, ws)
+    voice_path = ws.asset("juju_voice.mp3")
+    subtitles_path = ws.data("subtitles.json")
     
     # 2. Transcribe
     print("\n--- 文字起こし中 (AI) ---")
-    run_command("source venv/bin/activate && python3 transcribe.py")
+    run_command(f"source venv/bin/activate && python3 transcribe.py {shlex.quote(voice_path)} {shlex.quote(subtitles_path)}")
 
     print("\n==========================================")
     print("📝 字幕確認チェック")
     print("字幕ファイルを編集・修正できます:")
-    print("  - src/subtitles.json")
+    print(f"  - {subtitles_path}")
     print("")
     input("修正が終わったら Enter キーを押してください (中断は Ctrl+C)...")
     print("==========================================")
     
     # 3. Update Duration
     print("\n--- 長さ調整中 ---")
-    voice_path = os.path.join(ASSETS_DIR, "juju_voice.mp3")
     duration = get_audio_duration(voice_path)
+    props = {"mode": "vertical", "voiceSrc": ws.public_path(voice_path)}
     if duration:
-        update_duration_in_root(duration)
+        # Passed as a prop (calculateMetadata in Root.tsx) instead of editing the source
+        props["durationInFrames"] = duration_frames(duration)
+        print(f"音声の長さ: {duration:.2f}秒 -> {props['durationInFrames']}フレーム に設定")
+
+    # 3b. Pre-mix voice + ducked BGM into one track
+    if os.path.exists(ws.asset("current_bgm.mp3")):
+        props["bgmSrc"] = ws.public_path(ws.asset("current_bgm.mp3"))
+    if os.path.exists(ws.asset("video.mp4")):
+        props["videoSrc"] = ws.public_path(ws.asset("video.mp4"))
+    mix_path = premix_audio(ws, voice_path, duration)
+    if mix_path:
+        props["audioMixSrc"] = ws.public_path(mix_path)
+    props_path = ws.write_props(**props)
 
     # 4. Render
     print("\n--- 動画書き出し中... (しばらくお待ちください) ---")
@@ -190,8 +200,12 @@ def main():
     else:
         output_file = os.path.join(OUTPUT_DIR, "完成動画.mp4")
         
-    cmd = f"npx remotion render Prototype {output_file} --props='{{ \"mode\": \"vertical\" }}'"
-    run_command(cmd)
+    # Reuses the cached Remotion bundle; RENDER_SHARDS > 1 renders frame ranges in parallel
+    try:
+        render_shards.render_sharded("Prototype", output_file, props_path=props_path)
+    except (subprocess.CalledProcessError, RuntimeError) as e:
+        print(f"Error rendering: {e}")
+        sys.exit(1)
     
     print(f"\n=== 完成！保存先: {output_file} ===")
     subprocess.run(["open", OUTPUT_DIR]) # Open folder on Mac
@@ -0,0 +1,212 @@
+"""
+benchmarks/bench_e2e.py
+Offline end-to-end benchmark for generate_dragon_video.main.
+
+Starts benchmarks/fake_services.py in-process and runs the full manifest
+pipeline (scene queries, Pexels search, ranking, vision selection,
+downloads, transcode, body track, DALL-E, Replicate lip-sync) against it,
+with no network access. Transcription is skipped: the subtitle fixtures are
+copied into the run's workspace and reused.
+
+Each run happens in a child process inside a throwaway workspace directory
+(public/, src/, .cache/), so the repo's own manifest and caches are never
+touched. By default the first run starts cold and later runs reuse the
+same workspace, which measures the warm-cache path; --fresh gives every run
+a new workspace.
+
+Reported per run:
+  - total_s        : wall time of main() in the child
+  - tasks          : per-stage timings from the task graph report
+  - requests       : requests / injected failures per fake service
+  - manifest_ok    : whether a manifest was written
+
+Usage (from the repo root):
+    python benchmarks/bench_e2e.py
+    python benchmarks/bench_e2e.py --runs 3 --latency openai=1.0,pexels=0.2 --failure-rate 0.05
+    python benchmarks/bench_e2e.py --fresh --replicate-seconds 10 --output benchmarks/results/e2e.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+DEFAULT_RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+DEFAULT_SUBTITLES = os.path.join(REPO_ROOT, "src")
+
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+from fake_services import FakeServices  # noqa: E402
+import services  # noqa: E402
+
+SUBTITLE_FILES = ["title_subtitles.json", "title_subtitles.txt", "body_subtitles.json", "body_subtitles.txt"]
+
+
+# --- Child: one measured run ---
+
+def run_single(workspace, title_audio, body_audio):
+    os.chdir(workspace)
+    import generate_dragon_video
+
+    t0 = time.perf_counter()
+    manifest = generate_dragon_video.main(title_audio, body_audio, transcribe=False)
+    manifest_ok = manifest is not None
+    total_s = time.perf_counter() - t0
+
+    with open(".cache/task_timings.json", "r", encoding="utf-8") as f:
+        report = json.load(f)
+    return {"total_s": total_s, "manifest_ok": manifest_ok, "tasks": report["tasks"]}
+
+
+# --- Parent ---
+
+def prepare_workspace(workspace, subtitles_dir, title_audio, body_audio):
+    """public/assets + src/ with the subtitle fixtures and the two audio files."""
+    os.makedirs(os.path.join(workspace, "public", "assets"), exist_ok=True)
+    os.makedirs(os.path.join(workspace, "src"), exist_ok=True)
+    for name in SUBTITLE_FILES:
+        shutil.copyfile(os.path.join(subtitles_dir, name), os.path.join(workspace, "src", name))
+
+    audio_paths = []
+    for label, src in (("title", title_audio), ("body", body_audio)):
+        dest = os.path.join("public", "assets", f"{label}{os.path.splitext(src)[1] if src else '.mp3'}")
+        if src:
+            shutil.copyfile(src, os.path.join(workspace, dest))
+        else:
+            # Placeholder; durations fall back to the pipeline defaults
+            with open(os.path.join(workspace, dest), "wb") as f:
+                f.write(os.urandom(64 * 1024))
+        audio_paths.append(dest)
+    return audio_paths
+
+
+def measure(workspace, audio_paths, env):
+    cmd = [sys.executable, os.path.abspath(__file__), "--single",
+           "--workspace", workspace, "--title-audio", audio_paths[0], "--body-audio", audio_paths[1]]
+    proc = subprocess.run(cmd, capture_output=True, text=True, env=env)
+    result_line = next((l for l in proc.stdout.splitlines() if l.startswith("BENCH_RESULT=")), None)
+    if proc.returncode != 0 or not result_line:
+        lines = (proc.stderr or proc.stdout).strip().splitlines()
+        return {"error": lines[-1] if lines else "unknown error"}
+    return json.loads(result_line[len("BENCH_RESULT="):])
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                             text=True, cwd=REPO_ROOT)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def print_table(rows):
+    task_names = []
+    for r in rows:
+        for t in r.get("tasks", []):
+            if t["task"] not in task_names:
+                task_names.append(t["task"])
+
+    header = f"{'task':<18}" + "".join(f"{'run ' + str(r['run']):>10}" for r in rows)
+    print("\n" + header)
+    print("-" * len(header))
+    for name in task_names:
+        cells = []
+        for r in rows:
+            t = next((t for t in r.get("tasks", []) if t["task"] == name), None)
+            if not t or t["duration_s"] is None:
+                cells.append(f"{(t or {}).get('status', '-'):>10}")
+            else:
+                cells.append(f"{t['duration_s']:>10.2f}")
+        print(f"{name:<18}" + "".join(cells))
+    print(f"{'TOTAL':<18}" + "".join(
+        f"{r['total_s']:>10.2f}" if "total_s" in r else f"{'ERROR':>10}" for r in rows))
+    for r in rows:
+        if "error" in r:
+            print(f"  run {r['run']}: {r['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of the manifest pipeline")
+    parser.add_argument("--runs", type=int, default=2, help="Number of runs (first is cold)")
+    parser.add_argument("--fresh", action="store_true", help="New workspace (cold caches) for every run")
+    parser.add_argument("--subtitles", default=DEFAULT_SUBTITLES,
+                        help="Directory with title_/body_subtitles.json and .txt")
+    parser.add_argument("--title-audio", default=None, help="Title audio (default: placeholder file)")
+    parser.add_argument("--body-audio", default=None, help="Body audio (default: placeholder file)")
+    parser.add_argument("--latency", default="0", help="Fake service latency, e.g. 0.2 or openai=1.5,pexels=0.1")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--failure-rate", default="0", help="Fraction of requests failing with HTTP 500 (same format)")
+    parser.add_argument("--replicate-seconds", type=float, default=3.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Result JSON path (default: benchmarks/results/e2e-<timestamp>.json)")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--workspace", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        raw = run_single(args.workspace, args.title_audio, args.body_audio)
+        print("BENCH_RESULT=" + json.dumps(raw, ensure_ascii=False))
+        return
+
+    print("=== Offline E2E Benchmark ===")
+    rows = []
+    workspaces = []
+    with FakeServices(latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate,
+                      replicate_seconds=args.replicate_seconds, seed=args.seed) as fake:
+        python_path = os.pathsep.join(p for p in (REPO_ROOT, os.environ.get("PYTHONPATH")) if p)
+        env = {**os.environ, **services.local_env(fake.base_url), "PYTHONPATH": python_path}
+        print(f"  Fake services at {fake.base_url}")
+        try:
+            for run in range(1, args.runs + 1):
+                if args.fresh or not workspaces:
+                    workspaces.append(tempfile.mkdtemp(prefix="bench_e2e_"))
+                    audio_paths = prepare_workspace(workspaces[-1], args.subtitles,
+                                                    args.title_audio, args.body_audio)
+                print(f"  Run {run} ({'cold' if args.fresh or run == 1 else 'warm'})...")
+                fake.reset_stats()
+                row = {"run": run, "cold": args.fresh or run == 1, **measure(workspaces[-1], audio_paths, env)}
+                row["requests"] = fake.stats
+                rows.append(row)
+        finally:
+            for workspace in workspaces:
+                shutil.rmtree(workspace, ignore_errors=True)
+
+    print_table(rows)
+
+    report = {
+        "benchmark": "e2e",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "fakes": {
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "failure_rate": args.failure_rate,
+            "replicate_seconds": args.replicate_seconds,
+            "seed": args.seed,
+        },
+        "results": rows,
+    }
+    output = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"e2e-{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nSaved results to {output}")
+
+
+if __name__ == "__main__":
+    main()
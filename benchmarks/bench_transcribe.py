@@ -0,0 +1,296 @@
+"""
+benchmarks/bench_transcribe.py
+Speed / accuracy benchmark for transcribe.transcribe_audio.
+
+For every fixture clip x backend x thread count, a fresh child process loads
+the model, transcribes the clip (proofreading disabled) and reports:
+  - rtf                : processing time / audio duration (lower is faster)
+  - model_load_s       : model load time
+  - transcribe_s       : transcription + line mapping time
+  - peak_rss_mb        : peak resident memory of the child process
+  - cer                : character error rate vs. the reference text
+  - start_error_s / end_error_s : mean subtitle boundary error vs. reference subtitles
+
+Usage (from the repo root):
+    python benchmarks/bench_transcribe.py
+    python benchmarks/bench_transcribe.py --backends whisper,faster-whisper --threads 1,4
+    python benchmarks/bench_transcribe.py --output benchmarks/results/baseline.json
+
+Fixtures are listed in benchmarks/fixtures/clips.json:
+    [{"name": "short", "audio": "short.mp3",
+      "reference_text": "short.txt", "reference_subtitles": "short.json"}, ...]
+Paths are relative to the fixtures directory; references are optional.
+Layout of benchmarks/fixtures/:
+    clips.json     the fixture list (committed)
+    <name>.txt     reference text, one spoken line per line (committed)
+    <name>.mp3     clip audio           (generated)
+    <name>.json    reference subtitles  (generated; startFrame/endFrame at 30 fps)
+Generate the audio and reference subtitles from the texts once with
+    python benchmarks/make_fixtures.py
+Clips whose audio is missing are skipped.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+DEFAULT_FIXTURES = os.path.join(BENCH_DIR, "fixtures", "clips.json")
+DEFAULT_RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+FPS = 30
+
+
+# --- Metrics ---
+
+def clean_text(text):
+    """Drop whitespace and punctuation that the proofreader/BudouX may move around."""
+    return "".join(ch for ch in text if not ch.isspace() and ch not in "、。，．,.!?！？「」『』")
+
+
+def edit_distance(a, b):
+    """Levenshtein distance (two-row DP)."""
+    if len(a) < len(b):
+        a, b = b, a
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        curr = [i]
+        for j, cb in enumerate(b, 1):
+            curr.append(min(prev[j] + 1, curr[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = curr
+    return prev[-1]
+
+
+def character_error_rate(hypothesis, reference):
+    ref = clean_text(reference)
+    if not ref:
+        return None
+    return edit_distance(clean_text(hypothesis), ref) / len(ref)
+
+
+def _overlap(a, b):
+    return min(a["endFrame"], b["endFrame"]) - max(a["startFrame"], b["startFrame"])
+
+
+def subtitle_timing_error(hyp_subs, ref_subs):
+    """
+    Mean absolute start/end error in seconds, per reference line.
+
+    Reference lines are whole sentences while hypothesis lines are BudouX
+    lines of at most 14 characters, so lines are not compared one to
+    one: each hypothesis line is assigned to the reference line it overlaps
+    most, and a reference line is scored by the span of its lines (first
+    start, last end). A reference line with no overlapping hypothesis line is
+    scored against the hypothesis line with the nearest start.
+    """
+    if not hyp_subs or not ref_subs:
+        return None, None
+    spans = [None] * len(ref_subs)
+    for hyp in hyp_subs:
+        k = max(range(len(ref_subs)), key=lambda k: _overlap(hyp, ref_subs[k]))
+        if _overlap(hyp, ref_subs[k]) <= 0:
+            continue
+        if spans[k] is None:
+            spans[k] = (hyp["startFrame"], hyp["endFrame"])
+        else:
+            spans[k] = (min(spans[k][0], hyp["startFrame"]), max(spans[k][1], hyp["endFrame"]))
+
+    start_err = 0.0
+    end_err = 0.0
+    for ref, span in zip(ref_subs, spans):
+        if span is None:
+            hyp = min(hyp_subs, key=lambda h: abs(h["startFrame"] - ref["startFrame"]))
+            span = (hyp["startFrame"], hyp["endFrame"])
+        start_err += abs(span[0] - ref["startFrame"]) / FPS
+        end_err += abs(span[1] - ref["endFrame"]) / FPS
+    return start_err / len(ref_subs), end_err / len(ref_subs)
+
+
+def audio_duration(path):
+    sys.path.insert(0, REPO_ROOT)
+    import media_probe
+    return media_probe.probe(path)["duration"]
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    if sys.platform == "darwin":
+        return rss / (1024 * 1024)
+    return rss / 1024
+
+
+# --- Child: one measured run ---
+
+def run_single(clip, backend, threads):
+    sys.path.insert(0, REPO_ROOT)
+    import transcribe
+
+    t0 = time.perf_counter()
+    model = transcribe.load_model(backend, threads=threads)
+    load_s = time.perf_counter() - t0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out_json = os.path.join(tmp, "subtitles.json")
+        t1 = time.perf_counter()
+        subtitles = transcribe.transcribe_audio(clip["audio"], out_json, model=model, proofread=False)
+        transcribe_s = time.perf_counter() - t1
+
+    return {
+        "model_load_s": load_s,
+        "transcribe_s": transcribe_s,
+        "peak_rss_mb": peak_rss_mb(),
+        "text": "".join(s["text"] for s in subtitles),
+        "subtitles": subtitles,
+    }
+
+
+# --- Parent: fan out runs into child processes ---
+
+def load_fixtures(path):
+    with open(path, "r", encoding="utf-8") as f:
+        clips = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    resolved = []
+    for clip in clips:
+        clip = dict(clip)
+        for key in ("audio", "reference_text", "reference_subtitles"):
+            if clip.get(key):
+                clip[key] = os.path.join(base, clip[key])
+        if not os.path.exists(clip["audio"]):
+            print(f"  [Skip] {clip['name']}: {clip['audio']} not found")
+            continue
+        resolved.append(clip)
+    return resolved
+
+
+def measure(clip, backend, threads):
+    cmd = [sys.executable, os.path.abspath(__file__), "--single",
+           "--clip-json", json.dumps(clip), "--backends", backend, "--threads", str(threads)]
+    proc = subprocess.run(cmd, capture_output=True, text=True, cwd=REPO_ROOT)
+    result_line = next((l for l in proc.stdout.splitlines() if l.startswith("BENCH_RESULT=")), None)
+    if proc.returncode != 0 or not result_line:
+        lines = (proc.stderr or proc.stdout).strip().splitlines()
+        return {"error": lines[-1] if lines else "unknown error"}
+    return json.loads(result_line[len("BENCH_RESULT="):])
+
+
+def score(clip, raw, duration):
+    row = {
+        "clip": clip["name"],
+        "audio_s": duration,
+        "model_load_s": raw["model_load_s"],
+        "transcribe_s": raw["transcribe_s"],
+        "rtf": raw["transcribe_s"] / duration if duration else None,
+        "peak_rss_mb": raw["peak_rss_mb"],
+        "cer": None,
+        "start_error_s": None,
+        "end_error_s": None,
+    }
+    if clip.get("reference_text") and os.path.exists(clip["reference_text"]):
+        with open(clip["reference_text"], "r", encoding="utf-8") as f:
+            row["cer"] = character_error_rate(raw["text"], f.read())
+    if clip.get("reference_subtitles") and os.path.exists(clip["reference_subtitles"]):
+        with open(clip["reference_subtitles"], "r", encoding="utf-8") as f:
+            ref_subs = json.load(f)
+        row["start_error_s"], row["end_error_s"] = subtitle_timing_error(raw["subtitles"], ref_subs)
+    return row
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                             text=True, cwd=REPO_ROOT)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def fmt(value, spec):
+    return "-" if value is None else format(value, spec)
+
+
+def print_table(rows):
+    header = f"{'clip':<12}{'backend':<16}{'thr':>4}{'rtf':>8}{'load_s':>8}{'rss_mb':>9}{'cer':>7}{'start_e':>9}{'end_e':>8}"
+    print("\n" + header)
+    print("-" * len(header))
+    for r in rows:
+        if "error" in r:
+            print(f"{r['clip']:<12}{r['backend']:<16}{r['threads']:>4}  ERROR: {r['error']}")
+            continue
+        print(f"{r['clip']:<12}{r['backend']:<16}{r['threads']:>4}"
+              f"{fmt(r['rtf'], '.3f'):>8}{fmt(r['model_load_s'], '.2f'):>8}"
+              f"{fmt(r['peak_rss_mb'], '.0f'):>9}{fmt(r['cer'], '.3f'):>7}"
+              f"{fmt(r['start_error_s'], '.2f'):>9}{fmt(r['end_error_s'], '.2f'):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transcribe_audio across clips, backends and thread counts")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="clips.json fixture list")
+    parser.add_argument("--backends", default="whisper", help="Comma-separated: whisper,faster-whisper")
+    parser.add_argument("--threads", default="0", help="Comma-separated CPU thread counts (0 = library default)")
+    parser.add_argument("--output", default=None, help="Result JSON path (default: benchmarks/results/transcribe-<timestamp>.json)")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--clip-json", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        clip = json.loads(args.clip_json)
+        threads = int(args.threads) or None
+        raw = run_single(clip, args.backends, threads)
+        print("BENCH_RESULT=" + json.dumps(raw, ensure_ascii=False))
+        return
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    thread_counts = [int(t) for t in args.threads.split(",") if t.strip()]
+
+    print(f"=== Transcription Benchmark ({args.fixtures}) ===")
+    clips = load_fixtures(args.fixtures)
+    if not clips:
+        print("No fixture clips available.")
+        sys.exit(1)
+
+    rows = []
+    for clip in clips:
+        duration = audio_duration(clip["audio"])
+        for backend in backends:
+            for threads in thread_counts:
+                print(f"  {clip['name']} ({duration:.1f}s) / {backend} / threads={threads or 'default'}...")
+                raw = measure(clip, backend, threads)
+                if "error" in raw:
+                    row = {"clip": clip["name"], "error": raw["error"]}
+                else:
+                    row = score(clip, raw, duration)
+                row.update({"backend": backend, "threads": threads})
+                rows.append(row)
+
+    print_table(rows)
+
+    report = {
+        "benchmark": "transcribe",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": rows,
+    }
+    output = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"transcribe-{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nSaved results to {output}")
+
+
+if __name__ == "__main__":
+    main()
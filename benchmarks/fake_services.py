@@ -0,0 +1,374 @@
+"""
+benchmarks/fake_services.py
+Local stand-ins for OpenAI, Pexels and Replicate, so the pipeline can run
+end to end with no network access (see services.py for how clients are
+pointed at it).
+
+One threaded HTTP server answers:
+  POST /v1/chat/completions          context analysis, scene queries (single and
+                                     batched), vision selection (single and
+                                     batched), subtitle proofreading
+  POST /v1/images/generations        DALL-E: returns a URL to a generated PNG
+  GET  /videos/search                Pexels search: deterministic results per query
+  GET  /media/clip/<id>.mp4          stock clip download (Range supported)
+  GET  /media/thumb/<id>.png         thumbnail
+  GET  /media/dragon.png             generated image
+  POST /v1/files                     Replicate upload
+  POST /v1/predictions               Replicate prediction; succeeds after
+  GET  /v1/predictions/<id>          --replicate-seconds
+  POST /v1/predictions/<id>/cancel
+  GET  /_stats                       request counts per service
+
+Latency and failures are injected per service ("openai", "pexels",
+"replicate", "media"): every request sleeps for the configured latency
+(+ up to `jitter` seconds) and fails with HTTP 500 at the configured rate.
+
+If ffmpeg is installed, clips are real 1280x720@30 test videos so the
+transcode and body-track stages do real work; otherwise they are filler
+bytes of --clip-kb.
+
+Usage:
+    python benchmarks/fake_services.py --port 8765 --latency 0.2 --failure-rate pexels=0.1
+    # then, in another shell:
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 PEXELS_API_BASE=http://127.0.0.1:8765 \\
+    REPLICATE_API_BASE=http://127.0.0.1:8765 python generate_dragon_video.py ...
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import shutil
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SERVICES = ("openai", "pexels", "replicate", "media")
+
+# Pexels-style queries handed out for scene queries / keywords
+QUERY_VOCAB = [
+    "starry night sky", "ocean waves at sunset", "city lights at night", "forest path in fog",
+    "sunrise over mountains", "person walking alone", "clock ticking", "rain on window",
+    "candle flame in dark", "hands holding coffee", "clouds time lapse", "river flowing through rocks",
+    "autumn leaves falling", "busy street crossing", "quiet library", "desert dunes wind",
+]
+
+
+def png_bytes(width, height, rgb=(40, 90, 60)):
+    """Solid-colour PNG, built by hand so the fakes don't need Pillow."""
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    row = b"\x00" + bytes(rgb) * width
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(row * height))
+            + chunk(b"IEND", b""))
+
+
+def make_clip(path, seconds, clip_kb):
+    """Real test video if ffmpeg is available, filler bytes otherwise."""
+    if shutil.which("ffmpeg"):
+        subprocess.run([
+            "ffmpeg", "-nostdin", "-v", "error", "-y",
+            "-f", "lavfi", "-i", f"testsrc2=size=1280x720:rate=30:duration={seconds}",
+            "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", path,
+        ], check=True)
+    else:
+        with open(path, "wb") as f:
+            f.write(os.urandom(clip_kb * 1024))
+    return path
+
+
+def parse_per_service(value, default=0.0):
+    """'0.2' -> same for all services; 'openai=1.5,pexels=0.1' -> per service."""
+    result = {s: default for s in SERVICES}
+    if value in (None, ""):
+        return result
+    if isinstance(value, (int, float)):
+        return {s: float(value) for s in SERVICES}
+    if isinstance(value, dict):
+        result.update({k: float(v) for k, v in value.items()})
+        return result
+    for part in str(value).split(","):
+        if "=" in part:
+            name, num = part.split("=", 1)
+            if name.strip() not in SERVICES:
+                raise ValueError(f"Unknown service '{name}' (expected one of {', '.join(SERVICES)})")
+            result[name.strip()] = float(num)
+        else:
+            result = {s: float(part) for s in SERVICES}
+    return result
+
+
+def _stable_int(*parts):
+    return int(hashlib.sha256("\x1f".join(map(str, parts)).encode("utf-8")).hexdigest()[:12], 16)
+
+
+def _pick_queries(text, n=3):
+    start = _stable_int(text)
+    return [QUERY_VOCAB[(start + k * 5) % len(QUERY_VOCAB)] for k in range(n)]
+
+
+# --- Fake chat completions ---
+
+def _user_text(messages):
+    content = next((m["content"] for m in messages if m.get("role") == "user"), "")
+    if isinstance(content, list):
+        return "\n".join(part.get("text", "") for part in content if part.get("type") == "text")
+    return content
+
+
+def chat_answer(messages):
+    """JSON string the real model would return for the pipeline's prompts."""
+    system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+    user = _user_text(messages)
+
+    if "subtitle editor" in system:
+        lines = json.loads(user)
+        return {"corrections": [{"index": l["index"], "text": l["text"]}
+                                for l in lines if not l.get("context")]}
+    if "numbered scenes" in system:
+        scenes = json.loads(user)
+        return {"scenes": [{"index": s["index"], "queries": _pick_queries(s["text"])} for s in scenes]}
+    if "visual director" in system:
+        return {"queries": _pick_queries(user)}
+    if "several scenes" in system:
+        picks = {}
+        for scene, vid in re.findall(r"Scene (\d+) / ID: (\d+)", user):
+            picks.setdefault(int(scene), int(vid))
+        return {"selections": [{"scene": k, "selected_id": v} for k, v in picks.items()]}
+    if "selecting stock footage" in system:
+        ids = re.findall(r"ID: (\d+)", user)
+        return {"selected_id": int(ids[0]) if ids else None}
+    if "B-roll" in system:
+        return {"tone": "calm", "keywords": _pick_queries(user, 6)}
+    return {}
+
+
+class FakeServices:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, failure_rate=0.0,
+                 replicate_seconds=3.0, clip_seconds=12, clip_kb=512, seed=0):
+        self.latency = parse_per_service(latency)
+        self.failure_rate = parse_per_service(failure_rate)
+        self.jitter = jitter
+        self.replicate_seconds = replicate_seconds
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {}
+        self.predictions = {}   # id -> {"created": t, "status": ...}
+
+        self.media_dir = tempfile.mkdtemp(prefix="fake_services_")
+        self.clip_path = make_clip(os.path.join(self.media_dir, "clip.mp4"), clip_seconds, clip_kb)
+        self.clip_seconds = clip_seconds
+        self.dragon_png = png_bytes(256, 256, (120, 30, 30))
+        self.thumb_png = png_bytes(64, 36)
+
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.base_url = f"http://{host}:{self.server.server_address[1]}"
+        self._thread = None
+
+    # --- lifecycle ---
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.media_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {}
+
+    # --- injection ---
+
+    def _inject(self, service):
+        """Sleep for the service's latency; returns True if this request should fail."""
+        delay = self.latency[service]
+        with self._lock:
+            if self.jitter:
+                delay += self._rng.uniform(0, self.jitter)
+            fail = self._rng.random() < self.failure_rate[service]
+            entry = self.stats.setdefault(service, {"requests": 0, "failures": 0})
+            entry["requests"] += 1
+            entry["failures"] += int(fail)
+        if delay > 0:
+            time.sleep(delay)
+        return fail
+
+    # --- responses ---
+
+    def search_videos(self, query, per_page, min_duration):
+        videos = []
+        for n in range(per_page):
+            vid = _stable_int(query, n) % 9_000_000 + 1_000_000
+            slug = re.sub(r"[^a-z0-9]+", "-", query.lower()).strip("-")
+            clip_size = os.path.getsize(self.clip_path)
+            videos.append({
+                "id": vid,
+                "url": f"https://www.pexels.com/video/{slug}-{vid}/",
+                "image": f"{self.base_url}/media/thumb/{vid}.png",
+                "duration": max(min_duration, self.clip_seconds) + n,
+                "tags": query.split(),
+                "video_files": [
+                    {"id": vid * 10 + h, "quality": "hd", "file_type": "video/mp4",
+                     "width": h * 16 // 9, "height": h, "size": clip_size,
+                     "link": f"{self.base_url}/media/clip/{vid}.mp4?h={h}"}
+                    for h in (720, 1080)
+                ],
+            })
+        return {"page": 1, "per_page": per_page, "total_results": per_page, "videos": videos}
+
+    def prediction(self, pid):
+        p = self.predictions[pid]
+        if p["status"] == "processing" and time.time() - p["created"] >= self.replicate_seconds:
+            p["status"] = "succeeded"
+            p["output"] = f"{self.base_url}/media/clip/lipsync.mp4"
+        return {"id": pid, "status": p["status"], "output": p.get("output"), "error": None}
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body=b"", content_type="application/json", headers=None):
+                if isinstance(body, (dict, list)):
+                    body = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def _body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return self.rfile.read(length) if length else b""
+
+            def _service(self, path):
+                if path.startswith("/videos/"):
+                    return "pexels"
+                if path.startswith("/media/"):
+                    return "media"
+                if path.startswith(("/v1/files", "/v1/predictions")):
+                    return "replicate"
+                return "openai"
+
+            def _handle(self):
+                url = urlparse(self.path)
+                path = url.path
+                body = self._body() if self.command == "POST" else b""
+                if path == "/_stats":
+                    return self._send(200, fake.stats)
+                if fake._inject(self._service(path)):
+                    return self._send(500, {"error": {"message": "injected failure"}})
+
+                if path == "/v1/chat/completions":
+                    req = json.loads(body)
+                    answer = json.dumps(chat_answer(req.get("messages", [])), ensure_ascii=False)
+                    return self._send(200, {
+                        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "object": "chat.completion",
+                        "created": int(time.time()), "model": req.get("model", "gpt-4o"),
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": answer}}],
+                        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                    })
+                if path == "/v1/images/generations":
+                    return self._send(200, {"created": int(time.time()),
+                                            "data": [{"url": f"{fake.base_url}/media/dragon.png"}]})
+                if path == "/videos/search":
+                    q = parse_qs(url.query)
+                    data = fake.search_videos(q.get("query", [""])[0],
+                                              int(q.get("per_page", ["5"])[0]),
+                                              int(q.get("min_duration", ["0"])[0]))
+                    return self._send(200, data, headers={
+                        "X-Ratelimit-Limit": "20000", "X-Ratelimit-Remaining": "19999",
+                        "X-Ratelimit-Reset": str(int(time.time()) + 3600)})
+                if path == "/v1/files" and self.command == "POST":
+                    return self._send(201, {"id": uuid.uuid4().hex, "size": len(body),
+                                            "urls": {"get": f"{fake.base_url}/media/upload/{uuid.uuid4().hex}"}})
+                if path == "/v1/predictions" and self.command == "POST":
+                    pid = uuid.uuid4().hex[:16]
+                    with fake._lock:
+                        fake.predictions[pid] = {"created": time.time(), "status": "processing"}
+                    return self._send(201, fake.prediction(pid))
+                m = re.fullmatch(r"/v1/predictions/(\w+)(/cancel)?", path)
+                if m and m.group(1) in fake.predictions:
+                    if m.group(2):
+                        fake.predictions[m.group(1)]["status"] = "canceled"
+                    return self._send(200, fake.prediction(m.group(1)))
+                if path == "/media/dragon.png":
+                    return self._send(200, fake.dragon_png, "image/png")
+                if path.startswith("/media/thumb/"):
+                    return self._send(200, fake.thumb_png, "image/png")
+                if path.startswith("/media/clip/"):
+                    return self._send_clip()
+                return self._send(404, {"error": {"message": f"no fake for {self.command} {path}"}})
+
+            def _send_clip(self):
+                with open(fake.clip_path, "rb") as f:
+                    data = f.read()
+                m = re.fullmatch(r"bytes=(\d+)-", self.headers.get("Range", ""))
+                if m and int(m.group(1)) < len(data):
+                    start = int(m.group(1))
+                    return self._send(206, data[start:], "video/mp4", headers={
+                        "Content-Range": f"bytes {start}-{len(data) - 1}/{len(data)}"})
+                return self._send(200, data, "video/mp4")
+
+            do_GET = do_POST = do_HEAD = _handle
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake OpenAI/Pexels/Replicate server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="0", help="seconds per request, e.g. 0.2 or openai=1.5,pexels=0.1")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, up to this many seconds")
+    parser.add_argument("--failure-rate", default="0", help="fraction of requests answered with HTTP 500 (same format)")
+    parser.add_argument("--replicate-seconds", type=float, default=3.0, help="time until a prediction succeeds")
+    parser.add_argument("--clip-seconds", type=int, default=12)
+    parser.add_argument("--clip-kb", type=int, default=512, help="size of filler clips when ffmpeg is missing")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    fake = FakeServices(args.host, args.port, latency=args.latency, jitter=args.jitter,
+                        failure_rate=args.failure_rate, replicate_seconds=args.replicate_seconds,
+                        clip_seconds=args.clip_seconds, clip_kb=args.clip_kb, seed=args.seed)
+    print(f"Fake services listening on {fake.base_url}")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
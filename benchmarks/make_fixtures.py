@@ -0,0 +1,152 @@
+"""
+benchmarks/make_fixtures.py
+Synthesizes the audio and reference subtitles for bench_transcribe.py.
+
+Only the reference texts are committed (benchmarks/fixtures/<name>.txt, one
+spoken line per line). For every clip in clips.json this script speaks each
+line with a TTS engine, trims the silence around it, and joins the lines with
+GAP_SEC of silence in between. Because the position of every line in the
+result is known exactly, the reference subtitles come for free:
+    benchmarks/fixtures/<name>.mp3   the clip
+    benchmarks/fixtures/<name>.json  [{"startFrame", "endFrame", "text"}, ...] at 30 fps
+
+Engines (--engine, default: the first one available):
+    say      macOS `say -v Kyoko`
+    espeak   `espeak-ng -v ja`
+    openai   OpenAI TTS (tts-1), needs OPENAI_API_KEY
+
+Requires ffmpeg. Existing clips are kept unless --force is given.
+
+Usage (from the repo root):
+    python benchmarks/make_fixtures.py
+    python benchmarks/make_fixtures.py --engine openai --force
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import wave
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+DEFAULT_FIXTURES = os.path.join(BENCH_DIR, "fixtures", "clips.json")
+FPS = 30
+SAMPLE_RATE = 16000
+LEAD_SEC = 0.5   # silence before the first line
+GAP_SEC = 0.6    # silence between lines
+OPENAI_TTS_MODEL = "tts-1"
+OPENAI_TTS_VOICE = "alloy"
+
+# Strip silence from both ends of a synthesized line
+TRIM_FILTER = ("silenceremove=start_periods=1:start_threshold=-50dB,areverse,"
+               "silenceremove=start_periods=1:start_threshold=-50dB,areverse")
+
+
+def available_engines():
+    engines = []
+    if shutil.which("say"):
+        engines.append("say")
+    if shutil.which("espeak-ng"):
+        engines.append("espeak")
+    if os.getenv("OPENAI_API_KEY"):
+        engines.append("openai")
+    return engines
+
+
+def synthesize(engine, text, out_path):
+    """Speak `text` into out_path (any format ffmpeg reads)."""
+    if engine == "say":
+        subprocess.run(["say", "-v", "Kyoko", "-o", out_path, text], check=True)
+    elif engine == "espeak":
+        subprocess.run(["espeak-ng", "-v", "ja", "-w", out_path, text], check=True)
+    elif engine == "openai":
+        sys.path.insert(0, REPO_ROOT)
+        import services
+        client = services.openai_client(os.getenv("OPENAI_API_KEY"))
+        response = client.audio.speech.create(model=OPENAI_TTS_MODEL, voice=OPENAI_TTS_VOICE,
+                                              input=text, response_format="wav")
+        with open(out_path, "wb") as f:
+            f.write(response.content)
+    else:
+        raise ValueError(f"Unknown engine: {engine}")
+
+
+def to_pcm(src_path, dest_path):
+    """16 kHz mono s16 WAV with the surrounding silence trimmed. Returns the raw frames."""
+    subprocess.run(["ffmpeg", "-nostdin", "-v", "error", "-y", "-i", src_path,
+                    "-af", TRIM_FILTER, "-ac", "1", "-ar", str(SAMPLE_RATE), "-c:a", "pcm_s16le",
+                    dest_path], check=True)
+    with wave.open(dest_path, "rb") as w:
+        return w.readframes(w.getnframes())
+
+
+def silence(seconds):
+    return b"\x00\x00" * int(seconds * SAMPLE_RATE)
+
+
+def build_clip(engine, lines, audio_path, subtitles_path):
+    pcm = bytearray(silence(LEAD_SEC))
+    subtitles = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for k, text in enumerate(lines):
+            raw_path = os.path.join(tmp, f"line_{k}.{'aiff' if engine == 'say' else 'wav'}")
+            synthesize(engine, text, raw_path)
+            frames = to_pcm(raw_path, os.path.join(tmp, f"line_{k}.pcm.wav"))
+            start = len(pcm) / 2 / SAMPLE_RATE
+            pcm += frames
+            end = len(pcm) / 2 / SAMPLE_RATE
+            subtitles.append({"startFrame": round(start * FPS), "endFrame": round(end * FPS), "text": text})
+            pcm += silence(GAP_SEC)
+
+        wav_path = os.path.join(tmp, "clip.wav")
+        with wave.open(wav_path, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(SAMPLE_RATE)
+            w.writeframes(bytes(pcm))
+        subprocess.run(["ffmpeg", "-nostdin", "-v", "error", "-y", "-i", wav_path,
+                        "-c:a", "libmp3lame", "-q:a", "4", audio_path], check=True)
+
+    with open(subtitles_path, "w", encoding="utf-8") as f:
+        json.dump(subtitles, f, ensure_ascii=False, indent=2)
+    return len(pcm) / 2 / SAMPLE_RATE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthesize the transcription benchmark fixtures")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="clips.json fixture list")
+    parser.add_argument("--engine", choices=["say", "espeak", "openai"], default=None)
+    parser.add_argument("--force", action="store_true", help="Regenerate clips that already exist")
+    args = parser.parse_args()
+
+    if not shutil.which("ffmpeg"):
+        print("ffmpeg is required.")
+        sys.exit(1)
+    engine = args.engine or next(iter(available_engines()), None)
+    if engine is None:
+        print("No TTS engine found (install espeak-ng, use macOS `say`, or set OPENAI_API_KEY).")
+        sys.exit(1)
+
+    with open(args.fixtures, "r", encoding="utf-8") as f:
+        clips = json.load(f)
+    base = os.path.dirname(os.path.abspath(args.fixtures))
+
+    print(f"=== Synthesizing fixtures with {engine} ===")
+    for clip in clips:
+        audio_path = os.path.join(base, clip["audio"])
+        subtitles_path = os.path.join(base, clip["reference_subtitles"])
+        if os.path.exists(audio_path) and os.path.exists(subtitles_path) and not args.force:
+            print(f"  [Keep] {clip['name']}")
+            continue
+        with open(os.path.join(base, clip["reference_text"]), "r", encoding="utf-8") as f:
+            lines = [line.strip() for line in f if line.strip()]
+        duration = build_clip(engine, lines, audio_path, subtitles_path)
+        print(f"  {clip['name']}: {len(lines)} lines, {duration:.1f}s -> {audio_path}")
+
+
+if __name__ == "__main__":
+    main()
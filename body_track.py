@@ -0,0 +1,123 @@
+"""
+Pre-composited body track.
+
+Builds the whole body timeline into one continuous 1920x1080@30 video with
+ffmpeg, reproducing what TimelineVideoSequence/FadingVideo do at render time:
+each scene starts at its startFrame, runs durationInFrames + 15 frames, fades
+in over 15 frames on top of the previous scene (except the first), plays at
+the same playback rate (0.8x, or stretched down to 0.5x to fit) and loops
+every floor(source_duration * fps) frames when still too short.
+The composition then decodes one stream instead of N clips.
+"""
+import math
+import os
+import shutil
+import subprocess
+
+FPS = 30
+FADE_FRAMES = 15
+WIDTH = 1920
+HEIGHT = 1080
+GOP_FRAMES = 15
+
+
+def ffmpeg_available():
+    return shutil.which("ffmpeg") is not None
+
+
+def playback_rate(source_frames, extended_frames):
+    """Same rule as TimelineVideoSequence in DragonStockComposition.tsx."""
+    rate = 0.8
+    if source_frames / rate < extended_frames:
+        max_stretch = source_frames / extended_frames
+        if max_stretch >= 0.5:
+            rate = max_stretch
+    return rate
+
+
+def loop_count(scene):
+    """How many times the scene's Loop restarts within its extended duration."""
+    extended = scene["durationInFrames"] + FADE_FRAMES
+    source_frames = max(1, math.floor((scene.get("source_duration") or 10) * FPS))
+    return max(1, math.ceil(extended / source_frames))
+
+
+def build_filtergraph(timeline, total_frames):
+    """
+    Inputs are laid out scene by scene, each scene's clip repeated
+    loop_count(scene) times; loops are concatenated from separate inputs
+    rather than buffered in memory.
+    """
+    total_sec = total_frames / FPS
+    parts = [f"color=c=black:s={WIDTH}x{HEIGHT}:r={FPS}:d={total_sec:.3f},format=yuv420p[base]"]
+    last = "base"
+    input_idx = 0
+    for k, scene in enumerate(timeline):
+        extended = scene["durationInFrames"] + FADE_FRAMES
+        source_frames = max(1, math.floor((scene.get("source_duration") or 10) * FPS))
+        rate = playback_rate(source_frames, extended)
+        # One Loop iteration = source_frames composition frames = source_frames * rate / fps seconds of source
+        loop_source_sec = source_frames * rate / FPS
+        start_sec = scene["startFrame"] / FPS
+
+        loops = loop_count(scene)
+        labels = []
+        for n in range(loops):
+            parts.append(
+                f"[{input_idx}:v]trim=duration={loop_source_sec:.4f},setpts=(PTS-STARTPTS)/{rate:.6f},"
+                f"fps={FPS},scale={WIDTH}:{HEIGHT}:force_original_aspect_ratio=increase,"
+                f"crop={WIDTH}:{HEIGHT},setsar=1,trim=end_frame={source_frames}[s{k}_{n}]"
+            )
+            labels.append(f"[s{k}_{n}]")
+            input_idx += 1
+
+        chain = "".join(labels)
+        chain += f"concat=n={loops}:v=1:a=0," if loops > 1 else "null,"
+        chain += f"trim=end_frame={extended},format=yuva420p"
+        if k > 0:
+            chain += f",fade=t=in:st=0:d={FADE_FRAMES / FPS:.4f}:alpha=1"
+        chain += f",setpts=PTS-STARTPTS+{start_sec:.4f}/TB[v{k}]"
+        parts.append(chain)
+        parts.append(f"[{last}][v{k}]overlay=eof_action=pass:format=auto[o{k}]")
+        last = f"o{k}"
+    return ";".join(parts), last
+
+
+def build_body_track(timeline, body_duration_frames, out_path):
+    """
+    Render `timeline` (manifest body.timeline, paths relative to public/) into
+    out_path. Returns out_path. Raises subprocess.CalledProcessError on failure.
+    """
+    if not timeline:
+        raise ValueError("Empty timeline")
+    total_frames = max([body_duration_frames] +
+                       [s["startFrame"] + s["durationInFrames"] + FADE_FRAMES for s in timeline])
+
+    inputs = []
+    for scene in timeline:
+        src = os.path.join("public", scene["video_src"].lstrip("/"))
+        inputs += ["-i", src] * loop_count(scene)
+
+    filtergraph, last = build_filtergraph(timeline, total_frames)
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    tmp_path = out_path + ".tmp.mp4"
+    cmd = [
+        "ffmpeg", "-nostdin", "-v", "error", "-y",
+        *inputs,
+        "-filter_complex", filtergraph,
+        "-map", f"[{last}]",
+        "-frames:v", str(total_frames),
+        "-an",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "20",
+        "-g", str(GOP_FRAMES), "-keyint_min", str(GOP_FRAMES), "-sc_threshold", "0", "-bf", "0",
+        "-pix_fmt", "yuv420p", "-movflags", "+faststart",
+        tmp_path,
+    ]
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+    except subprocess.CalledProcessError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, out_path)
+    return out_path
@@ -0,0 +1,148 @@
+"""
+Shared download layer.
+
+All asset downloads go through one pooled `requests.Session` and are streamed
+to `<dest>.part` in chunks, so memory stays flat regardless of file size.
+Interrupted downloads resume with a Range request, the result is checked
+against the expected size / SHA-256 when known, and the file is moved into
+place with an atomic rename (readers never see a half-written file).
+The .part is held under an inter-process lock for the whole download, so two
+jobs fetching the same URL never append into the same file; the one that
+waited reuses the finished file.
+"""
+import hashlib
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import file_lock
+
+CHUNK_SIZE = 1024 * 1024  # 1 MiB
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+DOWNLOAD_ATTEMPTS = 3
+TIMEOUT = (10, 60)  # (connect, read) seconds
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class DownloadError(Exception):
+    pass
+
+
+def get_session():
+    """Process-wide pooled session (keep-alive, retries on transient errors)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(total=3, backoff_factor=0.5,
+                          status_forcelist=(429, 500, 502, 503, 504),
+                          allowed_methods=frozenset(["GET", "HEAD"]))
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def _sha256_of(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _total_size(response, offset):
+    """Full file size from Content-Range (206) or Content-Length (200), if the server sent it."""
+    content_range = response.headers.get("Content-Range")
+    if content_range and "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        if total.isdigit():
+            return int(total)
+    length = response.headers.get("Content-Length")
+    if length and length.isdigit():
+        return int(length) + offset
+    return None
+
+
+def _remote_size(session, url, headers=None):
+    """Content-Length from a HEAD request, or None if the server does not say."""
+    try:
+        res = session.head(url, headers=headers, allow_redirects=True, timeout=TIMEOUT)
+    except requests.RequestException:
+        return None
+    length = res.headers.get("Content-Length")
+    if res.status_code == 200 and length and length.isdigit():
+        return int(length)
+    return None
+
+
+def download_file(url, dest_path, expected_size=None, sha256=None, headers=None):
+    """
+    Stream `url` to `dest_path`. Returns dest_path.
+    Raises DownloadError if the download cannot be completed or verified.
+    """
+    os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+    part_path = dest_path + ".part"
+    with file_lock.locked(part_path) as waited:
+        if waited and os.path.exists(dest_path):
+            return dest_path  # Another job downloaded it while we waited
+        return _download_locked(url, dest_path, part_path, expected_size, sha256, headers)
+
+
+def _download_locked(url, dest_path, part_path, expected_size, sha256, headers):
+    session = get_session()
+    last_error = None
+
+    for attempt in range(1, DOWNLOAD_ATTEMPTS + 1):
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        request_headers = dict(headers or {})
+        if offset:
+            request_headers["Range"] = f"bytes={offset}-"
+
+        try:
+            with session.get(url, headers=request_headers, stream=True, timeout=TIMEOUT) as res:
+                if res.status_code == 416:
+                    # Range not satisfiable: the .part is complete only if it matches the real size
+                    total = expected_size or _remote_size(session, url, headers)
+                    if total is None or offset != total:
+                        os.remove(part_path)
+                        last_error = DownloadError(f"Stale partial download ({offset} bytes) for {url}")
+                        print(f"  {last_error} ({attempt}/{DOWNLOAD_ATTEMPTS}), restarting...")
+                        continue
+                elif res.status_code in (200, 206):
+                    if res.status_code == 200:
+                        offset = 0  # Server ignored Range; start over
+                    total = _total_size(res, offset) or expected_size
+                    with open(part_path, "ab" if offset else "wb") as f:
+                        for chunk in res.iter_content(chunk_size=CHUNK_SIZE):
+                            if chunk:
+                                f.write(chunk)
+                else:
+                    raise DownloadError(f"HTTP {res.status_code} for {url}")
+        except (requests.RequestException, OSError) as e:
+            last_error = e
+            print(f"  Download interrupted ({attempt}/{DOWNLOAD_ATTEMPTS}): {e}")
+            continue
+
+        size = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if total is not None and size < total:
+            last_error = DownloadError(f"Incomplete download: {size}/{total} bytes")
+            print(f"  {last_error} ({attempt}/{DOWNLOAD_ATTEMPTS}), resuming...")
+            continue
+        if (total is not None and size != total) or (expected_size and size != expected_size):
+            os.remove(part_path)
+            raise DownloadError(f"Size mismatch for {url}: got {size}, expected {expected_size or total}")
+        if sha256 and _sha256_of(part_path) != sha256:
+            os.remove(part_path)
+            raise DownloadError(f"Checksum mismatch for {url}")
+
+        os.replace(part_path, dest_path)
+        return dest_path
+
+    raise DownloadError(f"Failed to download {url}: {last_error}")
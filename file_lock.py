@@ -0,0 +1,74 @@
+"""
+Cross-process locking and atomic writes for files shared by concurrent jobs.
+
+Several productions can run at once (see workspace.py), and they share the
+stock catalog, the vision/proofread/probe caches and the download targets.
+Thread locks only protect one process, so:
+- locked(path) holds an exclusive flock on a lock file in LOCK_DIR that
+  stands for `path`, for read-merge-write sequences across processes;
+- write_json() writes through a tmp file unique to the process and call, so
+  two writers never share (or move away) each other's tmp file.
+"""
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import uuid
+
+LOCK_DIR = ".cache/locks"
+
+
+def lock_path(path):
+    """Lock file for `path` (kept out of public/ so it is never served or bundled)."""
+    digest = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(LOCK_DIR, f"{os.path.basename(path)}.{digest}.lock")
+
+
+@contextlib.contextmanager
+def locked(path):
+    """
+    Exclusive inter-process lock for `path` for the duration of the block.
+    Yields True if another process held it and the lock had to be waited for.
+    """
+    os.makedirs(LOCK_DIR, exist_ok=True)
+    with open(lock_path(path), "a") as f:
+        waited = False
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            waited = True
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield waited
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def unique_tmp_path(path):
+    return f"{path}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+
+
+def read_json(path, default=None):
+    """Contents of a JSON file, or `default` if it is missing or unreadable."""
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"  Could not read {path}: {e}")
+    return default
+
+
+def write_json(path, data, **dump_kwargs):
+    """Atomically replace `path` with `data` as JSON."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = unique_tmp_path(path)
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, **dump_kwargs)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
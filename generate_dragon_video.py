@@ -1,10 +1,29 @@
 import os
 import json
-import requests
+import math
 import sys
 from dotenv import load_dotenv
-from openai import OpenAI
 import time
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import shutil
+import subprocess
+import file_lock
+from downloads import download_file, DownloadError
+import pexels
+from stock_library import StockLibrary, clip_filename
+from vision_selection import decision_cache, thumbnail_image_part
+import ranker
+import transcode
+import body_track
+import audio_mix
+from replicate_client import ReplicateClient, ReplicateError, SADTALKER_VERSION, SADTALKER_PARAMS
+import asset_cache
+import media_probe
+import stock_cache
+from task_graph import TaskGraph
+from workspace import Workspace
+import services
 
 # Load environment variables
 load_dotenv()
@@ -13,11 +32,60 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 PEXELS_API_KEY = os.getenv("PEXELS_API_KEY")
 REPLICATE_API_KEY = os.getenv("REPLICATE_API_KEY")
 
+# Concurrency limits for the per-scene pipeline
+QUERY_WORKERS = int(os.getenv("QUERY_WORKERS", "4"))
+SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", "4"))
+SELECT_WORKERS = int(os.getenv("SELECT_WORKERS", "4"))
+DOWNLOAD_WORKERS = int(os.getenv("DOWNLOAD_WORKERS", "3"))
+
+# Pre-transcode clips to seek-friendly 1920x1080@30 intermediates before render
+PRETRANSCODE = os.getenv("PRETRANSCODE", "1") != "0"
+TRANSCODE_WORKERS = int(os.getenv("TRANSCODE_WORKERS", "2"))
+
+# Concurrent branches of main()'s task graph
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "4"))
+
+# Give up on (and cancel) the lip-sync prediction after this many seconds
+LIPSYNC_TIMEOUT = int(os.getenv("LIPSYNC_TIMEOUT", "900"))
+
+# Render the body timeline into one video with ffmpeg before Remotion
+PRECOMPOSE_BODY = os.getenv("PRECOMPOSE_BODY", "1") != "0"
+
+# Mix intro/body voice (+ optional BGM, ducked) into one normalized track before render
+PREMIX_AUDIO = os.getenv("PREMIX_AUDIO", "1") != "0"
+BGM_PATH = os.getenv("BGM_PATH")
+
+# Scenes per batched vision-selection request (1 = one request per scene)
+VISION_BATCH_SIZE = max(1, int(os.getenv("VISION_BATCH_SIZE", "4")))
+
+# Pin file for this run's clips (see stock_cache.py)
+PIN_JOB_ID = f"dragon_{os.getpid()}"
+
+# Scene segmentation: "duration" (DP over subtitle boundaries) or "sentence" (split on every "。")
+SCENE_SEGMENTATION = os.getenv("SCENE_SEGMENTATION", "duration")
+SCENE_MIN_SEC = float(os.getenv("SCENE_MIN_SEC", "4"))
+SCENE_TARGET_SEC = float(os.getenv("SCENE_TARGET_SEC", "7"))
+SCENE_MAX_SEC = float(os.getenv("SCENE_MAX_SEC", "12"))
+SCENE_COST = 0.5             # per-scene cost: favours fewer, fuller scenes
+NON_SENTENCE_PENALTY = 1.0   # cost of cutting mid-sentence
+
+# Ask for all scenes' visual queries in one request (0 = one request per scene)
+BATCH_SCENE_QUERIES = os.getenv("BATCH_SCENE_QUERIES", "1") != "0"
+
 if not OPENAI_API_KEY:
     print("Notice: OPENAI_API_KEY not found. Using local transcription and default keywords.")
     client = None
 else:
-    client = OpenAI(api_key=OPENAI_API_KEY)
+    client = services.openai_client(OPENAI_API_KEY)
+
+def dragon_image_params(tone):
+    """Everything that determines the generated image (also its cache key)."""
+    return {
+        "model": "dall-e-3",
+        "prompt": f"A high quality, cinematic portrait of a wise and powerful dragon, speaking directly to the camera. The dragon has a {tone} expression. Detailed scales, dramatic lighting, 8k resolution, photorealistic.",
+        "size": "1024x1024",
+        "quality": "standard",
+    }
 
 def generate_dragon_image(tone):
     # Check for custom image first
@@ -32,13 +100,7 @@ def generate_dragon_image(tone):
         return None
 
     try:
-        response = client.images.generate(
-            model="dall-e-3",
-            prompt=f"A high quality, cinematic portrait of a wise and powerful dragon, speaking directly to the camera. The dragon has a {tone} expression. Detailed scales, dramatic lighting, 8k resolution, photorealistic.",
-            size="1024x1024",
-            quality="standard",
-            n=1,
-        )
+        response = client.images.generate(**dragon_image_params(tone), n=1)
         image_url = response.data[0].url
         return image_url
     except Exception as e:
@@ -76,20 +138,18 @@ def analyze_audio_context(transcription_text):
 
 def search_pexels_videos(keywords, min_duration=5):
     print(f"Searching Pexels videos for keywords: {keywords}")
-    headers = {"Authorization": PEXELS_API_KEY}
     videos = []
+    library = StockLibrary()
     
     # Ensure download directory exists
-    stock_dir = "public/assets/stock"
+    stock_dir = library.stock_dir
     os.makedirs(stock_dir, exist_ok=True)
     
     for keyword in keywords:
         if len(videos) >= 5: break # Limit to 5 videos for now to save time/space
-        url = f"https://api.pexels.com/videos/search?query={keyword}&per_page=3&orientation=landscape"
         try:
-            res = requests.get(url, headers=headers)
-            if res.status_code == 200:
-                data = res.json()
+            data = pexels.search_videos(keyword, per_page=3, orientation="landscape")
+            if data:
                 for v in data.get("videos", []):
                     # Filter for decent quality and duration
                     video_files = v.get("video_files", [])
@@ -100,16 +160,17 @@ def search_pexels_videos(keywords, min_duration=5):
                     
                     if target_file and v["duration"] >= min_duration:
                         # Download the video
-                        video_filename = f"pexels_{v['id']}.mp4"
+                        video_filename = clip_filename(v['id'])
                         local_path = os.path.join(stock_dir, video_filename)
                         
                         if not os.path.exists(local_path):
                             print(f"Downloading video {v['id']}...")
-                            download_res = requests.get(target_file["link"])
-                            with open(local_path, "wb") as f:
-                                f.write(download_res.content)
+                            download_file(target_file["link"], local_path, expected_size=target_file.get("size"))
                         else:
                             print(f"Video {v['id']} already exists.")
+                        library.add_clip(v["id"], v["duration"],
+                                         width=target_file.get("width"), height=target_file.get("height"),
+                                         query=keyword, thumbnail=v.get("image"))
                             
                         # Add to list with local path for Remotion (relative to public)
                         videos.append({
@@ -121,6 +182,7 @@ def search_pexels_videos(keywords, min_duration=5):
                         break # One video per keyword to match variety
         except Exception as e:
             print(f"Error searching/downloading Pexels for {keyword}: {e}")
+    library.save()
             
     # Deduplicate by ID
     seen = set()
@@ -132,224 +194,443 @@ def search_pexels_videos(keywords, min_duration=5):
             
     return unique_videos
 
-def main(title_audio_path, body_audio_path):
-    # 1. Transcribe Title Audio (for Dragon Context/LipSync duration)
-    title_txt_file = "src/title_subtitles.txt"
-    title_json_subtitles = "src/title_subtitles.json"
-    print(f"Running transcription on Title: {title_audio_path}...")
-    os.system(f"venv/bin/python transcribe.py \"{title_audio_path}\" \"{title_json_subtitles}\"")
-    
-    
-    # 2. Transcribe Body Audio (for Keywords/Stock Videos)
-    body_txt_file = "src/body_subtitles.txt"
-    body_json_subtitles = "src/body_subtitles.json"
-    print(f"Running transcription on Body: {body_audio_path}...")
-    os.system(f"venv/bin/python transcribe.py \"{body_audio_path}\" \"{body_json_subtitles}\"")
-    
-    # Calculate durations EARLY
-    from mutagen.mp3 import MP3
+def run_transcription(audio_path, json_path):
+    """Run transcribe.py in the project venv; returns json_path or raises if it produced nothing."""
+    python_executable = "venv/bin/python" if os.path.exists("venv/bin/python") else sys.executable
+    txt_path = json_path.replace(".json", ".txt")
+    subprocess.run([python_executable, "transcribe.py", audio_path, json_path])
+    if not os.path.exists(txt_path):
+        raise RuntimeError(f"Transcription failed for {audio_path}")
+    return json_path
+
+def cache_asset(key, ext, path):
+    """Store a generated asset in the asset cache; a failed cache write must not fail the task."""
     try:
-        title_audio_duration = MP3(title_audio_path).info.length
-        body_audio_duration = MP3(body_audio_path).info.length
+        asset_cache.store(key, ext, path)
     except Exception as e:
-        print(f"Error reading audio duration: {e}. Defaulting to 10s and 30s.")
-        title_audio_duration = 10.0
-        body_audio_duration = 30.0
+        print(f"  Could not cache {path}: {e}")
 
-    
-    if not os.path.exists(body_txt_file):
-        print("Body transcription failed.")
-        return
-
-    # 3. Analyze Body Subtitles for Scenes
-    print("Reading subtitles for scene analysis...")
-    with open(body_json_subtitles, 'r') as f:
-        subtitles = json.load(f)
-    
-    # Read title text if available
-    title_text = ""
-    if os.path.exists(title_txt_file):
-        with open(title_txt_file, "r") as f:
-            title_text = f.read()
-
-    # 3b. Group subtitles into scenes (~5-8 seconds or logical chunks)
-    scenes = group_subtitles_into_scenes(subtitles, title_text)
-    
-    # 4. Generate/Prepare Dragon Image (Title Context)
+def prepare_dragon_image(ws):
     # Use the first scene's tone or overall tone
-    image_url = generate_dragon_image("neutral") 
-    local_image_path = "public/assets/dragon_base.png"
+    tone = "neutral"
+    local_image_path = ws.asset("dragon_base.png")
+
+    # Same prompt/model/params as a previous run -> reuse that image
+    image_key = asset_cache.cache_key("dragon_image", **dragon_image_params(tone))
+    if not os.path.exists("public/assets/custom_dragon.png") and \
+            asset_cache.fetch(image_key, ".png", local_image_path):
+        print(f"Using cached dragon image ({image_key})")
+        return local_image_path
+
+    image_url = generate_dragon_image(tone) 
     
     if image_url == "CUSTOM":
-        import shutil
         shutil.copy("public/assets/custom_dragon.png", local_image_path)
         print(f"Used custom image: {local_image_path}")
     elif image_url:
-        img_data = requests.get(image_url).content
-        with open(local_image_path, "wb") as f:
-            f.write(img_data)
-        print(f"Saved Dragon Image to {local_image_path}")
-    
-    # 5. Generate Lip Sync Video (AI - Replicate)
-    lipsync_video_path = "public/assets/dragon_lipsync.mp4"
+        try:
+            download_file(image_url, local_image_path)
+            print(f"Saved Dragon Image to {local_image_path}")
+            cache_asset(image_key, ".png", local_image_path)
+        except DownloadError as e:
+            print(f"Error downloading dragon image: {e}")
+
+    if not os.path.exists(local_image_path):
+        # No generated image (no API key or a failed download): use the shipped one
+        fallback = "public/assets/custom_dragon.png"
+        if not os.path.exists(fallback):
+            fallback = "public/assets/dragon_base.png"
+        shutil.copy(fallback, local_image_path)
+        print(f"Using fallback dragon image: {fallback}")
+    return local_image_path
+
+def build_intro(ws, local_image_path, title_audio_path, title_audio_duration):
+    """Generate the lip-sync video and return the intro manifest (static image on failure)."""
+    lipsync_video_path = ws.asset("dragon_lipsync.mp4")
     print("Generating Lip-Sync Video via Replicate (SadTalker)...")
     
+    image_intro = {
+        "type": "image",
+        "visual_src": ws.public_path(local_image_path),
+        "audio_src": ws.public_path(title_audio_path),
+        "durationInSeconds": title_audio_duration
+    }
+
+    video_intro = {
+        "type": "video",
+        "visual_src": ws.public_path(lipsync_video_path), # Relative for Remotion
+        "audio_src": ws.public_path(title_audio_path), # Audio is embedded in video usually, but we keep track
+        "durationInSeconds": title_audio_duration
+    }
+
+    # Byte-identical image + audio with the same model/params -> reuse the previous video
+    lipsync_key = None
+    if os.path.exists(local_image_path) and os.path.exists(title_audio_path):
+        lipsync_key = asset_cache.cache_key(
+            "lipsync",
+            image=asset_cache.file_sha256(local_image_path),
+            audio=asset_cache.file_sha256(title_audio_path),
+            version=SADTALKER_VERSION,
+            params=SADTALKER_PARAMS,
+        )
+        if asset_cache.fetch(lipsync_key, ".mp4", lipsync_video_path):
+            print(f"Using cached Lip-Sync Video ({lipsync_key})")
+            return video_intro
+
     lipsync_url = generate_lip_sync_video(local_image_path, title_audio_path)
-    
-    if lipsync_url:
-        try:
-            v_data = requests.get(lipsync_url).content
-            with open(lipsync_video_path, "wb") as f:
-                f.write(v_data)
-            print(f"Saved Lip-Sync Video to {lipsync_video_path}")
+    if not lipsync_url:
+        print("Lip-Sync generation failed or skipped. Using static image.")
+        return image_intro
+
+    try:
+        download_file(lipsync_url, lipsync_video_path)
+        print(f"Saved Lip-Sync Video to {lipsync_video_path}")
+    except Exception as e:
+        print(f"Error downloading lipsync video: {e}")
+        # Fallback to image
+        return image_intro
+
+    if lipsync_key:
+        cache_asset(lipsync_key, ".mp4", lipsync_video_path)
             
-            # Use video for intro
-            intro_manifest = {
-                "type": "video",
-                "visual_src": "/assets" + "/dragon_lipsync.mp4", # Relative for Remotion
-                "audio_src": "/assets/" + os.path.basename(title_audio_path), # Audio is embedded in video usually, but we keep track
-                "durationInSeconds": title_audio_duration
-            }
+    # Use video for intro
+    return video_intro
+
+def read_audio_durations(title_audio_path, body_audio_path):
+    probed = media_probe.probe_many([title_audio_path, body_audio_path])
+    durations = []
+    for path, default in ((title_audio_path, 10.0), (body_audio_path, 30.0)):
+        info = probed.get(path)
+        if info and info["duration"]:
+            durations.append(info["duration"])
+        else:
+            print(f"Could not read audio duration of {path}. Defaulting to {default:.0f}s.")
+            durations.append(default)
+    return tuple(durations)
+
+def existing_subtitles(json_path):
+    """Use subtitles from an earlier run instead of transcribing again."""
+    if not os.path.exists(json_path):
+        raise RuntimeError(f"No existing subtitles at {json_path}")
+    print(f"Reusing existing subtitles: {json_path}")
+    return json_path
+
+def main(title_audio_path, body_audio_path, transcribe=True, workspace=None):
+    """
+    Builds the manifest as a task graph. The lip-sync branch (image -> Replicate)
+    only needs the title audio and image, so it overlaps with body transcription,
+    scene analysis and stock fetching.
+    With transcribe=False the subtitle JSONs already in the workspace are reused.
+
+    `workspace` (workspace.Workspace) decides where inputs, generated assets,
+    subtitles and the manifest go; the default is the shared public/assets +
+    src/ layout. Input audio is copied into the workspace's asset dir.
+    Returns the manifest, or None if it could not be written.
+
+        transcribe_title ─┐
+        transcribe_body ──┴─ scenes ── stock ── body_track ─┐
+        durations ───────────────────────────────────────────┼─ manifest
+        dragon_image ── lipsync ─────────────────────────────┤
+        durations ── audio_mix ──────────────────────────────┘
+    """
+    ws = workspace or Workspace.shared()
+    title_audio_path = ws.import_file(title_audio_path)
+    body_audio_path = ws.import_file(body_audio_path)
+    title_json_subtitles = ws.data("title_subtitles.json")
+    body_json_subtitles = ws.data("body_subtitles.json")
+
+    def transcribe_title():
+        # The title is optional context; only a failed body transcription stops the run
+        try:
+            if not transcribe:
+                return existing_subtitles(title_json_subtitles)
+            # Title audio (for Dragon Context/LipSync duration)
+            print(f"Running transcription on Title: {title_audio_path}...")
+            return run_transcription(title_audio_path, title_json_subtitles)
         except Exception as e:
-            print(f"Error downloading lipsync video: {e}")
-            # Fallback to image
-            intro_manifest = {
-                "type": "image",
-                "visual_src": "/assets/dragon_base.png",
-                "audio_src": "/assets/" + os.path.basename(title_audio_path),
-                "durationInSeconds": title_audio_duration
-            }
-    else:
-        print("Lip-Sync generation failed or skipped. Using static image.")
-        intro_manifest = {
-            "type": "image",
-            "visual_src": "/assets/dragon_base.png",
-            "audio_src": "/assets/" + os.path.basename(title_audio_path),
-            "durationInSeconds": title_audio_duration
-        }
+            print(f"Title transcription unavailable ({e}). Continuing without title text.")
+            return ""
 
-    # 6. Fetch Stock Videos for Scenes
-    timeline = []
-    if PEXELS_API_KEY:
-        timeline = fetch_videos_for_scenes(scenes)
-    else:
+    def transcribe_body():
+        if not transcribe:
+            return existing_subtitles(body_json_subtitles)
+        # Body audio (for Keywords/Stock Videos)
+        print(f"Running transcription on Body: {body_audio_path}...")
+        return run_transcription(body_audio_path, body_json_subtitles)
+
+    def scenes(title_json, body_json):
+        print("Reading subtitles for scene analysis...")
+        with open(body_json, 'r') as f:
+            subtitles = json.load(f)
+        # Read title text if available
+        title_text = ""
+        title_txt_file = title_json.replace(".json", ".txt") if title_json else None
+        if title_txt_file and os.path.exists(title_txt_file):
+            with open(title_txt_file, "r") as f:
+                title_text = f.read()
+        # Group subtitles into scenes (~5-8 seconds or logical chunks)
+        return group_subtitles_into_scenes(subtitles, title_text)
+
+    def lipsync(local_image_path, durations):
+        return build_intro(ws, local_image_path, title_audio_path, durations[0])
+
+    def stock(scene_list):
+        if PEXELS_API_KEY:
+            return fetch_videos_for_scenes(scene_list)
         print("PEXELS_API_KEY not found. Using random local videos.")
-        pass 
+        return []
 
-    # 7. Create Manifest
-    from mutagen.mp3 import MP3
-    
-    # Calculate duration BEFORE creating manifest (and before using it in intro fallback)
-    # Actually we need it for the intro logic too.
-    
-    manifest = {
-        "intro": intro_manifest,
-        "body": {
-            "timeline": timeline,
-            "audio_src": "/assets/" + os.path.basename(body_audio_path),
-            "durationInSeconds": body_audio_duration
+    def precompose(timeline, durations):
+        # Pre-composite the body timeline into one continuous video
+        if not (timeline and PRECOMPOSE_BODY and body_track.ffmpeg_available()):
+            return None
+        print("Pre-compositing body track...")
+        try:
+            track_path = body_track.build_body_track(
+                timeline, int(durations[1] * 30), ws.asset("body_track.mp4"))
+            print(f"Saved body track to {track_path}")
+            return local_to_public(track_path)
+        except Exception as e:
+            print(f"Body track pre-composite failed ({e}); Remotion will composite the timeline.")
+            return None
+
+    def premix(durations):
+        # Same frame math as the composition: body starts at ceil(intro frames)
+        if not (PREMIX_AUDIO and audio_mix.ffmpeg_available()):
+            return None
+        print("Pre-mixing audio bed...")
+        body_start = math.ceil(durations[0] * 30) / 30
+        total = math.ceil((durations[0] + durations[1]) * 30) / 30
+        bgm = BGM_PATH if BGM_PATH and os.path.exists(BGM_PATH) else None
+        try:
+            mix_path = audio_mix.build_audio_mix(
+                [(title_audio_path, 0.0), (body_audio_path, body_start)],
+                ws.asset("audio_mix.m4a"), total, bgm_path=bgm)
+            print(f"Saved audio mix to {mix_path}")
+            return local_to_public(mix_path)
+        except Exception as e:
+            print(f"Audio pre-mix failed ({e}); Remotion will mix the tracks.")
+            return None
+
+    def write_manifest(intro_manifest, timeline, body_track_src, durations, audio_mix_src):
+        manifest = {
+            "intro": intro_manifest,
+            "body": {
+                "timeline": timeline,
+                "audio_src": ws.public_path(body_audio_path),
+                "durationInSeconds": durations[1]
+            }
         }
-    }
-    
-    # Write to public for runtime access
-    with open("public/manifest.json", "w") as f:
-        json.dump(manifest, f, indent=2)
-        
-    # Write to src for build-time access
-    with open("src/dragon-manifest.json", "w") as f:
-        json.dump(manifest, f, indent=2)
+        if body_track_src:
+            # Single pre-composited stream; timeline is kept for reference/re-editing
+            manifest["body"]["track_src"] = body_track_src
+        if audio_mix_src:
+            # Whole-video audio; intro/body audio_src are kept for re-mixing
+            manifest["audio_mix_src"] = audio_mix_src
         
-    print("Saved public/manifest.json and src/dragon-manifest.json")
+        ws.write_manifest(manifest)
+        print(f"Saved {' and '.join(ws.manifest_paths)}")
+        return manifest
+
+    graph = TaskGraph(max_workers=PIPELINE_WORKERS)
+    graph.add("transcribe_title", transcribe_title)
+    graph.add("transcribe_body", transcribe_body)
+    graph.add("durations", lambda: read_audio_durations(title_audio_path, body_audio_path))
+    graph.add("dragon_image", lambda: prepare_dragon_image(ws))
+    graph.add("lipsync", lipsync, deps=["dragon_image", "durations"])
+    graph.add("scenes", scenes, deps=["transcribe_title", "transcribe_body"])
+    graph.add("stock", stock, deps=["scenes"])
+    graph.add("body_track", precompose, deps=["stock", "durations"])
+    graph.add("audio_mix", premix, deps=["durations"])
+    graph.add("manifest", write_manifest, deps=["lipsync", "stock", "body_track", "durations", "audio_mix"])
+
+    try:
+        results = graph.run()
+    finally:
+        # The written manifest pins its clips from here on
+        stock_cache.unpin_job(PIN_JOB_ID)
+    report = graph.report()
+    os.makedirs(os.path.dirname(ws.timings_path), exist_ok=True)
+    with open(ws.timings_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    if "manifest" not in results:
+        print("Manifest was not written (see failed tasks above).")
+        return None
+    stock_cache.print_report(stock_cache.enforce_budget())
+    return results["manifest"]
 
 def generate_lip_sync_video(image_path, audio_path):
+    """Run SadTalker on Replicate in-process. Returns the output video URL or None."""
     if not REPLICATE_API_KEY:
         print("REPLICATE_API_KEY not found. Skipping.")
         return None
         
-    print(f"  Invoking run_replicate.py for Lip Sync via venv_replicate...")
+    print(f"  Submitting Lip Sync job to Replicate...")
     try:
-        import subprocess
-        
-        # Run isolated process using DEDICATED VENV
-        python_executable = "venv_replicate/bin/python"
-        if not os.path.exists(python_executable):
-            print(f"  Warning: {python_executable} not found. Using system python (might fail).")
-            python_executable = "python3"
-
-        result = subprocess.run(
-            [python_executable, "run_replicate.py", image_path, audio_path],
-            capture_output=True,
-            text=True
-        )
-        
-        print(f"  Subprocess STDOUT: {result.stdout}")
-        print(f"  Subprocess STDERR: {result.stderr}")
-        
-        if result.returncode != 0:
-            print("  Replicate script failed.")
-            return None
-            
-        # Parse output for URL
-        for line in result.stdout.splitlines():
-            if line.startswith("OUTPUT_URL="):
-                url = line.replace("OUTPUT_URL=", "").strip()
-                # Clean up if needed (Replicate sometimes returns list string)
-                if url.startswith("['") and url.endswith("']"):
-                    url = url[2:-2]
-                return url
-                
+        job = ReplicateClient(api_key=REPLICATE_API_KEY).submit_lip_sync(image_path, audio_path)
+        result = job.wait(timeout=LIPSYNC_TIMEOUT)
+    except ReplicateError as e:
+        print(f"  Replicate lip sync failed: {e}")
         return None
-        
     except Exception as e:
-        print(f"  Error invoking Replicate subprocess: {e}")
+        print(f"  Error running Replicate job: {e}")
+        return None
+
+    print(f"  Replicate job {result['id']} {result['status']} in {result['elapsed']:.0f}s")
+    if result["status"] != "succeeded" or not result["output_url"]:
+        print(f"  Replicate job did not produce a video: {result['error']}")
         return None
+    return result["output_url"]
+
+def scene_end_frame(subtitles, i):
+    """A scene ending at subtitle i runs until the next subtitle starts (no gaps)."""
+    if i + 1 < len(subtitles):
+        return subtitles[i+1]['startFrame']
+    return subtitles[i]['endFrame'] + 30 # Add buffer at very end
+
+def segment_by_sentence(subtitles):
+    """Legacy segmentation: a new scene after every subtitle containing "。"."""
+    ranges = []
+    start = 0
+    for i, sub in enumerate(subtitles):
+        if "。" in sub['text'] or i == len(subtitles) - 1:
+            ranges.append((start, i))
+            start = i + 1
+    return ranges
+
+def segment_by_duration(subtitles, fps=30):
+    """
+    Duration-constrained segmentation by dynamic programming over subtitle
+    boundaries. Minimizes, over all ways to cut the subtitles into scenes:
+      SCENE_COST per scene (fewer scenes = fewer API calls/clips)
+      + squared relative deviation from SCENE_TARGET_SEC
+      + NON_SENTENCE_PENALTY for cutting where no sentence ends ("。")
+      + a large penalty for scenes shorter than SCENE_MIN_SEC.
+    Scenes longer than SCENE_MAX_SEC are only allowed for a single subtitle.
+    Returns [(first_index, last_index), ...].
+    """
+    n = len(subtitles)
+    short_penalty = 10.0
+    best = [0.0] + [float("inf")] * n   # best[k]: cost of segmenting subtitles[:k]
+    back = [0] * (n + 1)
+
+    for i in range(n):                  # scene ends at subtitle i
+        end = scene_end_frame(subtitles, i)
+        is_boundary = "。" in subtitles[i]['text'] or i == n - 1
+        for j in range(i, -1, -1):      # scene starts at subtitle j
+            duration = (end - subtitles[j]['startFrame']) / fps
+            if duration > SCENE_MAX_SEC and j < i:
+                break                   # Only gets longer as j decreases
+            if best[j] == float("inf"):
+                continue
+            cost = SCENE_COST + ((duration - SCENE_TARGET_SEC) / SCENE_TARGET_SEC) ** 2
+            if not is_boundary:
+                cost += NON_SENTENCE_PENALTY
+            if duration < SCENE_MIN_SEC:
+                cost += short_penalty
+            if best[j] + cost < best[i + 1]:
+                best[i + 1] = best[j] + cost
+                back[i + 1] = j
+
+    ranges = []
+    k = n
+    while k > 0:
+        j = back[k]
+        ranges.append((j, k - 1))
+        k = j
+    return ranges[::-1]
 
 def group_subtitles_into_scenes(subtitles, title_context):
     """
-    Groups subtitles into scenes based on sentence endings ("。").
+    Groups subtitles into scenes: by default with duration-constrained
+    segmentation (SCENE_MIN_SEC / SCENE_TARGET_SEC / SCENE_MAX_SEC, preferring
+    sentence endings "。"), or on every sentence ending with
+    SCENE_SEGMENTATION=sentence.
+    Visual queries for all scenes are then requested concurrently.
     """
     if not subtitles: return []
     
+    if SCENE_SEGMENTATION == "sentence":
+        ranges = segment_by_sentence(subtitles)
+    else:
+        ranges = segment_by_duration(subtitles)
+
     scenes = []
-    current_scene_text = []
-    current_start_frame = subtitles[0]['startFrame']
-    
-    for i, sub in enumerate(subtitles):
-        current_scene_text.append(sub['text'])
-        
-        # Check for sentence end
-        is_sentence_end = "。" in sub['text']
-        is_last = (i == len(subtitles) - 1)
-        
-        if is_sentence_end or is_last:
-            # End of scene
-            scene_text = " ".join(current_scene_text)
-            print(f"Analyzing scene: {scene_text[:30]}...")
-            
-            # Get multiple queries
-            queries = get_scene_visual_queries(scene_text, title_context)
-            
+    for first, last in ranges:
+        scenes.append({
+            "startFrame": subtitles[first]['startFrame'],
             # Determine end frame to avoid gaps
-            # If not last scene, extend to start of next subtitle
-            if not is_last:
-                scene_end_frame = subtitles[i+1]['startFrame']
-            else:
-                scene_end_frame = sub['endFrame'] + 30 # Add buffer at very end
-            
-            scenes.append({
-                "startFrame": current_start_frame,
-                "endFrame": scene_end_frame, 
-                "text": scene_text,
-                "queries": queries # List of queries
-            })
-            
-            # Reset
-            if not is_last:
-                current_start_frame = subtitles[i+1]['startFrame']  # Next starts at next subtitle start
-                current_scene_text = []
+            "endFrame": scene_end_frame(subtitles, last),
+            "text": " ".join(sub['text'] for sub in subtitles[first:last + 1]),
+        })
+    durations = [(sc["endFrame"] - sc["startFrame"]) / 30 for sc in scenes]
+    print(f"Segmented {len(subtitles)} subtitles into {len(scenes)} scenes "
+          f"({min(durations):.1f}s - {max(durations):.1f}s)")
+
+    # Get multiple queries per scene: one batched request for all scenes,
+    # then per-scene calls (in parallel) only for scenes it didn't cover
+    print(f"Analyzing {len(scenes)} scenes...")
+    batched = {}
+    if BATCH_SCENE_QUERIES:
+        batched = get_batch_scene_visual_queries([scene["text"] for scene in scenes], title_context)
+
+    missing = [i for i in range(len(scenes)) if i not in batched]
+    if missing:
+        if BATCH_SCENE_QUERIES:
+            print(f"  {len(missing)} scenes missing from batch response, querying individually...")
+        with ThreadPoolExecutor(max_workers=QUERY_WORKERS) as executor:
+            fallback = executor.map(
+                lambda i: get_scene_visual_queries(scenes[i]["text"], title_context), missing)
+            batched.update(zip(missing, fallback))
+
+    for i, scene in enumerate(scenes):
+        scene["queries"] = batched[i] # List of queries
+        print(f"  {scene['text'][:30]}... -> {scene['queries']}")
 
     return scenes
 
+def get_batch_scene_visual_queries(scene_texts, broad_context):
+    """
+    Ask for the visual queries of every scene in a single request.
+    Returns {scene_index: [query1, query2, query3]} for the scenes the model
+    answered; callers fall back to get_scene_visual_queries for the rest.
+    """
+    if not client or not scene_texts:
+        return {}
+
+    scenes_for_ai = [{"index": i, "text": text} for i, text in enumerate(scene_texts)]
+    try:
+        response = client.chat.completions.create(
+            model="gpt-4o",
+            messages=[
+                {"role": "system", "content": "You are a visual director. You will be given the numbered scenes of a video script. Ensure you understand the broad context.\n"
+                                              "Broad Context: " + broad_context + "\n"
+                                              "Task: For EACH scene, provide 3 DISTINCT visual search queries for a stock video website (Pexels) to match the scene.\n"
+                                              "1. Literal: Directly depicting the action/object.\n"
+                                              "2. Metaphorical/Emotional: Depicting the feeling or abstract concept.\n"
+                                              "3. Atmospheric: A background vibe that fits.\n"
+                                              "Return JSON: {\"scenes\": [{\"index\": 0, \"queries\": [\"query1\", \"query2\", \"query3\"]}, ...]}"},
+                {"role": "user", "content": json.dumps(scenes_for_ai, ensure_ascii=False)}
+            ],
+            response_format={"type": "json_object"}
+        )
+        data = json.loads(response.choices[0].message.content)
+    except Exception as e:
+        print(f"Error getting batched scene queries: {e}")
+        return {}
+
+    results = {}
+    for item in data.get("scenes", []):
+        try:
+            idx = int(item.get("index"))  # The model may answer "3" instead of 3
+        except (TypeError, ValueError):
+            continue
+        queries = [q for q in item.get("queries", []) if isinstance(q, str) and q.strip()]
+        if 0 <= idx < len(scene_texts) and queries:
+            results[idx] = queries
+    return results
+
 def get_scene_visual_queries(segment_text, broad_context):
     if not client:
         return ["nature", "abstract", "scenery"] 
@@ -379,10 +660,16 @@ def select_best_video_from_candidates(scene_text, candidates):
     """
     Uses GPT-4o Vision to select the best video from a list of candidates.
     candidates: list of dicts {id, url, image, video_files}
+    Thumbnails are sent downscaled at low detail; decisions are cached.
     """
     if not candidates: return None
     if not client: return candidates[0] # Fallback
 
+    cached = decision_cache.get(scene_text, candidates)
+    if cached:
+        print(f"  ♻️ Cached AI selection {cached['id']} for: '{scene_text[:20]}...'")
+        return cached
+
     print(f"  🤖 AI Selecting best video from {len(candidates)} candidates for: '{scene_text[:20]}...'")
 
     # Prepare message for GPT-4o
@@ -394,10 +681,7 @@ def select_best_video_from_candidates(scene_text, candidates):
     
     # Add images
     for c in candidates:
-        content.append({
-            "type": "image_url",
-            "image_url": {"url": c["image"]}
-        })
+        content.append(thumbnail_image_part(c))
         content.append({
             "type": "text",
             "text": f"ID: {c['id']}"
@@ -417,9 +701,10 @@ def select_best_video_from_candidates(scene_text, candidates):
         selected_id = result.get("selected_id")
         
         # Find the candidate object
-        selected = next((c for c in candidates if c["id"] == selected_id), None)
+        selected = next((c for c in candidates if str(c["id"]) == str(selected_id)), None)
         if selected:
             print(f"  ✅ AI Selected ID: {selected_id}")
+            remember_decision(scene_text, candidates, selected)
             return selected
         else:
             print(f"  ⚠️ AI returned unknown ID {selected_id}, using first candidate.")
@@ -429,116 +714,332 @@ def select_best_video_from_candidates(scene_text, candidates):
         print(f"  ❌ AI Selection failed: {e}. Using first candidate.")
         return candidates[0]
 
+def remember_decision(scene_text, candidates, selected):
+    """Cache a vision decision; a failed cache write must not fail the selection."""
+    try:
+        decision_cache.put(scene_text, candidates, selected)
+    except Exception as e:
+        print(f"  Could not cache vision decision: {e}")
+
+def select_best_videos_batch(scene_items):
+    """
+    Batched vision selection: one GPT-4o request for several scenes.
+    scene_items: list of (scene_text, candidates). Returns a list of selected
+    candidates in the same order. Cached decisions are served locally; scenes
+    the model doesn't answer fall back to select_best_video_from_candidates.
+    """
+    results = [None] * len(scene_items)
+    pending = []
+    for k, (scene_text, candidates) in enumerate(scene_items):
+        if not candidates:
+            continue
+        if not client:
+            results[k] = candidates[0]
+            continue
+        cached = decision_cache.get(scene_text, candidates)
+        if cached:
+            print(f"  ♻️ Cached AI selection {cached['id']} for: '{scene_text[:20]}...'")
+            results[k] = cached
+        else:
+            pending.append(k)
+
+    if len(pending) == 1:
+        scene_text, candidates = scene_items[pending[0]]
+        results[pending[0]] = select_best_video_from_candidates(scene_text, candidates)
+        return results
+    if not pending:
+        return results
+
+    print(f"  🤖 AI Selecting videos for {len(pending)} scenes in one request...")
+    content = [
+        {"type": "text", "text": "For EACH scene below, select the video that best matches the scene description.\n"
+                                  "If none are perfect, choose the best available relative to the mood.\n"
+                                  "Return ONLY the JSON object: {\"selections\": [{\"scene\": <scene number>, \"selected_id\": <id>}, ...]}"}
+    ]
+    for k in pending:
+        scene_text, candidates = scene_items[k]
+        content.append({"type": "text", "text": f"Scene {k}: \"{scene_text}\""})
+        for c in candidates:
+            content.append(thumbnail_image_part(c))
+            content.append({"type": "text", "text": f"Scene {k} / ID: {c['id']}"})
+
+    try:
+        response = client.chat.completions.create(
+            model="gpt-4o",
+            messages=[
+                {"role": "system", "content": "You are a video editor selecting stock footage. You will be given several scenes, each with a description and a list of video thumbnails with IDs. Select the single best match for each scene."},
+                {"role": "user", "content": content}
+            ],
+            max_tokens=40 * len(pending),
+            response_format={"type": "json_object"}
+        )
+        selections = json.loads(response.choices[0].message.content).get("selections", [])
+    except Exception as e:
+        print(f"  ❌ Batched AI Selection failed: {e}. Selecting per scene.")
+        selections = []
+
+    for item in selections:
+        try:
+            k = int(item.get("scene"))  # The model may answer "3" instead of 3
+        except (TypeError, ValueError):
+            continue
+        if k not in pending or results[k] is not None:
+            continue
+        scene_text, candidates = scene_items[k]
+        selected = next((c for c in candidates if str(c["id"]) == str(item.get("selected_id"))), None)
+        if selected:
+            print(f"  ✅ AI Selected ID {selected['id']} for scene {k}")
+            remember_decision(scene_text, candidates, selected)
+            results[k] = selected
+
+    for k in pending:
+        if results[k] is None:
+            scene_text, candidates = scene_items[k]
+            results[k] = select_best_video_from_candidates(scene_text, candidates)
+    return results
+
+def search_scene_candidates(scene, duration_sec):
+    """
+    Search stage: try the scene's queries in order and return
+    (query, candidates) for the first query with results, or (None, []).
+    """
+    # Try queries effectively
+    # Strategy: Search query 1 (Top 5). If good, AI select. 
+    # If no results, try query 2.
+    for query in scene["queries"]:
+        print(f"  Searching: '{query}' (min {duration_sec:.1f}s)...")
+        # Fetch TOP 5 videos with minimum duration
+        # Pexels API supports 'min_duration'
+        try:
+            data = pexels.search_videos(query, per_page=5, orientation="landscape",
+                                        size="medium", min_duration=int(duration_sec))
+            videos = data.get("videos", [])
+            if not videos:
+                print(f"  No videos found for '{query}'.")
+                continue
+
+            # Prepare candidates
+            candidates = []
+            for v in videos:
+                # Extract useful info
+                video_files = v.get("video_files", [])
+                target = next((f for f in video_files if f["height"] == 720), None) or video_files[0]
+                
+                candidates.append({
+                    "id": v["id"],
+                    "image": v["image"], # Thumbnail
+                    "download_link": target["link"],
+                    "size": target.get("size"),
+                    "width": target.get("width"),
+                    "height": target.get("height"),
+                    "duration": v["duration"],
+                    # Metadata for the local text ranker
+                    "url": v.get("url"),
+                    "tags": v.get("tags", []),
+                    "query": query
+                })
+            
+            # Filter out candidates that are surprisingly short (API isn't perfect)
+            valid_candidates = [c for c in candidates if c["duration"] >= duration_sec * 0.8] # Allow 20% slack for slow mo
+            
+            if not valid_candidates:
+                 print(f"  Found videos but all too short. Checking original candidates...")
+                 valid_candidates = candidates # Fallback to whatever we have
+
+            print(f"  -> Found {len(valid_candidates)} candidates with '{query}'")
+            return query, valid_candidates
+        except Exception as e:
+            print(f"  Error fetching: {e}")
+
+    return None, []
+
+_download_locks = {}
+_download_locks_guard = threading.Lock()
+
+def download_scene_video(i, best_match, query, library):
+    """
+    Download stage: fetch the chosen clip into the library (if not already
+    there), record it in the catalog and return its public path.
+    """
+    filename = clip_filename(best_match["id"])
+    local_path = os.path.join(library.stock_dir, filename)
+
+    # Two scenes (or two jobs) may pick the same clip; only one of them downloads it
+    with _download_locks_guard:
+        lock = _download_locks.setdefault(best_match["id"], threading.Lock())
+    
+    try:
+        with lock, file_lock.locked(local_path):
+            if not os.path.exists(local_path):
+                print(f"  Downloading video for scene {i+1}...")
+                download_file(best_match["download_link"], local_path, expected_size=best_match.get("size"))
+            else:
+                print(f"  Using cached (scene {i+1}).")
+    except Exception as e:
+        print(f"  Error downloading scene {i+1}: {e}")
+        return None
+
+    library.add_clip(best_match["id"], best_match["duration"],
+                     width=best_match.get("width"), height=best_match.get("height"),
+                     query=query, thumbnail=best_match.get("image"))
+    return f"/assets/stock/{filename}"
+
+def public_to_local(public_path):
+    """'/assets/stock/x.mp4' (Remotion staticFile path) -> 'public/assets/stock/x.mp4'"""
+    return os.path.join("public", public_path.lstrip("/"))
+
+def local_to_public(local_path):
+    return "/" + os.path.relpath(local_path, "public").replace(os.sep, "/")
+
 def fetch_videos_for_scenes(scenes):
-    timeline = []
-    headers = {"Authorization": PEXELS_API_KEY}
-    stock_dir = "public/assets/stock"
+    """
+    Looks up each scene in the local stock library first, then runs
+    search -> AI selection -> download for the misses. Each stage runs
+    concurrently across scenes on its own bounded pool; results are kept in
+    scene order, so the timeline is deterministic.
+    """
+    library = StockLibrary()
+    stock_dir = library.stock_dir
     os.makedirs(stock_dir, exist_ok=True)
     
     fps = 30
-    
+    durations = [(scene["endFrame"] - scene["startFrame"]) / fps for scene in scenes]
     for i, scene in enumerate(scenes):
-        queries = scene["queries"]
-        duration_sec = (scene["endFrame"] - scene["startFrame"]) / fps
-        min_duration = max(5, duration_sec) 
-        
-        print(f"Scene {i+1}: Queries {queries} ({duration_sec:.1f}s)")
-        
-        video_path = None
-        
-        # Try queries effectively
-        # Strategy: Search query 1 (Top 5). If good, AI select. 
-        # If no results, try query 2.
-        
-        for query in queries:
-            print(f"  Searching: '{query}' (min {duration_sec:.1f}s)...")
-            # Fetch TOP 5 videos with minimum duration
-            # Pexels API supports 'min_duration'
-            url = f"https://api.pexels.com/videos/search?query={query}&per_page=5&orientation=landscape&size=medium&min_duration={int(duration_sec)}"
-            
-            try:
-                res = requests.get(url, headers=headers)
-                if res.status_code == 200:
-                    data = res.json()
-                    videos = data.get("videos", [])
-                    
-                    if videos:
-                        # Prepare candidates
-                        candidates = []
-                        for v in videos:
-                            # Extract useful info
-                            video_files = v.get("video_files", [])
-                            target = next((f for f in video_files if f["height"] == 720), None) or video_files[0]
-                            
-                            candidates.append({
-                                "id": v["id"],
-                                "image": v["image"], # Thumbnail
-                                "download_link": target["link"],
-                                "duration": v["duration"]
-                            })
-                        
-                        # Filter out candidates that are surprisingly short (API isn't perfect)
-                        valid_candidates = [c for c in candidates if c["duration"] >= duration_sec * 0.8] # Allow 20% slack for slow mo
-                        
-                        if not valid_candidates:
-                             print(f"  Found videos but all too short. Checking original candidates...")
-                             valid_candidates = candidates # Fallback to whatever we have
+        print(f"Scene {i+1}: Queries {scene['queries']} ({durations[i]:.1f}s)")
 
-                        # AI SELECTION
-                        best_match = select_best_video_from_candidates(scene["text"], valid_candidates)
-                        
-                        # Download
-                        filename = f"scene_{i}_{best_match['id']}.mp4"
-                        local_path = os.path.join(stock_dir, filename)
-                        
-                        if not os.path.exists(local_path):
-                            print(f"  Downloading video...")
-                            d_res = requests.get(best_match["download_link"])
-                            with open(local_path, "wb") as f:
-                                f.write(d_res.content)
-                        else:
-                            print(f"  Using cached.")
-                            
-                        video_path = f"/assets/stock/{filename}"
-                        print(f"  -> Found match with '{query}'")
-                        break # Found it!
-                    else:
-                        print(f"  No videos found for '{query}'.")
-                else:
-                     print(f"  API Error: {res.status_code}")
+    # 0. Library lookup (in scene order, so one clip isn't reused within a video)
+    video_paths = [None] * len(scenes)
+    used_ids = set()
+    for i, scene in enumerate(scenes):
+        entry = library.find_match(scene["queries"], min_duration=durations[i] * 0.8, exclude_ids=used_ids)
+        if entry:
+            # Pin before relying on it; another job's eviction may have removed it meanwhile
+            stock_cache.add_pins(PIN_JOB_ID, [library.public_path(entry)])
+            if not os.path.exists(library.local_path(entry)):
+                library.remove_clip(entry["id"])
+                continue
+            print(f"  Scene {i+1}: library hit -> {entry['file']} ({entry['queries'][:2]})")
+            library.mark_used(entry["id"])
+            used_ids.add(str(entry["id"]))
+            video_paths[i] = library.public_path(entry)
+    misses = [i for i in range(len(scenes)) if video_paths[i] is None]
+    print(f"Stock library: {len(scenes) - len(misses)} hits, {len(misses)} misses")
+    library.record_lookups(len(scenes) - len(misses), len(misses))
+
+    # 1. Search
+    with ThreadPoolExecutor(max_workers=SEARCH_WORKERS) as executor:
+        searches = dict(zip(misses, executor.map(
+            lambda i: search_scene_candidates(scenes[i], durations[i]), misses)))
+
+    # 2a. Local text ranking: skip vision when the winner is clear
+    selections = {}
+    rankings = {}
+    needs_vision = []
+    for i in misses:
+        candidates = searches[i][1]
+        if not candidates:
+            selections[i] = None
+            continue
+        rankings[i] = ranker.rank_candidates(scenes[i]["queries"], candidates, library)
+        if len(candidates) == 1 or ranker.is_confident(rankings[i]):
+            selections[i] = rankings[i][0][1]
+            print(f"  Scene {i+1}: ranker picked {selections[i]['id']} "
+                  f"(margin {ranker.relative_margin(rankings[i]):.2f}), skipping vision")
+            ranker.log_calibration(scenes[i]["text"], scenes[i]["queries"], rankings[i])
+        else:
+            needs_vision.append(i)
+
+    # 2b. AI selection for close calls (VISION_BATCH_SIZE scenes per request, batches in parallel)
+    batches = [needs_vision[k:k + VISION_BATCH_SIZE] for k in range(0, len(needs_vision), VISION_BATCH_SIZE)]
+
+    def select(batch):
+        return select_best_videos_batch([(scenes[i]["text"], searches[i][1]) for i in batch])
+
+    with ThreadPoolExecutor(max_workers=SELECT_WORKERS) as executor:
+        for batch, chosen in zip(batches, executor.map(select, batches)):
+            selections.update(zip(batch, chosen))
+    for i in needs_vision:
+        vision_pick = selections[i]["id"] if selections[i] else None
+        ranker.log_calibration(scenes[i]["text"], scenes[i]["queries"], rankings[i], vision_pick=vision_pick)
+
+    # 3. Download
+    def download(i):
+        if not selections[i]:
+            return None
+        # Pinned before it exists, so a concurrent eviction never takes a fresh download
+        stock_cache.add_pins(PIN_JOB_ID, [f"/assets/stock/{clip_filename(selections[i]['id'])}"])
+        return download_scene_video(i, selections[i], searches[i][0], library)
+
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+        for i, path in zip(misses, executor.map(download, misses)):
+            video_paths[i] = path
+
+    library.save()
+
+    source_paths = list(video_paths)
+
+    # 4. Render-optimized intermediates (trimmed, 1920x1080@30, short GOP)
+    if PRETRANSCODE and transcode.ffmpeg_available():
+        def prepare(i):
+            if not video_paths[i]:
+                return None
+            src_path = public_to_local(video_paths[i])
+            clip_id = os.path.splitext(os.path.basename(src_path))[0]
+            # Scene length plus the 15-frame crossfade overlap
+            needed = durations[i] + 0.5
+            try:
+                render_path = local_to_public(transcode.prepare_render_clip(src_path, clip_id, needed))
+                stock_cache.add_pins(PIN_JOB_ID, [render_path])
+                return render_path
             except Exception as e:
-                print(f"  Error fetching: {e}")
-        
-        # Fallback
-        if not video_path:
-             print("  All queries failed. Using fallback.")
-             video_path = "/assets/stock/pexels_fallback.mp4"
-             
-        # Get actual duration of the source video for looping
-        source_duration = 10.0
-        try:
-            from mutagen.mp4 import MP4
-            # We need the absolute path to read metadata
-            abs_path = os.path.join(stock_dir, os.path.basename(video_path))
-            source_duration = MP4(abs_path).info.length
-        except Exception as e:
-            print(f"  Could not get source duration: {e}")
+                print(f"  Scene {i+1}: transcode failed ({e}), using original clip.")
+                return video_paths[i]
+
+        with ThreadPoolExecutor(max_workers=TRANSCODE_WORKERS) as executor:
+            video_paths = list(executor.map(prepare, range(len(scenes))))
+    elif PRETRANSCODE:
+        print("ffmpeg not found; skipping render-optimized transcode.")
+
+    # 5. Assemble timeline in scene order
+    for i in range(len(scenes)):
+        if not video_paths[i]:
+            print(f"  Scene {i+1}: all queries failed. Using fallback.")
+            video_paths[i] = "/assets/stock/pexels_fallback.mp4"
+
+    # Actual durations of the source videos for looping, probed in one batch
+    probed = media_probe.probe_many([public_to_local(p) for p in video_paths])
+
+    timeline = []
+    for i, scene in enumerate(scenes):
+        video_path = video_paths[i]
+        info = probed.get(public_to_local(video_path))
+        source_duration = (info or {}).get("duration") or 10.0
 
         timeline.append({
             "startFrame": scene["startFrame"],
             "durationInFrames": scene["endFrame"] - scene["startFrame"],
             "video_src": video_path,
-            "keyword": queries[0],
+            "keyword": scene["queries"][0],
             "source_duration": source_duration
         })
-        
+
+    stock_cache.pin_job(PIN_JOB_ID, set(video_paths) | set(source_paths))
     return timeline
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python generate_dragon_video.py <title_audio_path> <body_audio_path>")
+    import argparse
+    arg_parser = argparse.ArgumentParser(description="Build the DragonStock manifest and assets")
+    arg_parser.add_argument("title_audio")
+    arg_parser.add_argument("body_audio")
+    arg_parser.add_argument("--no-transcribe", action="store_true",
+                            help="Reuse the workspace's existing subtitle JSONs")
+    arg_parser.add_argument("--job", nargs="?", const="", default=None, metavar="JOB_ID",
+                            help="Isolated workspace public/jobs/<JOB_ID>/ (new id if omitted)")
+    args = arg_parser.parse_args()
+
+    ws = Workspace.create(args.job or None) if args.job is not None else None
+    if main(args.title_audio, args.body_audio, transcribe=not args.no_transcribe, workspace=ws) is None:
         sys.exit(1)
-    
-    title_audio = sys.argv[1]
-    body_audio = sys.argv[2]
-    main(title_audio, body_audio)
+    if ws:
+        print(f"JOB_ID={ws.job_id}")
+        print(f"Render props: {ws.write_props()}")
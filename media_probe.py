@@ -0,0 +1,200 @@
+"""
+Shared media metadata probe.
+
+One ffprobe call per file (JSON output, format + streams) yields duration,
+container, streams, resolution and frame rate together. Results are cached
+in .cache/media_probe.json keyed by absolute path and invalidated when the
+file's mtime or size changes, so unchanged files are never re-probed.
+probe_many() probes a batch in parallel and writes the cache once.
+
+Without ffprobe, durations fall back to mutagen (no stream details).
+"""
+import json
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import file_lock
+
+CACHE_FILE = ".cache/media_probe.json"
+PROBE_WORKERS = int(os.getenv("PROBE_WORKERS", "8"))
+
+
+class ProbeError(Exception):
+    pass
+
+
+def ffprobe_available():
+    return shutil.which("ffprobe") is not None
+
+
+def parse_rate(rate):
+    """'30000/1001' -> 29.97; '0/0' or missing -> None."""
+    if not rate:
+        return None
+    num, _, den = str(rate).partition("/")
+    try:
+        value = float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return value or None
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def summarize(data):
+    """Condense raw `ffprobe -show_format -show_streams` JSON into the fields callers use."""
+    fmt = data.get("format", {})
+    streams = []
+    for s in data.get("streams", []):
+        stream = {
+            "index": s.get("index"),
+            "type": s.get("codec_type"),
+            "codec": s.get("codec_name"),
+            "duration": _float(s.get("duration")),
+        }
+        if s.get("codec_type") == "video":
+            stream.update({
+                "width": s.get("width"),
+                "height": s.get("height"),
+                "fps": parse_rate(s.get("avg_frame_rate")) or parse_rate(s.get("r_frame_rate")),
+                "pix_fmt": s.get("pix_fmt"),
+            })
+        elif s.get("codec_type") == "audio":
+            stream.update({
+                "sample_rate": int(s["sample_rate"]) if s.get("sample_rate") else None,
+                "channels": s.get("channels"),
+            })
+        streams.append(stream)
+
+    # Cover art in MP3s shows up as a video stream; it has no real frame rate
+    video = next((s for s in streams if s["type"] == "video" and s.get("fps")), None)
+    audio = next((s for s in streams if s["type"] == "audio"), None)
+    duration = _float(fmt.get("duration"))
+    if duration is None:
+        duration = max((s["duration"] for s in streams if s["duration"]), default=None)
+    return {
+        "duration": duration,
+        "format": fmt.get("format_name"),
+        "bit_rate": int(fmt["bit_rate"]) if fmt.get("bit_rate") else None,
+        "width": video["width"] if video else None,
+        "height": video["height"] if video else None,
+        "fps": video["fps"] if video else None,
+        "has_video": video is not None,
+        "has_audio": audio is not None,
+        "streams": streams,
+    }
+
+
+def _run_ffprobe(path):
+    cmd = ["ffprobe", "-v", "error", "-print_format", "json", "-show_format", "-show_streams", path]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise ProbeError(f"ffprobe failed for {path}: {proc.stderr.strip()[:200]}")
+    return summarize(json.loads(proc.stdout))
+
+
+def _run_mutagen(path):
+    try:
+        import mutagen
+    except ImportError:
+        raise ProbeError("Neither ffprobe nor mutagen is available")
+    try:
+        media = mutagen.File(path)
+    except Exception as e:
+        raise ProbeError(f"mutagen failed for {path}: {e}")
+    if media is None or not getattr(media.info, "length", None):
+        raise ProbeError(f"Unrecognized media file: {path}")
+    return {
+        "duration": media.info.length, "format": None, "bit_rate": getattr(media.info, "bitrate", None),
+        "width": None, "height": None, "fps": None,
+        "has_video": None, "has_audio": None, "streams": [],
+    }
+
+
+class ProbeCache:
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = file_lock.read_json(self.path, {})
+        return self._entries
+
+    def get(self, key, st):
+        with self._lock:
+            entry = self._load().get(key)
+        if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            return entry["info"]
+        return None
+
+    def put(self, key, st, info):
+        with self._lock:
+            self._load()[key] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "info": info}
+
+    def save(self):
+        with self._lock:
+            if self._entries is None:
+                return
+            with file_lock.locked(self.path):
+                # Keep other jobs' entries; forget files that no longer exist
+                merged = {**file_lock.read_json(self.path, {}), **self._entries}
+                self._entries = {k: v for k, v in merged.items() if os.path.exists(k)}
+                file_lock.write_json(self.path, self._entries)
+
+
+probe_cache = ProbeCache()
+
+
+def _probe(path):
+    key = os.path.abspath(path)
+    try:
+        st = os.stat(key)
+    except OSError as e:
+        raise ProbeError(f"Cannot stat {path}: {e}")
+    info = probe_cache.get(key, st)
+    if info is None:
+        info = _run_ffprobe(key) if ffprobe_available() else _run_mutagen(key)
+        probe_cache.put(key, st, info)
+    return info
+
+
+def probe(path):
+    """Metadata dict for one file (see summarize()). Raises ProbeError."""
+    info = _probe(path)
+    probe_cache.save()
+    return info
+
+
+def probe_many(paths, workers=None):
+    """{path: info or None} for every path, probed in parallel; failures map to None."""
+    def safe_probe(path):
+        try:
+            return _probe(path)
+        except ProbeError as e:
+            print(f"  [Probe] {e}")
+            return None
+
+    paths = list(dict.fromkeys(paths))
+    with ThreadPoolExecutor(max_workers=workers or PROBE_WORKERS) as executor:
+        results = dict(zip(paths, executor.map(safe_probe, paths)))
+    probe_cache.save()
+    return results
+
+
+def duration(path, default=None):
+    """Duration in seconds, or `default` if the file can't be probed."""
+    try:
+        return probe(path)["duration"] or default
+    except ProbeError as e:
+        print(f"  [Probe] {e}")
+        return default
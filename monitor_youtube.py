@@ -1,12 +1,21 @@
 import os
+import argparse
 import subprocess
 import sys
 
+from transcribe import PCM_SIDECAR_SUFFIX, SAMPLE_RATE, sidecar_path_for
+
 # --- Configuration ---
 CHANNEL_URL = "https://www.youtube.com/@hisuikotaro/shorts"
 DOWNLOAD_ARCHIVE = "downloaded_history.txt"
 BASE_INPUT_DIR = "素材"
 
+# Ingest mode:
+#   mp3 - re-encode to MP3 (legacy)
+#   raw - keep the bestaudio stream as-is (no lossy re-encode)
+#   pcm - raw + a 16 kHz mono WAV sidecar (音声.16k.wav) that transcribe.py reads directly
+INGEST_MODE = os.getenv("INGEST_MODE", "mp3")
+
 def run_command(cmd, shell=True):
     try:
         # If cmd is a list, force shell=False for safety and correct parsing
@@ -17,27 +26,84 @@ def run_command(cmd, shell=True):
     except subprocess.CalledProcessError as e:
         print(f"Error: {e}")
 
-def main():
-    print(f"=== YouTube Shorts Automation Start: {CHANNEL_URL} ===")
-    
-    # 1. Get List of Videos & Download Audio
-    # We use yt-dlp to download directly into the project folder structure
-    # Output template: 素材/Title/音声.mp3
-    
-    cmd = [
+def build_download_command(ingest_mode):
+    # Output template: 素材/Title/音声.<ext>
+    if ingest_mode == "mp3":
+        format_args = ["--extract-audio", "--audio-format", "mp3"]
+    else:
+        # Save the bestaudio stream untouched (webm/opus or m4a/aac)
+        format_args = ["--format", "bestaudio"]
+
+    return [
         "yt-dlp",
-        "--extract-audio",
-        "--audio-format", "mp3",
+        *format_args,
         "--output", f"{BASE_INPUT_DIR}/%(title)s/音声.%(ext)s",
         "--download-archive", DOWNLOAD_ARCHIVE,  # Skip already downloaded
         "--ignore-errors",  # Continue if one fails
         CHANNEL_URL
     ]
+
+def find_voice_file(project_path):
+    """Return the downloaded 音声.* file in a project folder (ignoring sidecars/partials)."""
+    for name in sorted(os.listdir(project_path)):
+        if (name.startswith("音声.") and ".tmp" not in name
+                and not name.endswith((PCM_SIDECAR_SUFFIX, ".part", ".ytdl"))):
+            return os.path.join(project_path, name)
+    return None
+
+def create_pcm_sidecars():
+    """Decode + resample each new download once to 16 kHz mono PCM for Whisper."""
+    if not os.path.exists(BASE_INPUT_DIR):
+        return
+
+    for project_name in sorted(os.listdir(BASE_INPUT_DIR)):
+        project_path = os.path.join(BASE_INPUT_DIR, project_name)
+        if not os.path.isdir(project_path):
+            continue
+        voice_file = find_voice_file(project_path)
+        if not voice_file:
+            continue
+        sidecar = sidecar_path_for(voice_file)
+        if os.path.exists(sidecar):
+            continue
+
+        print(f"  [PCM] {project_name}")
+        # Not named 音声.* so a leftover can never be mistaken for the voice file
+        tmp_sidecar = os.path.join(project_path, f".pcm_sidecar.{os.getpid()}.tmp.wav")
+        try:
+            run_command([
+                "ffmpeg", "-nostdin", "-v", "error", "-y",
+                "-i", voice_file,
+                "-ac", "1", "-ar", str(SAMPLE_RATE), "-c:a", "pcm_s16le",
+                tmp_sidecar
+            ])
+            if os.path.exists(tmp_sidecar):
+                os.replace(tmp_sidecar, sidecar)
+        finally:
+            if os.path.exists(tmp_sidecar):
+                os.remove(tmp_sidecar)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Download Shorts audio from the channel")
+    arg_parser.add_argument("--ingest", choices=["mp3", "raw", "pcm"], default=INGEST_MODE,
+                            help="Audio ingest mode (default: $INGEST_MODE or mp3)")
+    args = arg_parser.parse_args()
+
+    print(f"=== YouTube Shorts Automation Start: {CHANNEL_URL} ===")
+    print(f"Ingest mode: {args.ingest}")
+    
+    # 1. Get List of Videos & Download Audio
+    # We use yt-dlp to download directly into the project folder structure
+    cmd = build_download_command(args.ingest)
     
     # Run download command
     # This will download ALL audios into separate folders
     print("Downloading all past Shorts audio... (This may take a while)")
     run_command(cmd)
+
+    if args.ingest == "pcm":
+        print("\nCreating 16 kHz mono PCM sidecars for transcription...")
+        create_pcm_sidecars()
     
     '''
     # 2. Process Videos (Transcription ONLY as per user request)
@@ -0,0 +1,149 @@
+"""
+Pexels video search client.
+
+Search responses are cached on disk (.cache/pexels_search/) keyed by the
+normalized query and request parameters, and reused until PEXELS_CACHE_TTL
+expires, so recurring queries ("starry night sky") cost no API quota.
+Live requests go through a throttle driven by the X-Ratelimit-* headers
+Pexels returns: as the remaining quota gets low, requests are spread out
+until the reset time instead of being cut off with 429s.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+import file_lock
+from downloads import get_session
+
+DEFAULT_API_BASE = "https://api.pexels.com"
+
+CACHE_DIR = ".cache/pexels_search"
+PEXELS_CACHE_TTL = int(os.getenv("PEXELS_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+
+# Start spacing requests out when fewer than this many remain in the window
+PEXELS_THROTTLE_BELOW = int(os.getenv("PEXELS_THROTTLE_BELOW", "50"))
+# Longest we are willing to sleep for quota before giving up on a request
+PEXELS_MAX_WAIT = int(os.getenv("PEXELS_MAX_WAIT", "120"))
+
+
+class PexelsAPIError(Exception):
+    def __init__(self, status_code, message=None):
+        super().__init__(message or f"API Error: {status_code}")
+        self.status_code = status_code
+
+
+class RateLimiter:
+    """Paces requests from the most recent X-Ratelimit-Remaining/Reset headers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.remaining = None
+        self.reset_at = None
+        self.next_allowed = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.time()
+            delay = max(0.0, self.next_allowed - now)
+            if self.remaining is not None and self.reset_at and self.reset_at > now:
+                if self.remaining <= 0:
+                    delay = max(delay, self.reset_at - now)
+                elif self.remaining < PEXELS_THROTTLE_BELOW:
+                    # Spread what's left evenly over the rest of the window
+                    delay = max(delay, (self.reset_at - now) / self.remaining)
+            if delay > PEXELS_MAX_WAIT:
+                raise PexelsAPIError(429, f"Pexels quota exhausted; resets in {delay:.0f}s")
+            self.next_allowed = now + delay
+            if self.remaining is not None:
+                self.remaining -= 1  # Reserve our slot until headers update it
+        if delay > 0:
+            print(f"  [Pexels] Throttling {delay:.1f}s (remaining quota: {self.remaining})")
+            time.sleep(delay)
+
+    def update(self, response):
+        remaining = response.headers.get("X-Ratelimit-Remaining")
+        reset = response.headers.get("X-Ratelimit-Reset")
+        with self._lock:
+            if remaining is not None and remaining.isdigit():
+                self.remaining = int(remaining)
+            if reset is not None and reset.isdigit():
+                self.reset_at = int(reset)
+            if response.status_code == 429:
+                retry_after = response.headers.get("Retry-After")
+                if retry_after and retry_after.isdigit():
+                    self.next_allowed = time.time() + int(retry_after)
+                else:
+                    self.remaining = 0
+
+
+rate_limiter = RateLimiter()
+
+
+def normalize_query(query):
+    return " ".join(query.lower().split())
+
+
+def cache_key(query, params):
+    payload = json.dumps({"query": normalize_query(query), "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _read_cache(key):
+    path = os.path.join(CACHE_DIR, key + ".json")
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except Exception:
+        return None
+    if time.time() - entry.get("fetched_at", 0) > PEXELS_CACHE_TTL:
+        return None
+    return entry["response"]
+
+
+def _write_cache(key, query, params, data):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, key + ".json")
+    tmp_path = file_lock.unique_tmp_path(path)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"fetched_at": time.time(), "query": normalize_query(query),
+                   "params": params, "response": data}, f)
+    os.replace(tmp_path, path)
+
+
+def search_videos(query, use_cache=True, **params):
+    """
+    GET /videos/search for `query` with extra params (per_page, orientation,
+    size, min_duration, ...). Returns the decoded JSON response.
+    Raises PexelsAPIError on a non-200 response.
+    """
+    params = {k: v for k, v in params.items() if v is not None}
+    key = cache_key(query, params)
+    if use_cache:
+        cached = _read_cache(key)
+        if cached is not None:
+            print(f"  [Pexels] Cache hit: '{query}'")
+            return cached
+
+    # Read at call time: callers load .env after importing this module
+    api_base = os.getenv("PEXELS_API_BASE", DEFAULT_API_BASE)
+    rate_limiter.wait()
+    res = get_session().get(
+        f"{api_base}/videos/search",
+        headers={"Authorization": os.getenv("PEXELS_API_KEY", "")},
+        params={"query": query, **params},
+        timeout=30,
+    )
+    rate_limiter.update(res)
+    if res.status_code != 200:
+        raise PexelsAPIError(res.status_code)
+
+    data = res.json()
+    try:
+        _write_cache(key, query, params, data)
+    except OSError as e:
+        print(f"  [Pexels] Could not write search cache: {e}")
+    return data
@@ -2,6 +2,8 @@ import os
 import subprocess
 import sys
 
+from transcribe import PCM_SIDECAR_SUFFIX, sidecar_path_for
+
 BASE_INPUT_DIR = "素材"
 
 def run_command(cmd, shell=True):
@@ -13,6 +15,24 @@ def run_command(cmd, shell=True):
     except subprocess.CalledProcessError as e:
         print(f"Error: {e}")
 
+def find_voice_file(project_path):
+    """Return 音声.* (mp3 or a raw bestaudio download), or a lone PCM sidecar."""
+    names = sorted(n for n in os.listdir(project_path) if n.startswith("音声.") and ".tmp" not in n)
+    originals = [n for n in names if not n.endswith((PCM_SIDECAR_SUFFIX, ".part", ".ytdl"))]
+    sidecars = [n for n in names if n.endswith(PCM_SIDECAR_SUFFIX)]
+    if originals:
+        return os.path.join(project_path, originals[0])
+    if sidecars:
+        return os.path.join(project_path, sidecars[0])
+    return None
+
+def remove_audio(voice_file):
+    """Delete the voice file and its PCM sidecar (if any)."""
+    sidecar = sidecar_path_for(voice_file)
+    for path in {voice_file, sidecar}:
+        if os.path.exists(path):
+            os.remove(path)
+
 def main():
     print("=== Processing Existing Audio Files ===")
     
@@ -26,12 +46,13 @@ def main():
     count = 0
     for project_name in subdirs:
         project_path = os.path.join(BASE_INPUT_DIR, project_name)
-        voice_file = os.path.join(project_path, "音声.mp3")
+        # transcribe.py picks up 音声.16k.wav next to the voice file automatically
+        voice_file = find_voice_file(project_path)
         
         output_json = os.path.join(project_path, "字幕.json")
         output_txt = os.path.join(project_path, "字幕.txt")
         
-        if os.path.exists(voice_file):
+        if voice_file:
             if not os.path.exists(output_txt):
                 print(f"\n[{count+1}/{len(subdirs)}] Transcribing: {project_name}")
                 
@@ -42,12 +63,11 @@ def main():
                 # Verify and delete
                 if os.path.exists(output_txt):
                     print(f"  [Cleanup] Deleting audio file: {voice_file}")
-                    os.remove(voice_file)
+                    remove_audio(voice_file)
             else:
                  # Clean up leftover audio if text exists
-                 if os.path.exists(voice_file):
-                     print(f"  [Cleanup] Deleting leftover audio: {project_name}")
-                     os.remove(voice_file)
+                 print(f"  [Cleanup] Deleting leftover audio: {project_name}")
+                 remove_audio(voice_file)
         
         count += 1
 
@@ -4,6 +4,9 @@
 TITLE_AUDIO=$1
 BODY_AUDIO=$2
 OUTPUT_NAME=${3:-"output_video.mp4"}
+# Isolated workspace public/jobs/<JOB_ID>/ so several productions can run at once
+JOB_ID=${JOB_ID:-$(date +%Y%m%d_%H%M%S)_$$}
+JOB_DIR="public/jobs/$JOB_ID"
 
 if [ -z "$TITLE_AUDIO" ] || [ -z "$BODY_AUDIO" ]; then
   echo "Usage: ./produce_video.sh <title.mp3> <body.mp3> [output_filename.mp4]"
@@ -14,12 +17,13 @@ echo "=========================================="
 echo "🎬 Starting Video Production..."
 echo "Title: $TITLE_AUDIO"
 echo "Body:  $BODY_AUDIO"
+echo "Job:   $JOB_ID"
 echo "=========================================="
 
 # 1. Generate Manifest & Assets
 echo "🤖 Generating assets (Transcription, Search)..."
 source venv/bin/activate
-python generate_dragon_video.py "$TITLE_AUDIO" "$BODY_AUDIO"
+python generate_dragon_video.py "$TITLE_AUDIO" "$BODY_AUDIO" --job "$JOB_ID"
 
 if [ $? -ne 0 ]; then
   echo "❌ Error in python generation script."
@@ -29,16 +33,19 @@ fi
 echo "=========================================="
 echo "📝 Subtitle Review Check"
 echo "You can now edit the subtitle files if needed:"
-echo "  - src/title_subtitles.json"
-echo "  - src/body_subtitles.json"
+echo "  - $JOB_DIR/title_subtitles.json"
+echo "  - $JOB_DIR/body_subtitles.json"
 echo ""
 echo "Press [Enter] to continue to rendering, or [Ctrl+C] to abort."
 read -p "Waiting for your input..."
 echo "=========================================="
 
 # 2. Render Video
-echo "🎞️ Rendering video with Remotion..."
-npx remotion render src/index.ts DragonStock "out/$OUTPUT_NAME"
+echo "🎞️ Rendering video with Remotion (cached bundle)..."
+# Pick up any subtitle edits, then pass the job's manifest/subtitles as input props
+PROPS_FILE=$(python workspace.py props "$JOB_ID")
+# RENDER_SHARDS=N renders N frame ranges in parallel and joins them losslessly
+python render_shards.py DragonStock "out/$OUTPUT_NAME" --props "$PROPS_FILE" --shards "${RENDER_SHARDS:-1}"
 
 echo "=========================================="
 echo "✅ Done! Video saved to out/$OUTPUT_NAME"
@@ -0,0 +1,114 @@
+"""
+Text-only local ranker for stock candidates.
+
+Scores each Pexels candidate with BM25 against the scene's visual queries,
+using the candidate's tags, its URL slug ("woman-smiling-at-sunset"), the
+query that found it and any queries recorded for it in the stock library
+catalog. When the top candidate wins by at least RANKER_MARGIN (relative to
+its score) the vision call is skipped. Every decision is appended to
+.cache/ranker_calibration.jsonl so the margin can be tuned against what the
+vision model picked when it was consulted.
+"""
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+RANKER_MARGIN = float(os.getenv("RANKER_MARGIN", "0.25"))
+CALIBRATION_LOG = ".cache/ranker_calibration.jsonl"
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_STOPWORDS = {"a", "an", "the", "of", "in", "on", "at", "with", "and", "to", "for", "by",
+              "from", "video", "videos", "free", "stock", "footage", "www", "pexels", "com", "https"}
+_log_lock = threading.Lock()
+
+
+def tokenize(text):
+    return [t for t in re.findall(r"[a-z]+", text.lower()) if t not in _STOPWORDS and len(t) > 1]
+
+
+def url_slug(url):
+    """https://www.pexels.com/video/woman-smiling-at-sunset-857195/ -> 'woman smiling at sunset'"""
+    if not url:
+        return ""
+    slug = url.rstrip("/").rsplit("/", 1)[-1]
+    return " ".join(part for part in slug.split("-") if not part.isdigit())
+
+
+def candidate_document(candidate, library=None):
+    parts = [url_slug(candidate.get("url")), candidate.get("query") or ""]
+    parts.extend(t if isinstance(t, str) else t.get("name", "") for t in candidate.get("tags") or [])
+    if library is not None:
+        entry = library.clips.get(str(candidate["id"]))
+        if entry:
+            parts.extend(entry.get("queries", []))
+    return tokenize(" ".join(parts))
+
+
+def rank_candidates(queries, candidates, library=None):
+    """
+    Returns [(score, candidate), ...] best first. IDF is computed over the
+    candidates plus the library catalog, so generic words score low.
+    """
+    docs = [candidate_document(c, library) for c in candidates]
+    corpus = list(docs)
+    if library is not None:
+        corpus.extend(tokenize(" ".join(e.get("queries", []))) for e in library.clips.values())
+
+    n_docs = len(corpus)
+    avg_len = sum(len(d) for d in corpus) / n_docs if n_docs else 0
+    doc_freq = Counter(t for d in corpus for t in set(d))
+    query_terms = Counter(t for q in queries for t in tokenize(q))
+
+    ranked = []
+    for candidate, doc in zip(candidates, docs):
+        tf = Counter(doc)
+        score = 0.0
+        for term, q_count in query_terms.items():
+            if term not in tf:
+                continue
+            idf = math.log(1 + (n_docs - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            norm = tf[term] * (BM25_K1 + 1) / (tf[term] + BM25_K1 * (1 - BM25_B + BM25_B * len(doc) / (avg_len or 1)))
+            score += q_count * idf * norm
+        ranked.append((score, candidate))
+    ranked.sort(key=lambda pair: pair[0], reverse=True)
+    return ranked
+
+
+def relative_margin(ranked):
+    """(top1 - top2) / top1; 1.0 for a single candidate, 0.0 if nothing matched."""
+    if not ranked or ranked[0][0] <= 0:
+        return 0.0
+    if len(ranked) == 1:
+        return 1.0
+    return (ranked[0][0] - ranked[1][0]) / ranked[0][0]
+
+
+def is_confident(ranked, margin=None):
+    return relative_margin(ranked) >= (RANKER_MARGIN if margin is None else margin)
+
+
+def log_calibration(scene_text, queries, ranked, vision_pick=None):
+    """Append one decision; vision_pick is the id vision chose when it was consulted."""
+    record = {
+        "time": time.time(),
+        "scene": scene_text[:60],
+        "queries": queries,
+        "scores": [[c["id"], round(score, 4)] for score, c in ranked],
+        "margin": round(relative_margin(ranked), 4),
+        "threshold": RANKER_MARGIN,
+        "confident": is_confident(ranked),
+        "ranker_pick": ranked[0][1]["id"] if ranked else None,
+        "vision_pick": vision_pick,
+    }
+    if vision_pick is not None and ranked:
+        record["agreed"] = str(vision_pick) == str(ranked[0][1]["id"])
+    with _log_lock:
+        os.makedirs(os.path.dirname(CALIBRATION_LOG), exist_ok=True)
+        with open(CALIBRATION_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
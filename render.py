@@ -0,0 +1,183 @@
+"""
+Render driver with a reusable Remotion bundle.
+
+`npx remotion render src/index.ts ...` re-bundles the project (webpack plus
+a copy of public/) on every video. Here the bundle is built once per source
+state and reused:
+- the bundle lives in .cache/remotion_bundles/<hash>/, where the hash covers
+  src/ (minus per-video data: manifests, subtitles, props), remotion.config.ts,
+  package.json, package-lock.json and tsconfig.json;
+- per-video data (manifest, subtitles, duration, asset paths) goes in as
+  input props; the compositions derive their length from them with
+  calculateMetadata;
+- the bundle is built with an empty public dir, and before each render the
+  files the props reference (plus the compositions' fixed defaults) are
+  symlinked into <bundle>/public/, so stock footage is never copied;
+- without --props, the props are built from the shared layout's current
+  manifest and subtitles (Workspace.shared()), never from the copies the
+  bundle imported as defaults when it was built.
+
+Usage:
+    python render.py DragonStock out/video.mp4 --props public/jobs/<job>/props.json
+    python render.py Prototype 完成品/x.mp4 --props props.json --rebundle
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import uuid
+
+from workspace import Workspace
+
+ENTRY_POINT = "src/index.ts"
+BUNDLE_DIR = ".cache/remotion_bundles"
+EMPTY_PUBLIC_DIR = ".cache/remotion_empty_public"
+BUNDLES_TO_KEEP = 2
+
+# Files that decide the bundle's contents
+BUNDLE_SOURCES = ["src/**/*", "remotion.config.ts", "package.json", "package-lock.json", "tsconfig.json"]
+# Per-video data under src/ that is passed as props instead (only import defaults)
+BUNDLE_EXCLUDE = {"dragon-manifest.json", "montage-manifest.json", "subtitles.json",
+                  "title_subtitles.json", "body_subtitles.json", "props.json"}
+
+# staticFile() paths the compositions use when a prop is absent
+DEFAULT_ASSETS = ["assets/video.mp4", "assets/juju_voice.mp3", "assets/current_bgm.mp3",
+                  "assets/bgm.mp3", "assets/test_video.mp4"]
+
+
+def _bundle_inputs():
+    files = set()
+    for pattern in BUNDLE_SOURCES:
+        files.update(f for f in glob.glob(pattern, recursive=True) if os.path.isfile(f))
+    return sorted(f for f in files
+                  if os.path.basename(f) not in BUNDLE_EXCLUDE and not f.endswith(".txt"))
+
+
+def source_hash():
+    h = hashlib.sha256()
+    for path in _bundle_inputs():
+        h.update(path.encode("utf-8") + b"\0")
+        with open(path, "rb") as f:
+            h.update(hashlib.sha256(f.read()).digest())
+    return h.hexdigest()[:16]
+
+
+def _prune_bundles(keep):
+    bundles = sorted((d for d in glob.glob(os.path.join(BUNDLE_DIR, "*"))
+                      if os.path.isdir(d) and not d.endswith(".tmp")),
+                     key=os.path.getmtime, reverse=True)
+    for old in bundles[BUNDLES_TO_KEEP:]:
+        if os.path.abspath(old) != os.path.abspath(keep):
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def ensure_bundle(rebundle=False):
+    """Path of a bundle for the current sources, building it only if none is cached."""
+    bundle = os.path.join(BUNDLE_DIR, source_hash())
+    if os.path.exists(os.path.join(bundle, "index.html")) and not rebundle:
+        os.utime(bundle)
+        return bundle
+
+    print(f"Bundling {ENTRY_POINT} -> {bundle} ...")
+    os.makedirs(EMPTY_PUBLIC_DIR, exist_ok=True)
+    tmp_bundle = f"{bundle}.{uuid.uuid4().hex[:8]}.tmp"
+    subprocess.run(["npx", "remotion", "bundle", ENTRY_POINT,
+                    "--out-dir", tmp_bundle, "--public-dir", EMPTY_PUBLIC_DIR], check=True)
+    if os.path.exists(bundle):
+        shutil.rmtree(bundle, ignore_errors=True)
+    try:
+        os.replace(tmp_bundle, bundle)
+    except OSError:
+        # Another process finished the same bundle first
+        shutil.rmtree(tmp_bundle, ignore_errors=True)
+    _prune_bundles(bundle)
+    return bundle
+
+
+def referenced_assets(value):
+    """Every string in the props that names an existing file under public/ (as a staticFile path)."""
+    found = set()
+    if isinstance(value, dict):
+        for v in value.values():
+            found |= referenced_assets(v)
+    elif isinstance(value, list):
+        for v in value:
+            found |= referenced_assets(v)
+    elif isinstance(value, str) and len(value) < 512:
+        rel = value.lstrip("/")
+        if rel and not rel.startswith(".") and os.path.isfile(os.path.join("public", rel)):
+            found.add(rel)
+    return found
+
+
+def stage_assets(bundle, props):
+    """Symlink the assets a render needs into the bundle's public dir. Returns their count."""
+    assets = referenced_assets(props) | {a for a in DEFAULT_ASSETS if os.path.isfile(os.path.join("public", a))}
+    for rel in assets:
+        link = os.path.join(bundle, "public", rel)
+        target = os.path.abspath(os.path.join("public", rel))
+        if os.path.islink(link) and os.readlink(link) == target:
+            continue
+        os.makedirs(os.path.dirname(link), exist_ok=True)
+        tmp_link = f"{link}.{uuid.uuid4().hex[:8]}.tmp"
+        os.symlink(target, tmp_link)
+        os.replace(tmp_link, link)
+    return len(assets)
+
+
+def load_props(props_path=None, props=None):
+    merged = {}
+    if props_path:
+        with open(props_path, "r", encoding="utf-8") as f:
+            merged.update(json.load(f))
+    merged.update(props or {})
+    return merged
+
+
+def prepare(props_path=None, props=None, rebundle=False):
+    """Bundle (if needed), stage assets and write the props file. Returns (bundle, props_file)."""
+    if props_path is None:
+        # The bundle's imported defaults may be stale (they are not in the hash)
+        props_path = Workspace.shared().write_props()
+    merged = load_props(props_path, props)
+    bundle = ensure_bundle(rebundle)
+    count = stage_assets(bundle, merged)
+    print(f"Using bundle {bundle} ({count} assets staged)")
+    props_file = props_path
+    if props:
+        props_file = os.path.join(bundle, f"props_{uuid.uuid4().hex[:8]}.json")
+        with open(props_file, "w", encoding="utf-8") as f:
+            json.dump(merged, f, ensure_ascii=False)
+    return bundle, props_file
+
+
+def render(composition, output, props_path=None, props=None, rebundle=False, extra_args=()):
+    """Render `composition` to `output` from the cached bundle. Raises CalledProcessError on failure."""
+    bundle, props_file = prepare(props_path, props, rebundle)
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    subprocess.run(["npx", "remotion", "render", bundle, composition, output,
+                    f"--props={props_file}", *extra_args], check=True)
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a composition from a cached Remotion bundle")
+    parser.add_argument("composition")
+    parser.add_argument("output")
+    parser.add_argument("--props", default=None,
+                        help="Input props JSON file (default: built from src/ and public/manifest.json)")
+    parser.add_argument("--rebundle", action="store_true", help="Ignore the cached bundle")
+    args, extra = parser.parse_known_args()
+    try:
+        render(args.composition, args.output, props_path=args.props, rebundle=args.rebundle, extra_args=extra)
+    except subprocess.CalledProcessError as e:
+        print(f"Render failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Frame-range sharded rendering.
+
+A composition's frame range (derived from the input props the same way its
+calculateMetadata does) is split into N contiguous shards. Each shard is
+rendered muted by its own `npx remotion render --frames=a-b` process from the
+cached bundle (render.py), with the machine's cores divided between them.
+The shards are then joined with ffmpeg's concat demuxer and `-c:v copy`,
+so the video is not re-encoded, and the audio is put back on:
+- the pre-mixed bed (manifest.audio_mix_src / audioMixSrc) if the props
+  name one, copied as is;
+- otherwise the composition's audio, rendered once as WAV alongside the
+  shards and encoded to AAC during the mux.
+
+Throughput (frames/s overall and per shard) is printed and optionally written
+as JSON, for picking the shard count that suits a machine.
+
+RENDER_SHARDS sets the default shard count; 1 renders in a single process
+exactly like render.py.
+
+Usage:
+    python render_shards.py DragonStock out/video.mp4 --props public/jobs/<job>/props.json --shards 4
+    python render_shards.py Prototype 完成品/x.mp4 --props props.json --shards 3 --report out/x.render.json
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import render
+
+RENDER_SHARDS = int(os.getenv("RENDER_SHARDS", "1"))
+# Total Remotion browser tabs across all shards (default: one per core)
+RENDER_CONCURRENCY = int(os.getenv("RENDER_CONCURRENCY", str(os.cpu_count() or 4)))
+FPS = 30
+PROTOTYPE_DEFAULT_FRAMES = 300
+DRAGON_STOCK_MANIFEST = "src/dragon-manifest.json"
+
+
+def dragon_stock_frames(manifest):
+    """Same rule as dragonStockDuration() in src/DragonStockComposition.tsx."""
+    intro = manifest["intro"]["durationInSeconds"] if manifest.get("intro") else 10
+    body = manifest["body"]["durationInSeconds"] if manifest.get("body") else 30
+    return math.ceil((intro + body) * FPS)
+
+
+def default_manifest():
+    """The manifest src/Root.tsx imports when the props have none."""
+    with open(DRAGON_STOCK_MANIFEST, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def props_frames(composition, props):
+    """durationInFrames that the composition's calculateMetadata (src/Root.tsx) derives from `props`."""
+    if composition == "DragonStock":
+        # calculateMetadata: dragonStockDuration(props.manifest ?? manifest, fps)
+        return dragon_stock_frames(props.get("manifest") or default_manifest())
+    if composition == "Prototype":
+        # calculateMetadata: props.durationInFrames ?? 300
+        frames = props.get("durationInFrames")
+        return int(frames) if frames is not None else PROTOTYPE_DEFAULT_FRAMES
+    raise RuntimeError(f"Cannot derive the length of '{composition}' from its props; pass --frames")
+
+
+def shard_ranges(total_frames, shards):
+    """[(first, last), ...] inclusive, as even as possible, no empty shards."""
+    shards = max(1, min(shards, total_frames))
+    base, extra = divmod(total_frames, shards)
+    ranges = []
+    start = 0
+    for k in range(shards):
+        size = base + (1 if k < extra else 0)
+        ranges.append((start, start + size - 1))
+        start += size
+    return ranges
+
+
+def premixed_audio(props):
+    """Local path of a pre-mixed audio bed named by the props, if it exists."""
+    src = (props.get("manifest") or {}).get("audio_mix_src") or props.get("audioMixSrc")
+    if src:
+        path = os.path.join("public", src.lstrip("/"))
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def _timed_run(cmd):
+    t0 = time.perf_counter()
+    subprocess.run(cmd, check=True, capture_output=True)
+    return time.perf_counter() - t0
+
+
+def concat_shards(shard_paths, audio_path, output, copy_audio, work_dir):
+    list_file = os.path.join(work_dir, "shards.txt")
+    with open(list_file, "w", encoding="utf-8") as f:
+        for path in shard_paths:
+            f.write(f"file '{os.path.abspath(path)}'\n")
+    cmd = ["ffmpeg", "-nostdin", "-v", "error", "-y",
+           "-f", "concat", "-safe", "0", "-i", list_file]
+    if audio_path:
+        cmd += ["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0", "-shortest",
+                "-c:a", "copy" if copy_audio else "aac"]
+        if not copy_audio:
+            cmd += ["-b:a", "192k"]
+    cmd += ["-c:v", "copy", "-movflags", "+faststart", output]
+    subprocess.run(cmd, check=True, capture_output=True)
+
+
+def render_sharded(composition, output, props_path=None, props=None, shards=None,
+                   concurrency=None, total_frames=None, keep_shards=False, rebundle=False):
+    """Render in `shards` parallel frame ranges and join them. Returns the throughput report."""
+    shards = shards or RENDER_SHARDS
+    if shards <= 1:
+        t0 = time.perf_counter()
+        render.render(composition, output, props_path=props_path, props=props, rebundle=rebundle)
+        return {"composition": composition, "output": output, "shards": 1,
+                "wall_s": time.perf_counter() - t0}
+
+    if not shutil.which("ffmpeg"):
+        raise RuntimeError("ffmpeg is required to join shards")
+    if composition == "DragonStock" and not render.load_props(props_path, props).get("manifest"):
+        # Pass the manifest explicitly, so the frame count below and the bundle's
+        # calculateMetadata never fall back to different copies of it
+        props = {**(props or {}), "manifest": default_manifest()}
+    bundle, props_file = render.prepare(props_path, props, rebundle)
+    merged = render.load_props(props_file)
+    total_frames = total_frames or props_frames(composition, merged)
+    ranges = shard_ranges(total_frames, shards)
+    per_shard = max(1, (concurrency or RENDER_CONCURRENCY) // len(ranges))
+    audio_src = premixed_audio(merged)
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix="shards_", dir=os.path.dirname(output) or ".")
+    base_cmd = ["npx", "remotion", "render", bundle, composition]
+    jobs = []
+    for k, (first, last) in enumerate(ranges):
+        path = os.path.join(work_dir, f"shard_{k:03d}.mp4")
+        jobs.append((path, base_cmd + [path, f"--props={props_file}", f"--frames={first}-{last}",
+                                       f"--concurrency={per_shard}", "--muted"]))
+    if audio_src is None:
+        audio_path = os.path.join(work_dir, "audio.wav")
+        jobs.append((audio_path, base_cmd + [audio_path, f"--props={props_file}", "--codec=wav"]))
+
+    print(f"Rendering {composition}: {total_frames} frames in {len(ranges)} shards "
+          f"x concurrency {per_shard}{'' if audio_src else ' + audio'}...")
+    t0 = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+            durations = list(executor.map(lambda job: _timed_run(job[1]), jobs))
+        render_s = time.perf_counter() - t0
+
+        concat_shards([path for path, _ in jobs[:len(ranges)]],
+                      audio_src or jobs[-1][0], output, copy_audio=audio_src is not None, work_dir=work_dir)
+        wall_s = time.perf_counter() - t0
+    finally:
+        if not keep_shards:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "composition": composition,
+        "output": output,
+        "frames": total_frames,
+        "shards": len(ranges),
+        "concurrency_per_shard": per_shard,
+        "audio": "premixed" if audio_src else "rendered",
+        "render_s": render_s,
+        "concat_s": wall_s - render_s,
+        "wall_s": wall_s,
+        "fps": total_frames / wall_s,
+        "shard_stats": [
+            {"frames": f"{first}-{last}", "seconds": s, "fps": (last - first + 1) / s}
+            for (first, last), s in zip(ranges, durations)
+        ],
+    }
+    print(f"Rendered {total_frames} frames in {wall_s:.1f}s -> {report['fps']:.1f} frames/s "
+          f"(render {render_s:.1f}s, concat {report['concat_s']:.1f}s)")
+    for k, stat in enumerate(report["shard_stats"]):
+        print(f"  shard {k}: frames {stat['frames']:<12} {stat['seconds']:>7.1f}s {stat['fps']:>7.1f} frames/s")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a composition in parallel frame-range shards")
+    parser.add_argument("composition")
+    parser.add_argument("output")
+    parser.add_argument("--props", default=None,
+                        help="Input props JSON file (default: built from src/ and public/manifest.json)")
+    parser.add_argument("--shards", type=int, default=RENDER_SHARDS)
+    parser.add_argument("--concurrency", type=int, default=RENDER_CONCURRENCY,
+                        help="Total Remotion concurrency, divided between shards")
+    parser.add_argument("--frames", type=int, default=None, help="Total frames (default: derived from the props)")
+    parser.add_argument("--keep-shards", action="store_true")
+    parser.add_argument("--rebundle", action="store_true")
+    parser.add_argument("--report", default=None, help="Write the throughput report JSON here")
+    args = parser.parse_args()
+
+    try:
+        report = render_sharded(args.composition, args.output, props_path=args.props, shards=args.shards,
+                                concurrency=args.concurrency, total_frames=args.frames,
+                                keep_shards=args.keep_shards, rebundle=args.rebundle)
+    except (subprocess.CalledProcessError, RuntimeError) as e:
+        stderr = getattr(e, "stderr", None)
+        print(f"Render failed: {e}")
+        if stderr:
+            print(stderr.decode(errors="ignore")[-2000:] if isinstance(stderr, bytes) else stderr[-2000:])
+        sys.exit(1)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+In-process Replicate prediction client.
+
+Replaces the old subprocess + stdout scraping flow of run_replicate.py:
+- inputs are uploaded to the Files API as streamed multipart bodies (never
+  base64'd into memory) and passed to the model as file references;
+- submit() returns a PredictionJob immediately, so callers can overlap other
+  work and wait() later;
+- wait() polls with adaptive backoff (honouring Retry-After), supports a
+  timeout and cancel(), and returns a structured result dict.
+
+REPLICATE_API_BASE points the client at a local stand-in for testing.
+"""
+import mimetypes
+import os
+import time
+import uuid
+
+from downloads import get_session
+
+DEFAULT_API_BASE = "https://api.replicate.com"
+
+# SadTalker version (cjwbw)
+SADTALKER_VERSION = "a519cc0cfebaaeade068b23899165a11ec76aaa1d2b313d40d214f204ec957a3"
+SADTALKER_PARAMS = {
+    "enhancer": "gfpgan",
+    "preprocess": "full",
+    "still": True,
+}
+
+POLL_INITIAL = 1.0   # seconds
+POLL_MAX = 10.0
+POLL_BACKOFF = 1.5
+TERMINAL_STATUSES = ("succeeded", "failed", "canceled")
+
+
+class ReplicateError(Exception):
+    pass
+
+
+class PredictionTimeout(ReplicateError):
+    pass
+
+
+class _MultipartFile:
+    """
+    File-like multipart/form-data body with a known length, read lazily from
+    disk so requests/http.client stream it instead of building it in memory.
+    """
+
+    def __init__(self, field, path):
+        self.boundary = uuid.uuid4().hex
+        mime = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self._head = (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{os.path.basename(path)}"\r\n'
+            f"Content-Type: {mime}\r\n\r\n"
+        ).encode("utf-8")
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+        self._file = open(path, "rb")
+        self._parts = [self._head, self._file, self._tail]
+        self.len = len(self._head) + os.path.getsize(path) + len(self._tail)
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def read(self, size=-1):
+        out = b""
+        while self._parts and (size < 0 or len(out) < size):
+            part = self._parts[0]
+            want = -1 if size < 0 else size - len(out)
+            if isinstance(part, bytes):
+                chunk = part if want < 0 else part[:want]
+                rest = part[len(chunk):]
+                if rest:
+                    self._parts[0] = rest
+                else:
+                    self._parts.pop(0)
+            else:
+                chunk = part.read(want)
+                if not chunk or want < 0:
+                    self._parts.pop(0)
+            out += chunk
+        return out
+
+    def close(self):
+        self._file.close()
+
+
+class PredictionJob:
+    def __init__(self, client, prediction):
+        self.client = client
+        self.prediction = prediction
+        self.id = prediction["id"]
+        self.started_at = time.time()
+
+    @property
+    def status(self):
+        return self.prediction.get("status")
+
+    def done(self):
+        return self.status in TERMINAL_STATUSES
+
+    def refresh(self):
+        self.prediction = self.client.get_prediction(self.id)
+        return self.prediction
+
+    def cancel(self):
+        if not self.done():
+            print(f"  [Replicate] Canceling {self.id}")
+            self.prediction = self.client.cancel_prediction(self.id)
+        return self.result()
+
+    def wait(self, timeout=None):
+        """Poll until the prediction finishes. Raises PredictionTimeout (after canceling) on timeout."""
+        delay = POLL_INITIAL
+        last_status = None
+        while not self.done():
+            if timeout is not None and time.time() - self.started_at > timeout:
+                self.cancel()
+                raise PredictionTimeout(f"Prediction {self.id} timed out after {timeout}s")
+            time.sleep(delay)
+            try:
+                self.refresh()
+            except ReplicateError as e:
+                print(f"  [Replicate] Poll error: {e}")
+            if self.status != last_status:
+                print(f"  [Replicate] Status: {self.status}")
+                last_status = self.status
+                delay = POLL_INITIAL  # Status changed; check again soon
+            else:
+                delay = min(delay * POLL_BACKOFF, POLL_MAX)
+            if self.client.retry_after:
+                delay = max(delay, self.client.retry_after)
+        return self.result()
+
+    def result(self):
+        output = self.prediction.get("output")
+        output_url = output[-1] if isinstance(output, list) and output else output
+        return {
+            "id": self.id,
+            "status": self.status,
+            "output": output,
+            "output_url": output_url if isinstance(output_url, str) else None,
+            "error": self.prediction.get("error"),
+            "elapsed": time.time() - self.started_at,
+        }
+
+
+class ReplicateClient:
+    def __init__(self, api_key=None, base_url=None):
+        self.api_key = api_key or os.getenv("REPLICATE_API_KEY")
+        self.base_url = (base_url or os.getenv("REPLICATE_API_BASE", DEFAULT_API_BASE)).rstrip("/")
+        self.session = get_session()
+        self.retry_after = None
+
+    def _headers(self, extra=None):
+        headers = {"Authorization": f"Token {self.api_key}"}
+        headers.update(extra or {})
+        return headers
+
+    def _request(self, method, path, expected=(200, 201), **kwargs):
+        res = self.session.request(method, f"{self.base_url}{path}", timeout=60, **kwargs)
+        retry_after = res.headers.get("Retry-After")
+        self.retry_after = float(retry_after) if retry_after and retry_after.replace(".", "", 1).isdigit() else None
+        if res.status_code not in expected:
+            raise ReplicateError(f"{method} {path}: {res.status_code} {res.text[:200]}")
+        return res.json()
+
+    def upload_file(self, path):
+        """Stream a local file to the Files API and return its URL for use as a model input."""
+        body = _MultipartFile("content", path)
+        try:
+            data = self._request("POST", "/v1/files", data=body,
+                                 headers=self._headers({"Content-Type": body.content_type,
+                                                        "Content-Length": str(body.len)}))
+        finally:
+            body.close()
+        return data["urls"]["get"]
+
+    def create_prediction(self, version, model_input):
+        return self._request("POST", "/v1/predictions", headers=self._headers(),
+                             json={"version": version, "input": model_input})
+
+    def get_prediction(self, prediction_id):
+        return self._request("GET", f"/v1/predictions/{prediction_id}", headers=self._headers())
+
+    def cancel_prediction(self, prediction_id):
+        return self._request("POST", f"/v1/predictions/{prediction_id}/cancel", headers=self._headers())
+
+    def submit(self, version, model_input):
+        prediction = self.create_prediction(version, model_input)
+        print(f"  [Replicate] Prediction started: {prediction['id']}")
+        return PredictionJob(self, prediction)
+
+    def submit_lip_sync(self, image_path, audio_path, params=None):
+        """Upload the image/audio and start a SadTalker prediction. Returns a PredictionJob."""
+        model_input = {
+            "source_image": self.upload_file(image_path),
+            "driven_audio": self.upload_file(audio_path),
+            **SADTALKER_PARAMS,
+            **(params or {}),
+        }
+        return self.submit(SADTALKER_VERSION, model_input)
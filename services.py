@@ -0,0 +1,48 @@
+"""
+Endpoints of the external services the pipeline talks to.
+
+Every client reads its base URL from the environment, so the whole pipeline
+can be pointed at local stand-ins (benchmarks/fake_services.py) without
+touching the code paths it exercises:
+
+    OPENAI_BASE_URL     chat completions, vision, image generation
+    PEXELS_API_BASE     video search (download links come from the responses)
+    REPLICATE_API_BASE  file uploads and predictions
+
+Unset means the real service.
+"""
+import os
+
+ENDPOINT_ENV = {
+    "openai": "OPENAI_BASE_URL",
+    "pexels": "PEXELS_API_BASE",
+    "replicate": "REPLICATE_API_BASE",
+}
+KEY_ENV = {
+    "openai": "OPENAI_API_KEY",
+    "pexels": "PEXELS_API_KEY",
+    "replicate": "REPLICATE_API_KEY",
+}
+
+
+def openai_client(api_key):
+    from openai import OpenAI
+    return OpenAI(api_key=api_key, base_url=os.getenv("OPENAI_BASE_URL") or None)
+
+
+def local_env(base_url):
+    """Environment that routes every service to one local server at base_url."""
+    base_url = base_url.rstrip("/")
+    env = {
+        "OPENAI_BASE_URL": f"{base_url}/v1",
+        "PEXELS_API_BASE": base_url,
+        "REPLICATE_API_BASE": base_url,
+    }
+    # The clients skip a service entirely when its key is missing
+    env.update({name: "offline" for name in KEY_ENV.values()})
+    return env
+
+
+def endpoints():
+    """{service: base URL or None (= real service)} as currently configured."""
+    return {service: os.getenv(var) or None for service, var in ENDPOINT_ENV.items()}
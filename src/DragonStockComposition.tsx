@@ -1,14 +1,31 @@
 import { AbsoluteFill, Sequence, Audio, Img, useVideoConfig, staticFile, OffthreadVideo, interpolate, useCurrentFrame, Loop } from "remotion";
-import manifest from "./dragon-manifest.json";
+import defaultManifest from "./dragon-manifest.json";
 // @ts-ignore
-import titleSubtitles from "./title_subtitles.json";
+import defaultTitleSubtitles from "./title_subtitles.json";
 // @ts-ignore
-import bodySubtitles from "./body_subtitles.json";
+import defaultBodySubtitles from "./body_subtitles.json";
 import { Subtitle } from "./Subtitle";
 import { SubtitleBackground } from "./SubtitleBackground";
 
 
-export const DragonStockComposition = () => {
+// Per-job render inputs (workspace.py props.json); default to the shared src/ files
+export type DragonStockProps = {
+  manifest?: any;
+  titleSubtitles?: any[];
+  bodySubtitles?: any[];
+};
+
+export const dragonStockDuration = (manifest: any, fps: number) => {
+  const introDuration = manifest?.intro ? manifest.intro.durationInSeconds : 10;
+  const bodyDuration = manifest?.body ? manifest.body.durationInSeconds : 30;
+  return Math.ceil((introDuration + bodyDuration) * fps);
+};
+
+export const DragonStockComposition: React.FC<DragonStockProps> = ({
+  manifest = defaultManifest,
+  titleSubtitles = defaultTitleSubtitles,
+  bodySubtitles = defaultBodySubtitles,
+}) => {
   const { fps } = useVideoConfig();
 
   const introDuration = manifest.intro.durationInSeconds * fps;
@@ -16,9 +33,14 @@ export const DragonStockComposition = () => {
 
   // Safe access to timeline
   const timeline = (manifest.body as any).timeline;
+  const trackSrc: string | undefined = (manifest.body as any).track_src;
+  // Pre-mixed intro + body (+ BGM) audio bed, if the pipeline produced one
+  const audioMixSrc: string | undefined = (manifest as any).audio_mix_src;
 
   return (
     <AbsoluteFill style={{ backgroundColor: "black" }}>
+      {audioMixSrc && <Audio src={staticFile(audioMixSrc)} />}
+
       {/* INTRO SEQUENCE */}
       <Sequence from={0} durationInFrames={Math.ceil(introDuration)}>
         <AbsoluteFill>
@@ -35,7 +57,7 @@ export const DragonStockComposition = () => {
             />
           )}
         </AbsoluteFill>
-        <Audio src={staticFile(manifest.intro.audio_src)} />
+        {!audioMixSrc && <Audio src={staticFile(manifest.intro.audio_src)} />}
 
         {/* Title Subtitles */}
         {titleSubtitles.map((subtitle: any, index: number) => {
@@ -50,10 +72,16 @@ export const DragonStockComposition = () => {
 
       {/* BODY SEQUENCE */}
       <Sequence from={Math.ceil(introDuration)}>
-        <Audio src={staticFile(manifest.body.audio_src)} />
-
-        {/* Timeline Videos */}
-        {timeline && timeline.length > 0 ? (
+        {!audioMixSrc && <Audio src={staticFile(manifest.body.audio_src)} />}
+
+        {/* Timeline Videos (pre-composited single track if available) */}
+        {trackSrc ? (
+          <OffthreadVideo
+            src={staticFile(trackSrc)}
+            style={{ width: "100%", height: "100%", objectFit: "cover" }}
+            muted
+          />
+        ) : timeline && timeline.length > 0 ? (
           <TimelineVideoSequence timeline={timeline} />
         ) : (
           <AbsoluteFill style={{ backgroundColor: "#222", justifyContent: "center", alignItems: "center" }}>
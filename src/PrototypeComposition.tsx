@@ -1,9 +1,26 @@
 import { AbsoluteFill, Audio, interpolate, Sequence, staticFile, useCurrentFrame, useVideoConfig, Video } from "remotion";
 import React from "react";
-import subtitles from "./subtitles.json";
+import defaultSubtitles from "./subtitles.json";
 import { Subtitle } from "./Subtitle";
 
-export const PrototypeComposition: React.FC = () => {
+// Per-job inputs (automate_video.py props); default to the shared assets
+export type PrototypeProps = {
+  mode?: "vertical" | "horizontal";
+  durationInFrames?: number;
+  videoSrc?: string;
+  voiceSrc?: string;
+  bgmSrc?: string;
+  audioMixSrc?: string;
+  subtitles?: { startFrame: number; endFrame: number; text: string }[];
+};
+
+export const PrototypeComposition: React.FC<PrototypeProps> = ({
+  videoSrc = "assets/video.mp4",
+  voiceSrc = "assets/juju_voice.mp3",
+  bgmSrc = "assets/current_bgm.mp3",
+  audioMixSrc,
+  subtitles = defaultSubtitles,
+}) => {
   const frame = useCurrentFrame();
   const { durationInFrames } = useVideoConfig();
 
@@ -17,7 +34,7 @@ export const PrototypeComposition: React.FC = () => {
       {/* Background Video */}
       <AbsoluteFill style={{ overflow: "hidden" }}>
         <Video
-          src={staticFile("assets/video.mp4")}
+          src={staticFile(videoSrc)}
           style={{
             width: "100%",
             height: "100%",
@@ -27,11 +44,18 @@ export const PrototypeComposition: React.FC = () => {
         />
       </AbsoluteFill>
 
-      {/* Background Music (BGM) - Low Volume */}
-      <Audio src={staticFile("assets/current_bgm.mp3")} volume={0.3} />
+      {audioMixSrc ? (
+        /* Pre-mixed voice + ducked BGM (audio_mix.py) */
+        <Audio src={staticFile(audioMixSrc)} />
+      ) : (
+        <>
+          {/* Background Music (BGM) - Low Volume */}
+          <Audio src={staticFile(bgmSrc)} volume={0.3} />
 
-      {/* Voice Track - Full Volume */}
-      <Audio src={staticFile("assets/juju_voice.mp3")} volume={1.0} />
+          {/* Voice Track - Full Volume */}
+          <Audio src={staticFile(voiceSrc)} volume={1.0} />
+        </>
+      )}
 
       {/* Subtitles Layer - Rendered via Sequence for relative timing */}
       {subtitles.map((subtitle, index) => (
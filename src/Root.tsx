@@ -1,16 +1,14 @@
 import { Composition } from "remotion";
-import { DragonStockComposition } from "./DragonStockComposition";
+import { DragonStockComposition, DragonStockProps, dragonStockDuration } from "./DragonStockComposition";
 import { TestSubtitleComposition } from "./TestSubtitleComposition";
+import { PrototypeComposition, PrototypeProps } from "./PrototypeComposition";
 import manifest from "./dragon-manifest.json";
 import "./index.css";
 
 export const RemotionRoot: React.FC = () => {
   const fps = 30;
   // Calculate total frames safely
-  const introDuration = manifest.intro ? manifest.intro.durationInSeconds : 10;
-  const bodyDuration = manifest.body ? manifest.body.durationInSeconds : 30;
-
-  const durationInFrames = Math.ceil((introDuration + bodyDuration) * fps);
+  const durationInFrames = dragonStockDuration(manifest, fps);
 
   return (
     <>
@@ -21,6 +19,25 @@ export const RemotionRoot: React.FC = () => {
         fps={fps}
         width={1920}
         height={1080}
+        defaultProps={{} as DragonStockProps}
+        // A job's manifest passed as input props decides the length
+        calculateMetadata={({ props }) => ({
+          durationInFrames: dragonStockDuration(props.manifest ?? manifest, fps),
+        })}
+      />
+      <Composition
+        id="Prototype"
+        component={PrototypeComposition}
+        durationInFrames={300}
+        fps={fps}
+        width={1080}
+        height={1920}
+        defaultProps={{} as PrototypeProps}
+        // automate_video.py passes the voice length as durationInFrames
+        calculateMetadata={({ props }) => ({
+          durationInFrames: props.durationInFrames ?? 300,
+          ...(props.mode === "horizontal" ? { width: 1920, height: 1080 } : {}),
+        })}
       />
       <Composition
         id="TestSubtitle"
@@ -0,0 +1,226 @@
+"""
+Size-bounded LRU cache manager for public/assets/stock.
+
+Everything under the stock dir (library clips, legacy scene_* downloads and
+the render/ intermediates) counts against STOCK_CACHE_MAX_BYTES. When the
+total is over budget, the least recently used files are deleted first:
+library clips by the catalog's last_used, render intermediates by the
+last_used of the clip they were made from, anything else by mtime.
+
+Pinned files are never evicted:
+- every asset referenced by src/dragon-manifest.json, public/manifest.json or
+  a job workspace's public/jobs/<job>/manifest.json;
+- assets pinned by a job that is still running (pin_job()/add_pins()/unpin_job(),
+  recorded in .cache/stock_pins/<job>.json with the owner's pid; pins of
+  dead processes are dropped).
+
+Usage:
+    python stock_cache.py                 # enforce the budget and print the report
+    python stock_cache.py --dry-run       # show what would be evicted
+    python stock_cache.py --max-bytes 2000000000
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import time
+
+import file_lock
+from stock_library import StockLibrary
+
+STOCK_CACHE_MAX_BYTES = int(os.getenv("STOCK_CACHE_MAX_BYTES", str(5 * 1024 ** 3)))  # 5 GiB
+PIN_MANIFESTS = ["src/dragon-manifest.json", "public/manifest.json", "public/jobs/*/manifest.json"]
+PIN_DIR = ".cache/stock_pins"
+
+# render/<clip id>_<params digest>.mp4 (see transcode.render_clip_path)
+_RENDER_NAME = re.compile(r"^(.+)_[0-9a-f]{10}\.mp4$")
+
+
+def public_to_local(public_path):
+    return os.path.normpath(os.path.join("public", public_path.lstrip("/")))
+
+
+def manifest_assets(manifest):
+    """Local paths of every asset a manifest references."""
+    paths = set()
+    intro = manifest.get("intro") or {}
+    body = manifest.get("body") or {}
+    for src in (intro.get("visual_src"), intro.get("audio_src"), body.get("audio_src"), body.get("track_src")):
+        if src:
+            paths.add(public_to_local(src))
+    for scene in body.get("timeline", []):
+        if scene.get("video_src"):
+            paths.add(public_to_local(scene["video_src"]))
+    return paths
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _pin_file(job_id):
+    return os.path.join(PIN_DIR, f"{job_id}.json")
+
+
+def pin_job(job_id, public_paths):
+    """Protect a running job's assets until unpin_job(); calling again replaces the set."""
+    path = _pin_file(job_id)
+    with file_lock.locked(path):
+        file_lock.write_json(path, {"pid": os.getpid(), "created": time.time(),
+                                    "paths": sorted(p for p in public_paths if p)})
+
+
+def add_pins(job_id, public_paths):
+    """Add assets to a running job's pins (e.g. each clip as soon as it is found or downloaded)."""
+    path = _pin_file(job_id)
+    with file_lock.locked(path):
+        pin = file_lock.read_json(path, {})
+        if pin.get("pid") != os.getpid():
+            pin = {"pid": os.getpid(), "created": time.time(), "paths": []}
+        pin["paths"] = sorted(set(pin["paths"]) | {p for p in public_paths if p})
+        file_lock.write_json(path, pin)
+
+
+def unpin_job(job_id):
+    try:
+        os.remove(_pin_file(job_id))
+    except FileNotFoundError:
+        pass
+
+
+def pinned_paths():
+    """Normalized local paths that must not be evicted."""
+    pinned = set()
+    for manifest_file in [f for pattern in PIN_MANIFESTS for f in glob.glob(pattern)]:
+        if os.path.exists(manifest_file):
+            try:
+                with open(manifest_file, "r", encoding="utf-8") as f:
+                    pinned |= manifest_assets(json.load(f))
+            except Exception as e:
+                print(f"  [Stock cache] Could not read {manifest_file}: {e}")
+    if os.path.isdir(PIN_DIR):
+        for name in os.listdir(PIN_DIR):
+            if not name.endswith(".json"):
+                continue
+            pin_file = os.path.join(PIN_DIR, name)
+            try:
+                with open(pin_file, "r", encoding="utf-8") as f:
+                    pin = json.load(f)
+            except Exception:
+                continue
+            pid = pin.get("pid")
+            # A pin without a valid owner pid can never be released, so it counts as stale
+            if not isinstance(pid, int) or pid <= 0 or not _pid_alive(pid):
+                try:
+                    os.remove(pin_file)  # Stale pin from a job that died
+                except FileNotFoundError:
+                    pass  # Another job evicting at the same time removed it first
+                continue
+            pinned |= {public_to_local(p) for p in pin.get("paths", [])}
+    return pinned
+
+
+def scan(library):
+    """[{path, size, last_used, clip_id}] for every cached file under the stock dir."""
+    by_file = {e["file"]: e for e in library.clips.values()}
+    last_used_by_stem = {os.path.splitext(f)[0]: e.get("last_used") or 0 for f, e in by_file.items()}
+    entries = []
+    for root, _dirs, files in os.walk(library.stock_dir):
+        for name in files:
+            path = os.path.normpath(os.path.join(root, name))
+            if path == os.path.normpath(library.catalog_file) or name.endswith((".tmp", ".part")):
+                continue  # In-progress writes/downloads belong to a running job
+            st = os.stat(path)
+            stem = os.path.splitext(name)[0]
+            match = _RENDER_NAME.match(name) if os.path.basename(root) == "render" else None
+            if match:
+                stem = match.group(1)
+            last_used = max(st.st_mtime, last_used_by_stem.get(stem, 0))
+            entry = by_file.get(name) if not match else None
+            entries.append({"path": path, "size": st.st_size, "last_used": last_used,
+                            "clip_id": entry["id"] if entry else None})
+    return entries
+
+
+def enforce_budget(max_bytes=None, dry_run=False, library=None):
+    """Evict least recently used unpinned files until the stock dir fits. Returns the report dict."""
+    max_bytes = STOCK_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    library = library or StockLibrary()
+    pinned = pinned_paths()
+    entries = scan(library)
+
+    total_before = sum(e["size"] for e in entries)
+    total = total_before
+    evicted = []
+    for e in sorted(entries, key=lambda e: e["last_used"]):
+        if total <= max_bytes:
+            break
+        if e["path"] in pinned:
+            continue
+        if not dry_run:
+            try:
+                os.remove(e["path"])
+            except OSError as err:
+                print(f"  [Stock cache] Could not remove {e['path']}: {err}")
+                continue
+            if e["clip_id"] is not None:
+                library.remove_clip(e["clip_id"])
+        evicted.append(e)
+        total -= e["size"]
+
+    reclaimed = sum(e["size"] for e in evicted)
+    if evicted and not dry_run:
+        library.stats["evicted_files"] += len(evicted)
+        library.stats["evicted_bytes"] += reclaimed
+        library.save()
+
+    pinned_entries = [e for e in entries if e["path"] in pinned]
+    return {
+        "max_bytes": max_bytes,
+        "total_before": total_before,
+        "total_after": total,
+        "reclaimed_bytes": reclaimed,
+        "evicted": [e["path"] for e in evicted],
+        "files": len(entries),
+        "pinned_files": len(pinned_entries),
+        "pinned_bytes": sum(e["size"] for e in pinned_entries),
+        "over_budget": total > max_bytes,
+        "dry_run": dry_run,
+        "stats": dict(library.stats),
+    }
+
+
+def print_report(report):
+    mb = 1024 ** 2
+    stats = report["stats"]
+    lookups = stats["hits"] + stats["misses"]
+    hit_rate = f"{stats['hits'] / lookups:.0%}" if lookups else "-"
+    verb = "Would evict" if report["dry_run"] else "Evicted"
+    print("=== Stock cache ===")
+    print(f"  Size:      {report['total_before'] / mb:.1f} MB -> {report['total_after'] / mb:.1f} MB "
+          f"(budget {report['max_bytes'] / mb:.0f} MB, {report['files']} files)")
+    print(f"  Pinned:    {report['pinned_files']} files, {report['pinned_bytes'] / mb:.1f} MB")
+    print(f"  {verb}: {len(report['evicted'])} files, {report['reclaimed_bytes'] / mb:.1f} MB")
+    if report["over_budget"]:
+        print("  Still over budget: the rest is pinned.")
+    print(f"  Library hit rate: {hit_rate} ({stats['hits']} hits / {lookups} lookups)")
+    print(f"  Reclaimed so far: {stats['evicted_files']} files, {stats['evicted_bytes'] / mb:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evict least recently used stock footage down to a byte budget")
+    parser.add_argument("--max-bytes", type=int, default=None, help=f"Budget (default {STOCK_CACHE_MAX_BYTES})")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be evicted")
+    args = parser.parse_args()
+    print_report(enforce_budget(args.max_bytes, dry_run=args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
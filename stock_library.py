@@ -0,0 +1,171 @@
+"""
+Local stock-footage library.
+
+Every clip downloaded from Pexels is stored once as
+public/assets/stock/pexels_<id>.mp4 and recorded in
+public/assets/stock/catalog.json with its Pexels id, duration, resolution,
+thumbnail and the search queries that found it. Scenes first look here for a
+good-enough match and only go to Pexels on a miss.
+
+Several jobs may share the catalog at once: save() re-reads it under an
+inter-process lock and merges this process's additions, removals and counter
+increments into whatever the others saved in the meantime.
+"""
+import os
+import re
+import threading
+import time
+
+import file_lock
+
+STOCK_DIR = "public/assets/stock"
+CATALOG_FILE = os.path.join(STOCK_DIR, "catalog.json")
+
+# Minimum query similarity (0-1) for a library clip to be reused
+LIBRARY_MATCH_THRESHOLD = float(os.getenv("LIBRARY_MATCH_THRESHOLD", "0.6"))
+
+_STOPWORDS = {"a", "an", "the", "of", "in", "on", "at", "with", "and", "to", "for", "by", "from"}
+
+
+def clip_filename(pexels_id):
+    return f"pexels_{pexels_id}.mp4"
+
+
+def normalize_query(query):
+    return " ".join(re.findall(r"\w+", query.lower()))
+
+
+def query_tokens(query):
+    return {t for t in normalize_query(query).split() if t not in _STOPWORDS}
+
+
+def query_similarity(a, b):
+    """Jaccard similarity of the content words of two queries."""
+    ta, tb = query_tokens(a), query_tokens(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+class StockLibrary:
+    def __init__(self, catalog_file=CATALOG_FILE, stock_dir=STOCK_DIR):
+        self.catalog_file = catalog_file
+        self.stock_dir = stock_dir
+        self._lock = threading.Lock()
+        catalog = self._load()
+        self.clips = catalog.get("clips", {})
+        # Cumulative lookup / eviction counters (see stock_cache.py)
+        self.stats = self._with_default_stats(catalog.get("stats", {}))
+        # What this process changed since the last load/save, for merging on save()
+        self._changed = set()
+        self._removed = set()
+        self._saved_stats = dict(self.stats)
+
+    @staticmethod
+    def _with_default_stats(stats):
+        return {"hits": 0, "misses": 0, "evicted_files": 0, "evicted_bytes": 0, **stats}
+
+    def _load(self):
+        return file_lock.read_json(self.catalog_file, {})
+
+    def _merge(self, on_disk):
+        """Catalog on disk plus this process's changes."""
+        clips = {k: v for k, v in on_disk.get("clips", {}).items() if k not in self._removed}
+        for key in self._changed - self._removed:
+            entry = self.clips[key]
+            other = clips.get(key)
+            if other is not None:
+                entry = {**other, **entry,
+                         "queries": other["queries"] + [q for q in entry["queries"] if q not in other["queries"]],
+                         "last_used": max(other.get("last_used") or 0, entry.get("last_used") or 0)}
+            clips[key] = entry
+        stats = self._with_default_stats(on_disk.get("stats", {}))
+        for name, value in self.stats.items():
+            stats[name] = stats.get(name, 0) + value - self._saved_stats.get(name, 0)
+        return clips, stats
+
+    def save(self):
+        with self._lock, file_lock.locked(self.catalog_file):
+            self.clips, self.stats = self._merge(self._load())
+            file_lock.write_json(self.catalog_file, {"clips": self.clips, "stats": self.stats},
+                                 ensure_ascii=False, indent=2)
+            self._changed.clear()
+            self._removed.clear()
+            self._saved_stats = dict(self.stats)
+
+    def record_lookups(self, hits, misses):
+        with self._lock:
+            self.stats["hits"] += hits
+            self.stats["misses"] += misses
+
+    def remove_clip(self, pexels_id):
+        with self._lock:
+            self._removed.add(str(pexels_id))
+            return self.clips.pop(str(pexels_id), None)
+
+    def local_path(self, entry):
+        return os.path.join(self.stock_dir, entry["file"])
+
+    def public_path(self, entry):
+        return f"/assets/stock/{entry['file']}"
+
+    def add_clip(self, pexels_id, duration, width=None, height=None, query=None, thumbnail=None):
+        """Record a downloaded clip (or a new query that found a known clip)."""
+        key = str(pexels_id)
+        now = time.time()
+        with self._lock:
+            entry = self.clips.get(key)
+            if entry is None:
+                entry = {
+                    "id": pexels_id,
+                    "file": clip_filename(pexels_id),
+                    "duration": duration,
+                    "width": width,
+                    "height": height,
+                    "thumbnail": thumbnail,
+                    "queries": [],
+                    "added_at": now,
+                    "last_used": now,
+                }
+                self.clips[key] = entry
+                self._removed.discard(key)
+            self._changed.add(key)
+            if query and normalize_query(query) not in entry["queries"]:
+                entry["queries"].append(normalize_query(query))
+            entry["last_used"] = now
+            return entry
+
+    def mark_used(self, pexels_id):
+        with self._lock:
+            entry = self.clips.get(str(pexels_id))
+            if entry:
+                entry["last_used"] = time.time()
+                self._changed.add(str(pexels_id))
+
+    def find_match(self, queries, min_duration=0, exclude_ids=()):
+        """
+        Best library clip for any of `queries` that is long enough and still on
+        disk, or None if nothing scores above LIBRARY_MATCH_THRESHOLD.
+        Earlier queries win ties (they are the scene's primary queries).
+        """
+        exclude = {str(i) for i in exclude_ids}
+        best, best_score = None, 0.0
+        with self._lock:
+            entries = list(self.clips.items())
+        for key, entry in entries:
+            if key in exclude or (entry.get("duration") or 0) < min_duration:
+                continue
+            for rank, query in enumerate(queries):
+                score = max((query_similarity(query, q) for q in entry["queries"]), default=0.0)
+                score -= rank * 0.01
+                if score > best_score:
+                    best, best_score = entry, score
+        if best is None or best_score < LIBRARY_MATCH_THRESHOLD:
+            return None
+        if not os.path.exists(self.local_path(best)):
+            # Catalogued but deleted from disk; forget it and miss
+            with self._lock:
+                self._removed.add(str(best["id"]))
+                self.clips.pop(str(best["id"]), None)
+            return self.find_match(queries, min_duration, exclude_ids)
+        return best
@@ -0,0 +1,97 @@
+"""
+Minimal dependency-graph task runner.
+
+Tasks are plain functions; a task starts as soon as all of its dependencies
+have finished and receives their results as positional arguments (in the
+order the dependencies were listed). Independent branches run concurrently
+on a thread pool. If a task raises, everything downstream of it is skipped.
+After run(), report() prints per-task wall-clock timings.
+"""
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class TaskGraph:
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self.tasks = {}      # name -> (fn, deps)
+        self.results = {}
+        self.status = {}     # name -> "ok" | "failed" | "skipped"
+        self.errors = {}
+        self.timings = {}    # name -> (start, end) relative to run start
+        self._t0 = None
+
+    def add(self, name, fn, deps=()):
+        for dep in deps:
+            if dep not in self.tasks:
+                raise ValueError(f"Task '{name}' depends on unknown task '{dep}'")
+        self.tasks[name] = (fn, tuple(deps))
+        return name
+
+    def _run_task(self, name):
+        fn, deps = self.tasks[name]
+        start = time.perf_counter() - self._t0
+        try:
+            return fn(*[self.results[d] for d in deps])
+        finally:
+            self.timings[name] = (start, time.perf_counter() - self._t0)
+
+    def run(self):
+        """Run every task; returns {name: result} for tasks that succeeded."""
+        self._t0 = time.perf_counter()
+        pending = set(self.tasks)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                # Skip anything downstream of a failure
+                for name in sorted(pending):
+                    if any(self.status.get(d) in ("failed", "skipped") for d in self.tasks[name][1]):
+                        self.status[name] = "skipped"
+                        pending.discard(name)
+
+                ready = [n for n in sorted(pending) if all(self.status.get(d) == "ok" for d in self.tasks[n][1])]
+                for name in ready:
+                    pending.discard(name)
+                    running[executor.submit(self._run_task, name)] = name
+
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        self.results[name] = future.result()
+                        self.status[name] = "ok"
+                    except Exception as e:
+                        self.status[name] = "failed"
+                        self.errors[name] = e
+                        print(f"[Task] {name} failed: {e}")
+                        traceback.print_exc()
+        return self.results
+
+    def report(self):
+        """Print and return the timing report, in start order."""
+        rows = []
+        for name in self.tasks:
+            start, end = self.timings.get(name, (None, None))
+            rows.append({
+                "task": name,
+                "status": self.status.get(name, "pending"),
+                "start_s": start,
+                "end_s": end,
+                "duration_s": (end - start) if start is not None else None,
+                "deps": list(self.tasks[name][1]),
+            })
+        rows.sort(key=lambda r: (r["start_s"] is None, r["start_s"] or 0))
+
+        total = max((r["end_s"] for r in rows if r["end_s"] is not None), default=0.0)
+        print("\n=== Task timings ===")
+        print(f"{'task':<22}{'status':<9}{'start':>8}{'end':>8}{'dur':>8}")
+        for r in rows:
+            if r["start_s"] is None:
+                print(f"{r['task']:<22}{r['status']:<9}{'-':>8}{'-':>8}{'-':>8}")
+            else:
+                print(f"{r['task']:<22}{r['status']:<9}{r['start_s']:>8.1f}{r['end_s']:>8.1f}{r['duration_s']:>8.1f}")
+        print(f"Total wall time: {total:.1f}s")
+        return {"total_s": total, "tasks": rows}
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+import render_shards
+from render_shards import props_frames, shard_ranges
+
+
+def test_shard_ranges_cover_every_frame_once():
+    for total in (1, 7, 30, 1001):
+        for shards in (1, 2, 3, 4, 8):
+            ranges = shard_ranges(total, shards)
+            frames = [f for first, last in ranges for f in range(first, last + 1)]
+            assert frames == list(range(total))
+
+
+def test_shard_ranges_are_balanced():
+    assert shard_ranges(10, 3) == [(0, 3), (4, 6), (7, 9)]
+    assert shard_ranges(9, 3) == [(0, 2), (3, 5), (6, 8)]
+
+
+def test_shard_ranges_never_empty():
+    assert shard_ranges(3, 8) == [(0, 0), (1, 1), (2, 2)]
+    assert shard_ranges(5, 0) == [(0, 4)]
+
+
+def test_props_frames_prototype():
+    assert props_frames("Prototype", {"durationInFrames": 451}) == 451
+    assert props_frames("Prototype", {}) == 300
+
+
+def test_props_frames_dragon_stock_follows_the_manifest():
+    manifest = {"intro": {"durationInSeconds": 4.5}, "body": {"durationInSeconds": 20.01}}
+    # durationInFrames is not read by DragonStock's calculateMetadata
+    assert props_frames("DragonStock", {"manifest": manifest, "durationInFrames": 10}) == 736
+    assert props_frames("DragonStock", {"manifest": {"body": {"durationInSeconds": 20}}}) == 900
+
+
+def test_props_frames_dragon_stock_defaults_to_imported_manifest(tmp_path, monkeypatch):
+    manifest_file = tmp_path / "dragon-manifest.json"
+    manifest_file.write_text(json.dumps({"intro": {"durationInSeconds": 2}, "body": {"durationInSeconds": 3}}))
+    monkeypatch.setattr(render_shards, "DRAGON_STOCK_MANIFEST", str(manifest_file))
+    assert props_frames("DragonStock", {}) == 150
+
+
+def test_props_frames_unknown_composition():
+    with pytest.raises(RuntimeError):
+        props_frames("TestSubtitle", {})
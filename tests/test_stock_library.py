@@ -0,0 +1,54 @@
+import json
+import multiprocessing
+
+from stock_library import StockLibrary
+
+CLIPS_PER_PROCESS = 40
+
+
+def _add_and_save(catalog_file, stock_dir, first_id, start):
+    start.wait()
+    library = StockLibrary(catalog_file=catalog_file, stock_dir=stock_dir)
+    for pexels_id in range(first_id, first_id + CLIPS_PER_PROCESS):
+        library.add_clip(pexels_id, 10.0, query=f"query {pexels_id}")
+        library.record_lookups(hits=1, misses=0)
+        library.save()
+
+
+def test_concurrent_saves_keep_every_entry(tmp_path):
+    catalog_file = str(tmp_path / "catalog.json")
+    start = multiprocessing.Event()
+    procs = [multiprocessing.Process(target=_add_and_save, args=(catalog_file, str(tmp_path), k * 1000, start))
+             for k in range(2)]
+    for p in procs:
+        p.start()
+    start.set()
+    for p in procs:
+        p.join(timeout=60)
+        assert p.exitcode == 0
+
+    with open(catalog_file, "r", encoding="utf-8") as f:
+        catalog = json.load(f)
+    expected = {str(k * 1000 + n) for k in range(2) for n in range(CLIPS_PER_PROCESS)}
+    assert set(catalog["clips"]) == expected
+    assert catalog["stats"]["hits"] == 2 * CLIPS_PER_PROCESS
+    assert not [p for p in tmp_path.iterdir() if p.name.endswith(".tmp")]
+
+
+def test_save_keeps_removals_and_other_processes_clips(tmp_path):
+    catalog_file = str(tmp_path / "catalog.json")
+    a = StockLibrary(catalog_file=catalog_file, stock_dir=str(tmp_path))
+    a.add_clip(1, 5.0, query="dragon")
+    a.add_clip(2, 5.0, query="castle")
+    a.save()
+
+    b = StockLibrary(catalog_file=catalog_file, stock_dir=str(tmp_path))
+    b.add_clip(3, 5.0, query="forest")
+    b.add_clip(1, 5.0, query="red dragon")
+    b.save()
+
+    a.remove_clip(2)
+    a.save()
+
+    assert set(a.clips) == {"1", "3"}
+    assert a.clips["1"]["queries"] == ["dragon", "red dragon"]
@@ -0,0 +1,81 @@
+"""
+Render-optimized intermediates for stock clips.
+
+Pexels clips arrive with mixed resolutions, frame rates and long GOPs, which
+makes OffthreadVideo seek and decode expensively during render. Each clip is
+trimmed to what its scene needs (plus a loop margin), scaled/cropped to
+1920x1080 at 30 fps and re-encoded with a short, fixed GOP so every seek
+lands near a keyframe. Results are cached in public/assets/stock/render/
+by source id and encoding parameters.
+"""
+import hashlib
+import json
+import math
+import os
+import shutil
+import subprocess
+
+RENDER_DIR = "public/assets/stock/render"
+RENDER_WIDTH = 1920
+RENDER_HEIGHT = 1080
+RENDER_FPS = 30
+GOP_FRAMES = 15            # keyframe every 0.5 s
+CRF = int(os.getenv("TRANSCODE_CRF", "20"))
+PRESET = os.getenv("TRANSCODE_PRESET", "veryfast")
+LOOP_MARGIN_SEC = float(os.getenv("TRANSCODE_LOOP_MARGIN", "1.5"))
+
+
+def ffmpeg_available():
+    return shutil.which("ffmpeg") is not None
+
+
+def render_params(needed_seconds):
+    # Whole seconds so nearby scene lengths share one cached intermediate
+    return {
+        "w": RENDER_WIDTH, "h": RENDER_HEIGHT, "fps": RENDER_FPS,
+        "gop": GOP_FRAMES, "crf": CRF, "preset": PRESET,
+        "t": math.ceil(needed_seconds + LOOP_MARGIN_SEC),
+    }
+
+
+def render_clip_path(clip_id, params):
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:10]
+    return os.path.join(RENDER_DIR, f"{clip_id}_{digest}.mp4")
+
+
+def prepare_render_clip(src_path, clip_id, needed_seconds):
+    """
+    Return the path of a render-ready copy of src_path covering at least
+    needed_seconds (+ loop margin), transcoding it if not cached.
+    Raises subprocess.CalledProcessError if ffmpeg fails.
+    """
+    params = render_params(needed_seconds)
+    out_path = render_clip_path(clip_id, params)
+    if os.path.exists(out_path):
+        return out_path
+
+    os.makedirs(RENDER_DIR, exist_ok=True)
+    tmp_path = out_path + ".tmp.mp4"
+    vf = (f"scale={params['w']}:{params['h']}:force_original_aspect_ratio=increase,"
+          f"crop={params['w']}:{params['h']},fps={params['fps']},setsar=1")
+    cmd = [
+        "ffmpeg", "-nostdin", "-v", "error", "-y",
+        "-i", src_path,
+        "-t", str(params["t"]),
+        "-vf", vf,
+        "-an",
+        "-c:v", "libx264", "-preset", params["preset"], "-crf", str(params["crf"]),
+        "-g", str(params["gop"]), "-keyint_min", str(params["gop"]), "-sc_threshold", "0",
+        "-bf", "0",
+        "-pix_fmt", "yuv420p",
+        "-movflags", "+faststart",
+        tmp_path,
+    ]
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+    except subprocess.CalledProcessError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, out_path)
+    return out_path
@@ -3,8 +3,16 @@ import json
 import os
 import budoux
 import sys
+import argparse
+import bisect
+import hashlib
+import threading
+import wave
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-from openai import OpenAI
+import file_lock
+import services
 
 # Load env
 load_dotenv()
@@ -13,102 +21,165 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 # Configuration (Defaults)
 DEFAULT_AUDIO_FILE = "public/assets/juju_voice.mp3"
 DEFAULT_OUTPUT_FILE = "src/subtitles.json"
+WHISPER_MODEL = "base"
+TRANSCRIBE_BACKEND = os.getenv("TRANSCRIBE_BACKEND", "whisper")  # or "faster-whisper"
+FPS = 30
+MAX_CHARS_PER_LINE = 14
+SAMPLE_RATE = 16000  # Whisper works on 16 kHz mono
+PCM_SIDECAR_SUFFIX = ".16k.wav"
+
+# Streaming mode
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", "1"))
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", "35"))
+
+# Proofreading
+PROOFREAD_MODEL = "gpt-4o"
+PROOFREAD_WINDOW = int(os.getenv("PROOFREAD_WINDOW", "30"))    # lines per request
+PROOFREAD_OVERLAP = int(os.getenv("PROOFREAD_OVERLAP", "3"))   # context lines on each side
+PROOFREAD_WORKERS = int(os.getenv("PROOFREAD_WORKERS", "4"))
+PROOFREAD_CACHE_FILE = ".cache/proofread_cache.json"
+
+PROOFREAD_SYSTEM_PROMPT = (
+    "You are a professional Japanese video subtitle editor. "
+    "Your task is to proofread the following subtitles to ensure they sound like natural, spoken Japanese.\n"
+    "1. Aggressively correct unnatural phrasing, grammar errors, and potential mistranscriptions.\n"
+    "   - Example: 'あー幸せだなと思いやき' -> '『あー幸せ』と呟き' (detect context of 'muttering' or 'thinking')\n"
+    "   - Example: '幸せ突破やき' -> '幸せだったやき' or '幸せと呟き' (fix nonsensical words)\n"
+    "2. Ensure the tone is consistent and appropriate for a narration.\n"
+    "3. Do NOT change the number of lines. The index MUST match exactly.\n"
+    "4. Lines marked \"context\": true are surrounding lines for reference only; do not return them.\n"
+    "5. Return ONLY a JSON object: {\"corrections\": [{\"index\": 0, \"text\": \"corrected text\"}, ...]}\n"
+    "If a line is already natural, return it as is."
+)
+
+
+def proofread_cache_key(subtitles, idx):
+    """Hash of a line plus its neighbours, so a line is re-sent only if it or its context changed."""
+    prev_text = subtitles[idx - 1]["text"] if idx > 0 else ""
+    next_text = subtitles[idx + 1]["text"] if idx + 1 < len(subtitles) else ""
+    payload = "\x1f".join([PROOFREAD_MODEL, prev_text, subtitles[idx]["text"], next_text])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_proofread_cache():
+    return file_lock.read_json(PROOFREAD_CACHE_FILE, {})
+
+
+def save_proofread_cache(cache):
+    """Merge `cache` into the file (other jobs may have added lines since it was loaded)."""
+    with file_lock.locked(PROOFREAD_CACHE_FILE):
+        merged = {**file_lock.read_json(PROOFREAD_CACHE_FILE, {}), **cache}
+        file_lock.write_json(PROOFREAD_CACHE_FILE, merged, ensure_ascii=False)
+
+
+def proofread_window(client, subtitles, core_start, core_end):
+    """
+    Proofread lines [core_start, core_end) with PROOFREAD_OVERLAP lines of
+    context on each side. Returns {index: corrected_text} for core lines only.
+    """
+    ctx_start = max(0, core_start - PROOFREAD_OVERLAP)
+    ctx_end = min(len(subtitles), core_end + PROOFREAD_OVERLAP)
+    lines_for_ai = []
+    for i in range(ctx_start, ctx_end):
+        item = {"index": i, "text": subtitles[i]["text"]}
+        if not (core_start <= i < core_end):
+            item["context"] = True
+        lines_for_ai.append(item)
+
+    response = client.chat.completions.create(
+        model=PROOFREAD_MODEL,
+        messages=[
+            {"role": "system", "content": PROOFREAD_SYSTEM_PROMPT},
+            {"role": "user", "content": json.dumps(lines_for_ai, ensure_ascii=False)}
+        ],
+        response_format={"type": "json_object"}
+    )
+    data = json.loads(response.choices[0].message.content)
+
+    corrections = {}
+    for corr in data.get("corrections", []):
+        try:
+            idx = int(corr.get("index"))  # The model may answer "3" instead of 3
+        except (TypeError, ValueError):
+            continue
+        new_text = corr.get("text")
+        if core_start <= idx < core_end and new_text:
+            corrections[idx] = new_text
+    return corrections
+
 
 def proofread_subtitles(subtitles):
     """
     Use GPT-4o to check for typos and unnatural line breaks in Japanese.
     Expected Input: List of {startFrame, endFrame, text}
+
+    Lines are proofread in overlapping windows that run concurrently, and
+    results are cached per line (keyed by the line and its neighbours) so
+    re-runs only send lines that changed.
     """
     if not OPENAI_API_KEY:
         print("Notice: OPENAI_API_KEY not found. Skipping AI proofreading.")
         return subtitles
+    if not subtitles:
+        return subtitles
     
     print("\n🤖 AI Proofreading in progress (GPT-4o)...")
     
-    client = OpenAI(api_key=OPENAI_API_KEY)
-    
-    # Prepare prompt
-    # We send the array and ask for the same array back with corrected text.
-    # To save tokens, we might just send the text list, but keeping structure is safer for mapping back.
-    
-    start_time = subtitles[0]['startFrame'] if subtitles else 0
-    # Simplified structure for AI to process easier: index, text
-    lines_for_ai = [{"index": i, "text": s["text"]} for i, s in enumerate(subtitles)]
-    
-    system_prompt = (
-        "You are a professional Japanese video subtitle editor. "
-        "Your task is to proofread the following subtitles to ensure they sound like natural, spoken Japanese.\n"
-        "1. Aggressively correct unnatural phrasing, grammar errors, and potential mistranscriptions.\n"
-        "   - Example: 'あー幸せだなと思いやき' -> '『あー幸せ』と呟き' (detect context of 'muttering' or 'thinking')\n"
-        "   - Example: '幸せ突破やき' -> '幸せだったやき' or '幸せと呟き' (fix nonsensical words)\n"
-        "2. Ensure the tone is consistent and appropriate for a narration.\n"
-        "3. Do NOT change the number of lines. The index MUST match exactly.\n"
-        "4. Return ONLY a JSON object: {\"corrections\": [{\"index\": 0, \"text\": \"corrected text\"}, ...]}\n"
-        "If a line is already natural, return it as is."
-    )
-    
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": json.dumps(lines_for_ai, ensure_ascii=False)}
-            ],
-            response_format={"type": "json_object"}
-        )
-        
-        result_content = response.choices[0].message.content
-        data = json.loads(result_content)
-        corrections = data.get("corrections", [])
-        
-        # Apply corrections
-        for corr in corrections:
-            idx = corr.get("index")
-            new_text = corr.get("text")
-            
-            if idx is not None and 0 <= idx < len(subtitles):
-                old_text = subtitles[idx]["text"]
-                if old_text != new_text:
-                    print(f"  [Fix] {old_text} -> {new_text}")
-                    subtitles[idx]["text"] = new_text
-                    
-        print("✅ AI Proofreading complete.\n")
-        return subtitles
+    client = services.openai_client(OPENAI_API_KEY)
+    cache = load_proofread_cache()
 
-    except Exception as e:
-        print(f"⚠️ AI Proofreading failed: {e}")
-        return subtitles
+    # Keys are computed on the original text, before any correction is applied
+    keys = [proofread_cache_key(subtitles, i) for i in range(len(subtitles))]
+    corrected = {i: cache[k] for i, k in enumerate(keys) if k in cache}
+    if corrected:
+        print(f"  {len(corrected)}/{len(subtitles)} lines served from cache.")
 
+    # Only windows that still contain uncached lines are sent
+    windows = []
+    for core_start in range(0, len(subtitles), PROOFREAD_WINDOW):
+        core_end = min(core_start + PROOFREAD_WINDOW, len(subtitles))
+        if any(i not in corrected for i in range(core_start, core_end)):
+            windows.append((core_start, core_end))
 
-def transcribe_audio(audio_file, output_file):
-    print(f"Loading Whisper model... This might take a moment.")
-    model = whisper.load_model("base")
-    
-    print(f"Transcribing {audio_file} with word timestamps...")
-    # Enable word_timestamps
-    result = model.transcribe(audio_file, fp16=False, word_timestamps=True)
+    if windows:
+        with ThreadPoolExecutor(max_workers=PROOFREAD_WORKERS) as executor:
+            futures = {
+                executor.submit(proofread_window, client, subtitles, start, end): (start, end)
+                for start, end in windows
+            }
+            for future in as_completed(futures):
+                start, end = futures[future]
+                try:
+                    corrections = future.result()
+                except Exception as e:
+                    print(f"⚠️ AI Proofreading failed for lines {start}-{end - 1}: {e}")
+                    continue
+                for i in range(start, end):
+                    # Lines missing from a truncated/partial response stay uncached and are retried next run
+                    if i in corrected or i not in corrections:
+                        continue
+                    corrected[i] = corrections[i]
+                    cache[keys[i]] = corrected[i]
 
-    # 1. Collect all words with timestamps
-    all_words = []
-    for segment in result["segments"]:
-        all_words.extend(segment.get("words", []))
+        try:
+            save_proofread_cache(cache)
+        except Exception as e:
+            print(f"  Could not write proofread cache: {e}")
 
-    if not all_words:
-        print("Error: No word timestamps found. Fallback to segments.")
-        # Fallback logic could be added here, but for now we proceed
-    
-    # 2. Get full text and parse with BudouX
-    full_text = "".join([w["word"] for w in all_words]).strip()
-    parser = budoux.load_default_japanese_parser()
-    phrases = parser.parse(full_text)
-    
-    print("Semantic Phrases (BudouX):", phrases)
+    # Apply corrections (merge by index)
+    for idx in sorted(corrected):
+        old_text = subtitles[idx]["text"]
+        new_text = corrected[idx]
+        if old_text != new_text:
+            print(f"  [Fix] {old_text} -> {new_text}")
+            subtitles[idx]["text"] = new_text
+
+    print("✅ AI Proofreading complete.\n")
+    return subtitles
 
-    subtitles = []
-    fps = 30
-    MAX_CHARS_PER_LINE = 14 
 
-    # 3. Group phrases into lines
+def group_phrases_into_lines(phrases, max_chars=14):
+    """Greedily pack BudouX phrases into subtitle lines, breaking after "。"."""
     lines = []
     current_line = ""
     
@@ -117,7 +188,7 @@ def transcribe_audio(audio_file, output_file):
         if phrase.endswith("。"):
              force_break = True
 
-        if len(current_line) + len(phrase) > MAX_CHARS_PER_LINE:
+        if len(current_line) + len(phrase) > max_chars:
             if current_line: lines.append(current_line)
             current_line = phrase
         else:
@@ -128,65 +199,101 @@ def transcribe_audio(audio_file, output_file):
             current_line = ""
     if current_line:
         lines.append(current_line)
+    return lines
 
-    print("Final Lines:", lines)
-    
-    # 4. Map lines back to time
-    w_idx = 0
-    total_words = len(all_words)
+
+def _clean(text):
+    return "".join(text.split())
+
+
+def build_char_index(all_words):
+    """
+    Prefix sums of cleaned (whitespace-free) word lengths:
+    word_ends[k] is the character offset just past word k in the
+    concatenated word stream.
+    """
+    word_ends = []
+    total = 0
+    for w in all_words:
+        total += len(_clean(w["word"]))
+        word_ends.append(total)
+    return word_ends
+
+
+def map_lines_to_subtitles(lines, all_words, fps=30):
+    """
+    Map each line back to the start/end time of the words it was built from.
+    Lines are consecutive slices of the same character stream as the words,
+    so each line's character range is resolved against the prefix-sum index
+    by binary search, independently of earlier lines (no cumulative drift).
+    """
+    subtitles = []
+    if not all_words:
+        return subtitles
+
+    word_ends = build_char_index(all_words)
+    last_word = len(all_words) - 1
+    char_pos = 0
     
     for line in lines:
-        line_start_time = None
-        line_end_time = None
-        
-        constructed_text = ""
-        words_in_line = []
+        line_len = len(_clean(line))
+        if line_len == 0:
+            continue
+        line_start_char = char_pos
+        line_end_char = char_pos + line_len
+        char_pos = line_end_char
+
+        # First word that extends past the line start / reaches the line end
+        first_idx = min(bisect.bisect_right(word_ends, line_start_char), last_word)
+        last_idx = min(bisect.bisect_left(word_ends, line_end_char), last_word)
+        last_idx = max(last_idx, first_idx)
+
+        line_start_time = all_words[first_idx]["start"]
+        line_end_time = all_words[last_idx]["end"]
+
+        start_frame = int(line_start_time * fps)
+        end_frame = int(line_end_time * fps)
         
-        while w_idx < total_words:
-            word_obj = all_words[w_idx]
-            word_txt = word_obj["word"].strip()
-            
-            if not line_start_time:
-                line_start_time = word_obj["start"]
-            
-            words_in_line.append(word_obj)
-            constructed_text += word_txt
-            w_idx += 1
-            
-            clean_constructed = constructed_text.replace(" ", "")
-            clean_line = line.replace(" ", "")
-            
-            if clean_constructed == clean_line:
-                line_end_time = word_obj["end"]
-                break
-            
-            if len(clean_constructed) >= len(clean_line):
-                line_end_time = word_obj["end"]
-                break
+        # Min duration
+        if end_frame - start_frame < 10: end_frame = start_frame + 10
         
-        if line_end_time is None and words_in_line:
-             line_end_time = words_in_line[-1]["end"]
-
-        if line_start_time is not None:
-             start_frame = int(line_start_time * fps)
-             end_frame = int(line_end_time * fps)
-             
-             # Min duration
-             if end_frame - start_frame < 10: end_frame = start_frame + 10
-             
-             subtitles.append({
-                "startFrame": start_frame,
-                "endFrame": end_frame,
-                "text": line
-             })
-             # print(f"[{line_start_time:.2f}s -> {line_end_time:.2f}s] {line}")
-    
-    # --- AI Proofreading Step ---
-    subtitles = proofread_subtitles(subtitles)
-    # ----------------------------
+        subtitles.append({
+           "startFrame": start_frame,
+           "endFrame": end_frame,
+           "text": line
+        })
+        # print(f"[{line_start_time:.2f}s -> {line_end_time:.2f}s] {line}")
+    return subtitles
+
 
+def words_to_subtitles(all_words, parser=None, verbose=True):
+    """BudouX-split the word stream into lines and attach frame timings."""
+    full_text = "".join([w["word"] for w in all_words]).strip()
+    if not full_text:
+        return []
+    parser = parser or budoux.load_default_japanese_parser()
+    phrases = parser.parse(full_text)
+    if verbose:
+        print("Semantic Phrases (BudouX):", phrases)
+
+    lines = group_phrases_into_lines(phrases, MAX_CHARS_PER_LINE)
+    if verbose:
+        print("Final Lines:", lines)
+    return map_lines_to_subtitles(lines, all_words, FPS)
+
+
+def collect_words(result, offset=0.0):
+    """Flatten Whisper segments into a word list, shifting times by `offset` seconds."""
+    all_words = []
+    for segment in result["segments"]:
+        for w in segment.get("words", []):
+            all_words.append({**w, "start": w["start"] + offset, "end": w["end"] + offset})
+    return all_words
+
+
+def save_subtitles(subtitles, output_file):
     # Ensure output directory exists
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
 
     with open(output_file, "w", encoding="utf-8") as f:
         json.dump(subtitles, f, ensure_ascii=False, indent=2)
@@ -200,18 +307,221 @@ def transcribe_audio(audio_file, output_file):
     print(f"\nSuccessfully saved subtitles to {output_file}")
     print(f"Successfully saved plain text to {txt_file}")
 
+
+def sidecar_path_for(audio_file):
+    """`dir/音声.webm` -> `dir/音声.16k.wav` (written once at ingest by monitor_youtube.py)."""
+    if audio_file.endswith(PCM_SIDECAR_SUFFIX):
+        return audio_file
+    return os.path.splitext(audio_file)[0] + PCM_SIDECAR_SUFFIX
+
+
+def read_pcm16k_wav(path):
+    """Read a 16 kHz mono 16-bit WAV straight into Whisper's float32 format, or None if it isn't one."""
+    with wave.open(path, "rb") as wf:
+        if wf.getframerate() != SAMPLE_RATE or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+            return None
+        frames = wf.readframes(wf.getnframes())
+    return np.frombuffer(frames, np.int16).astype(np.float32) / 32768.0
+
+
+def load_audio(audio_file):
+    """
+    Return 16 kHz mono float32 samples. A ready-made PCM sidecar is read
+    directly (no ffmpeg decode/resample); anything else goes through Whisper's
+    ffmpeg loader.
+    """
+    sidecar = sidecar_path_for(audio_file)
+    if os.path.exists(sidecar):
+        try:
+            audio = read_pcm16k_wav(sidecar)
+            if audio is not None:
+                print(f"Using 16 kHz PCM sidecar: {sidecar}")
+                return audio
+        except (wave.Error, EOFError) as e:
+            print(f"  Could not read sidecar {sidecar}: {e}")
+    return whisper.load_audio(audio_file)
+
+
+def load_model(backend=None, model_name=WHISPER_MODEL, threads=None):
+    """
+    Load a transcription model.
+    backend: "whisper" (openai-whisper, default) or "faster-whisper" (CTranslate2, optional).
+    threads: CPU threads for inference (None = library default).
+    """
+    backend = backend or TRANSCRIBE_BACKEND
+    if backend == "faster-whisper":
+        from faster_whisper import WhisperModel
+        return WhisperModel(model_name, device="cpu", compute_type="int8", cpu_threads=threads or 0)
+    if backend != "whisper":
+        raise ValueError(f"Unknown transcription backend: {backend}")
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+    return whisper.load_model(model_name)
+
+
+def transcribe_words(model, audio, offset=0.0):
+    """Run the model on a path or 16 kHz float32 array and return its word list."""
+    if isinstance(model, whisper.Whisper):
+        result = model.transcribe(audio, fp16=False, word_timestamps=True)
+        return collect_words(result, offset=offset)
+
+    # faster-whisper returns a lazy generator of segments
+    segments, _info = model.transcribe(audio, word_timestamps=True)
+    all_words = []
+    for segment in segments:
+        for w in segment.words or []:
+            all_words.append({"word": w.word, "start": w.start + offset, "end": w.end + offset})
+    return all_words
+
+
+def transcribe_audio(audio_file, output_file, model=None, backend=None, proofread=True):
+    if model is None:
+        print(f"Loading Whisper model... This might take a moment.")
+        model = load_model(backend)
+    
+    print(f"Transcribing {audio_file} with word timestamps...")
+    # 1. Collect all words with timestamps
+    all_words = transcribe_words(model, load_audio(audio_file))
+
+    if not all_words:
+        print("Error: No word timestamps found. Fallback to segments.")
+        # Fallback logic could be added here, but for now we proceed
+    
+    # 2-4. BudouX phrases -> lines -> frame timings
+    subtitles = words_to_subtitles(all_words)
+    
+    # --- AI Proofreading Step ---
+    if proofread:
+        subtitles = proofread_subtitles(subtitles)
+    # ----------------------------
+
+    save_subtitles(subtitles, output_file)
+    return subtitles
+
+
+# --- Streaming (VAD-chunked) transcription ---
+
+def detect_speech_chunks(audio, sample_rate=SAMPLE_RATE,
+                         frame_ms=30, min_silence_sec=0.4, max_chunk_sec=30.0):
+    """
+    Energy-based voice activity detection.
+    Returns a list of (start_sample, end_sample) chunks that are cut in the
+    middle of silences, each at most ~max_chunk_sec long where possible.
+    """
+    frame_len = int(sample_rate * frame_ms / 1000)
+    n_frames = len(audio) // frame_len
+    if n_frames == 0:
+        return [(0, len(audio))] if len(audio) else []
+
+    frames = audio[:n_frames * frame_len].reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1) + 1e-12)
+    db = 20 * np.log10(rms)
+    # Speech threshold relative to the loud part of the file (robust to gain)
+    threshold = np.percentile(db, 95) - VAD_THRESHOLD_DB
+    voiced = db > threshold
+
+    # Find silence runs long enough to cut at
+    min_silence_frames = max(1, int(min_silence_sec * 1000 / frame_ms))
+    cut_points = []
+    run_start = None
+    for i, v in enumerate(voiced):
+        if not v and run_start is None:
+            run_start = i
+        elif v and run_start is not None:
+            if i - run_start >= min_silence_frames and run_start > 0:
+                cut_points.append(((run_start + i) // 2) * frame_len)
+            run_start = None
+
+    # Greedily merge speech between cut points up to max_chunk_sec
+    max_chunk = int(max_chunk_sec * sample_rate)
+    chunks = []
+    chunk_start = 0
+    last_cut = None
+    for cut in cut_points:
+        if cut - chunk_start > max_chunk and last_cut is not None and last_cut > chunk_start:
+            chunks.append((chunk_start, last_cut))
+            chunk_start = last_cut
+        last_cut = cut
+    if last_cut is not None and last_cut > chunk_start and len(audio) - chunk_start > max_chunk:
+        chunks.append((chunk_start, last_cut))
+        chunk_start = last_cut
+    chunks.append((chunk_start, len(audio)))
+    return chunks
+
+
+def transcribe_audio_streaming(audio_file, output_file, workers=None, backend=None, proofread=True):
+    """
+    Split audio on silence and transcribe the chunks (in parallel when
+    workers > 1). Subtitle lines are appended to a JSONL sidecar
+    (`*.jsonl` next to output_file) as each chunk becomes final, in order.
+    """
+    workers = workers or TRANSCRIBE_WORKERS
+    audio = load_audio(audio_file)
+    chunks = detect_speech_chunks(audio)
+    print(f"Streaming mode: {len(chunks)} chunks, {workers} worker(s)")
+
+    # One model per worker thread (Whisper models are not safe to share)
+    local = threading.local()
+
+    def transcribe_chunk(chunk):
+        if not hasattr(local, "model"):
+            print(f"Loading Whisper model in {threading.current_thread().name}...")
+            local.model = load_model(backend)
+        start, end = chunk
+        return transcribe_words(local.model, audio[start:end], offset=start / SAMPLE_RATE)
+
+    sidecar_file = output_file.replace(".json", ".jsonl")
+    os.makedirs(os.path.dirname(sidecar_file) or ".", exist_ok=True)
+    parser = budoux.load_default_japanese_parser()
+    subtitles = []
+
+    with open(sidecar_file, "w", encoding="utf-8") as sidecar, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        # map() yields in submission order, so lines are emitted in timeline order
+        for i, words in enumerate(executor.map(transcribe_chunk, chunks)):
+            chunk_subs = words_to_subtitles(words, parser=parser, verbose=False)
+            for sub in chunk_subs:
+                sidecar.write(json.dumps(sub, ensure_ascii=False) + "\n")
+            sidecar.flush()
+            subtitles.extend(chunk_subs)
+            print(f"  [Chunk {i+1}/{len(chunks)}] {len(chunk_subs)} lines")
+
+    print(f"Streamed lines to {sidecar_file}")
+
+    # --- AI Proofreading Step ---
+    if proofread:
+        subtitles = proofread_subtitles(subtitles)
+    # ----------------------------
+
+    save_subtitles(subtitles, output_file)
+    return subtitles
+
+
 if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Transcribe audio into subtitle JSON")
+    arg_parser.add_argument("audio_file", nargs="?")
+    arg_parser.add_argument("output_file", nargs="?")
+    arg_parser.add_argument("--stream", action="store_true",
+                            help="VAD-chunked transcription with incremental JSONL output")
+    arg_parser.add_argument("--workers", type=int, default=None,
+                            help="Parallel chunk workers in --stream mode")
+    args = arg_parser.parse_args()
+
     # Check for CLI arguments
-    if len(sys.argv) >= 3:
-        audio_in = sys.argv[1]
-        json_out = sys.argv[2]
+    if args.audio_file and args.output_file:
+        audio_in = args.audio_file
+        json_out = args.output_file
     else:
         audio_in = DEFAULT_AUDIO_FILE
         json_out = DEFAULT_OUTPUT_FILE
         print(f"Using default paths: {audio_in} -> {json_out}")
 
-    if not os.path.exists(audio_in):
+    if not os.path.exists(audio_in) and not os.path.exists(sidecar_path_for(audio_in)):
         print(f"Error: File {audio_in} not found.")
         sys.exit(1)
     
-    transcribe_audio(audio_in, json_out)
+    if args.stream:
+        transcribe_audio_streaming(audio_in, json_out, workers=args.workers)
+    else:
+        transcribe_audio(audio_in, json_out)
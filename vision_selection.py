@@ -0,0 +1,85 @@
+"""
+Helpers for GPT-4o vision selection of stock candidates.
+
+- Thumbnails are downloaded once into .cache/thumbnails/, downscaled and sent
+  inline as low-detail images (Pillow is optional; without it the remote URL
+  is sent with detail="low").
+- Decisions are cached in .cache/vision_selection.json keyed by
+  (hash of scene text, sorted candidate id set), so the same scene with the
+  same candidates never costs a second vision call. put() merges into the
+  file under an inter-process lock, so concurrent jobs keep each other's
+  decisions.
+"""
+import base64
+import hashlib
+import io
+import os
+import threading
+
+import file_lock
+from downloads import download_file
+
+THUMBNAIL_DIR = ".cache/thumbnails"
+DECISION_CACHE_FILE = ".cache/vision_selection.json"
+THUMBNAIL_MAX_SIZE = int(os.getenv("THUMBNAIL_MAX_SIZE", "384"))  # px, longest side
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+def thumbnail_image_part(candidate):
+    """OpenAI `image_url` content part for a candidate's thumbnail (low detail)."""
+    url = candidate["image"]
+    if Image is not None:
+        try:
+            local_path = os.path.join(THUMBNAIL_DIR, f"{candidate['id']}.jpg")
+            if not os.path.exists(local_path):
+                download_file(url, local_path)
+            with Image.open(local_path) as img:
+                img = img.convert("RGB")
+                img.thumbnail((THUMBNAIL_MAX_SIZE, THUMBNAIL_MAX_SIZE))
+                buf = io.BytesIO()
+                img.save(buf, format="JPEG", quality=70)
+            url = "data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode("utf-8")
+        except Exception as e:
+            print(f"  Could not prepare thumbnail {candidate['id']}: {e}. Sending remote URL.")
+    return {"type": "image_url", "image_url": {"url": url, "detail": "low"}}
+
+
+def decision_key(scene_text, candidates):
+    text_hash = hashlib.sha256(scene_text.encode("utf-8")).hexdigest()
+    ids = ",".join(sorted(str(c["id"]) for c in candidates))
+    return hashlib.sha256(f"{text_hash}:{ids}".encode("utf-8")).hexdigest()
+
+
+class DecisionCache:
+    def __init__(self, path=DECISION_CACHE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._decisions = None
+
+    def _load(self):
+        if self._decisions is None:
+            self._decisions = file_lock.read_json(self.path, {})
+        return self._decisions
+
+    def get(self, scene_text, candidates):
+        """Cached candidate for this scene/candidate set, or None."""
+        with self._lock:
+            selected_id = self._load().get(decision_key(scene_text, candidates))
+        if selected_id is None:
+            return None
+        return next((c for c in candidates if str(c["id"]) == str(selected_id)), None)
+
+    def put(self, scene_text, candidates, selected):
+        key = decision_key(scene_text, candidates)
+        with self._lock, file_lock.locked(self.path):
+            decisions = {**self._load(), **file_lock.read_json(self.path, {})}
+            decisions[key] = selected["id"]
+            file_lock.write_json(self.path, decisions)
+            self._decisions = decisions
+
+
+decision_cache = DecisionCache()
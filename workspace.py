@@ -0,0 +1,162 @@
+"""
+Per-job workspaces.
+
+Each video gets its own directory, public/jobs/<job_id>/, holding its input
+audio, generated assets (dragon image, lip-sync video, body track, audio
+mix), subtitles, manifest and render props. Several productions can then run
+side by side without overwriting each other's files. The directory lives
+under public/ so the compositions reach the assets through
+staticFile("jobs/<job_id>/..."), and the manifest and subtitles are handed
+to the render as input props instead of being imported from src/.
+
+Content-addressed data (the stock library, .cache/) stays shared.
+
+Workspace.shared() is the original fixed layout (public/assets + src/*.json)
+for runs without a job id.
+
+Usage:
+    python workspace.py list
+    python workspace.py props <job_id>     # (re)write props.json from the current files
+    python workspace.py remove <job_id>
+"""
+import json
+import os
+import shutil
+import sys
+import uuid
+from datetime import datetime
+
+import file_lock
+
+JOBS_DIR = "public/jobs"
+PROPS_FILE = "props.json"
+
+# Subtitle files whose current contents go into the render props
+SUBTITLE_PROPS = {
+    "titleSubtitles": "title_subtitles.json",
+    "bodySubtitles": "body_subtitles.json",
+    "subtitles": "subtitles.json",
+}
+
+
+def new_job_id():
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+
+def _write_json(path, data):
+    file_lock.write_json(path, data, ensure_ascii=False, indent=2)
+
+
+class Workspace:
+    def __init__(self, assets_dir, data_dir, manifest_paths, timings_path, job_id=None):
+        self.assets_dir = assets_dir
+        self.data_dir = data_dir
+        self.manifest_paths = manifest_paths
+        self.timings_path = timings_path
+        self.job_id = job_id
+
+    @classmethod
+    def create(cls, job_id=None):
+        """New (or resumed, if job_id exists) isolated job directory."""
+        job_id = job_id or new_job_id()
+        root = os.path.join(JOBS_DIR, job_id)
+        os.makedirs(root, exist_ok=True)
+        return cls(root, root, [os.path.join(root, "manifest.json")],
+                   os.path.join(root, "task_timings.json"), job_id=job_id)
+
+    @classmethod
+    def open(cls, job_id):
+        if not os.path.isdir(os.path.join(JOBS_DIR, job_id)):
+            raise FileNotFoundError(f"No job workspace '{job_id}' in {JOBS_DIR}")
+        return cls.create(job_id)
+
+    @classmethod
+    def shared(cls):
+        return cls("public/assets", "src", ["public/manifest.json", "src/dragon-manifest.json"],
+                   ".cache/task_timings.json")
+
+    @property
+    def root(self):
+        return self.assets_dir
+
+    def asset(self, name):
+        return os.path.join(self.assets_dir, name)
+
+    def data(self, name):
+        return os.path.join(self.data_dir, name)
+
+    @staticmethod
+    def public_path(local_path):
+        """'public/jobs/x/a.mp4' -> '/jobs/x/a.mp4' (Remotion staticFile path)."""
+        return "/" + os.path.relpath(local_path, "public").replace(os.sep, "/")
+
+    def import_file(self, src_path, name=None):
+        """Copy an input file into the asset dir (no-op if it is already there). Returns the local path."""
+        dest = self.asset(name or os.path.basename(src_path))
+        if os.path.abspath(src_path) != os.path.abspath(dest):
+            os.makedirs(self.assets_dir, exist_ok=True)
+            shutil.copy2(src_path, dest)
+        return dest
+
+    def write_manifest(self, manifest):
+        for path in self.manifest_paths:
+            _write_json(path, manifest)
+        return self.manifest_paths[0]
+
+    def load_manifest(self):
+        with open(self.manifest_paths[0], "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def write_props(self, **extra):
+        """
+        Input props for the render: the manifest (if any), every subtitle file
+        present in the data dir, plus `extra`. Written to <data dir>/props.json
+        (pass it as `--props=<path>`); returns the path.
+        """
+        props = {}
+        if os.path.exists(self.manifest_paths[0]):
+            props["manifest"] = self.load_manifest()
+        for prop, filename in SUBTITLE_PROPS.items():
+            path = self.data(filename)
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    props[prop] = json.load(f)
+        props.update(extra)
+        path = self.data(PROPS_FILE)
+        _write_json(path, props)
+        return path
+
+    def remove(self):
+        if self.job_id is None:
+            raise ValueError("Refusing to remove the shared workspace")
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def list_jobs():
+    if not os.path.isdir(JOBS_DIR):
+        return []
+    return sorted(d for d in os.listdir(JOBS_DIR) if os.path.isdir(os.path.join(JOBS_DIR, d)))
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ("list", "props", "remove"):
+        print("Usage: python workspace.py list | props <job_id> | remove <job_id>")
+        sys.exit(1)
+    command = sys.argv[1]
+    if command == "list":
+        for job_id in list_jobs():
+            print(job_id)
+        return
+    if len(sys.argv) < 3:
+        print(f"Usage: python workspace.py {command} <job_id>")
+        sys.exit(1)
+    ws = Workspace.open(sys.argv[2])
+    if command == "props":
+        print(ws.write_props())
+    else:
+        ws.remove()
+        print(f"Removed {ws.root}")
+
+
+if __name__ == "__main__":
+    main()